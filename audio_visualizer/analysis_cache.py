@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Any, Dict, Optional
+
+
+class AnalysisCache:
+    """Content-addressed on-disk cache of decoded audio and its analysis.
+
+    Entries are keyed by a hash of the audio file bytes plus the settings
+    that change the decoded signal (sample rate, normalize, bass boost), so
+    a renamed or re-uploaded copy of a track hits the same entry. Each entry
+    is a directory of ``.npy``/``.npz`` files; the PCM is memory-mapped on
+    load. Spectrograms are added to an entry lazily, one file per
+    parameter set. Least recently used entries are evicted past ``max_bytes``.
+    """
+
+    # Bump when the stored layout or the analysis itself changes
+    VERSION = 2
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, cache_config: Optional[Dict[str, Any]]) -> Optional['AnalysisCache']:
+        """Build a cache from the ``audio.cache`` config section, or None if disabled."""
+        if not cache_config or not cache_config.get('enabled', False):
+            return None
+        return cls(
+            cache_config.get('dir', '~/.cache/audio_visualizer'),
+            int(cache_config.get('max_size_mb', 2048) * 1024 * 1024),
+        )
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, audio_config: Dict[str, Any]) -> str:
+        settings = {
+            'version': self.VERSION,
+            'sample_rate': audio_config.get('sample_rate'),
+            'normalize': bool(audio_config.get('normalize', False)),
+            'bass_boost': float(audio_config.get('bass_boost', 1.0)),
+        }
+        digest = hashlib.sha256(self.file_digest(file_path).encode('ascii'))
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for ``key``, or None on a miss."""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            entry = dict(meta)
+            entry['audio_data'] = np.load(os.path.join(entry_dir, 'pcm.npy'), mmap_mode='r')
+            with np.load(os.path.join(entry_dir, 'analysis.npz')) as analysis:
+                entry['beats'] = analysis['beats']
+        except (OSError, ValueError, KeyError) as e:
+            # Half-written or corrupted entry: drop it and recompute
+            print(f"Discarding broken cache entry {key[:12]}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # The meta file's mtime is the entry's last use, for LRU eviction
+        os.utime(meta_path)
+        return entry
+
+    def store(self, key: str, audio_data: np.ndarray, sample_rate: int, duration: float,
+              tempo: float, beats: np.ndarray):
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        # Write into a scratch directory and rename it into place, so readers
+        # (other jobs, other processes) never see a partial entry
+        temp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=self.cache_dir)
+        try:
+            np.save(os.path.join(temp_dir, 'pcm.npy'), audio_data)
+            np.savez(os.path.join(temp_dir, 'analysis.npz'), beats=beats)
+            with open(os.path.join(temp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'sample_rate': int(sample_rate),
+                    'duration': float(duration),
+                    'tempo': float(tempo),
+                }, f)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Lost a race with another writer, or the disk is full
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+
+        self.evict(keep=key)
+
+    def _spectrogram_path(self, key: str, n_fft: int, hop_length: int, dtype) -> str:
+        name = f"spectrogram_{n_fft}_{hop_length}_{np.dtype(dtype).name}.npy"
+        return os.path.join(self._entry_dir(key), name)
+
+    def load_spectrogram(self, key: str, n_fft: int, hop_length: int,
+                         dtype) -> Optional[np.ndarray]:
+        path = self._spectrogram_path(key, n_fft, hop_length, dtype)
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def store_spectrogram(self, key: str, n_fft: int, hop_length: int,
+                          spectrogram: np.ndarray) -> Optional[np.ndarray]:
+        """Add a spectrogram to an existing entry; returns it memory-mapped."""
+        if not os.path.isdir(self._entry_dir(key)):
+            return None
+        path = self._spectrogram_path(key, n_fft, hop_length, spectrogram.dtype)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                np.save(f, spectrogram)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return None
+        self.evict(keep=key)
+        return self.load_spectrogram(key, n_fft, hop_length, spectrogram.dtype)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, 'meta.json')
+            if name.startswith('.'):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir)
+                )
+                entries.append((os.path.getmtime(meta_path), size, name))
+            except OSError:
+                continue  # not an entry, or removed by another process meanwhile
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used entries until the cache fits in ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(self._entry_dir(name), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, name in self._entries():
+            shutil.rmtree(self._entry_dir(name), ignore_errors=True)
@@ -0,0 +1,255 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+# Spectral analysis shared by the spectrum-style layers
+SPECTRUM_WINDOW = 0.08     # Audio window for spectra (seconds)
+MAX_FFT_SIZE = 4096
+MIN_FFT_SAMPLES = 256
+MAX_USEFUL_FREQ = 12000    # Hz — covers virtually all musical content
+
+# Rows per vectorized FFT batch, bounds peak memory of the frame gather
+BATCH_FRAMES = 256
+
+
+def log_bin_spectra(spectra: np.ndarray, bins: int) -> np.ndarray:
+    """Resample rows of a (frames, fft_bins) array onto ``bins`` log-spaced bands."""
+    num_fft = spectra.shape[1]
+
+    if num_fft <= bins:
+        # If we have fewer FFT bins than target, interpolate up
+        x_old = np.linspace(0, 1, num_fft)
+        x_new = np.linspace(0, 1, bins)
+        return np.array([np.interp(x_new, x_old, row) for row in spectra])
+
+    # Create logarithmically spaced center frequencies (skip DC)
+    log_centers = np.logspace(np.log10(1), np.log10(num_fft - 1), bins)
+    # Create bin edges as midpoints between centers
+    log_edges = np.zeros(bins + 1)
+    log_edges[0] = max(0, log_centers[0] - (log_centers[1] - log_centers[0]) / 2)
+    log_edges[-1] = min(num_fft, log_centers[-1] + (log_centers[-1] - log_centers[-2]) / 2)
+    log_edges[1:-1] = (log_centers[:-1] + log_centers[1:]) / 2
+
+    starts = np.clip(log_edges[:-1].astype(np.int64), 0, num_fft - 1)
+    ends = np.maximum(starts + 1, np.minimum(log_edges[1:].astype(np.int64), num_fft))
+
+    # Mean over [start, end) for every band at once via a running sum
+    cumsum = np.zeros((spectra.shape[0], num_fft + 1))
+    np.cumsum(spectra, axis=1, out=cumsum[:, 1:])
+    return (cumsum[:, ends] - cumsum[:, starts]) / (ends - starts)
+
+
+def _cut_log_spectra(fft: np.ndarray, fft_size: int, sample_rate: int,
+                     bins: int, min_bins: Optional[int]) -> np.ndarray:
+    # Limit to useful frequency range instead of full Nyquist,
+    # so all bins map to frequencies where music actually has content
+    max_bin_index = min(fft.shape[1], int(MAX_USEFUL_FREQ * fft_size / sample_rate))
+    max_bin_index = max(max_bin_index, bins if min_bins is None else min_bins)
+    # Log scale for perceptual loudness
+    return np.log1p(fft[:, :max_bin_index])
+
+
+def log_binned_spectrum(segment: Optional[np.ndarray], sample_rate: int, bins: int,
+                        min_bins: Optional[int] = None) -> Optional[np.ndarray]:
+    """Hann-windowed log-magnitude spectrum of one segment, log-binned to ``bins``.
+
+    Returns None when the segment is too short for a meaningful FFT.
+    """
+    if segment is None or len(segment) < MIN_FFT_SAMPLES:
+        return None
+
+    fft_size = min(MAX_FFT_SIZE, len(segment))
+    windowed = segment[:fft_size] * np.hanning(fft_size)
+    fft = np.abs(np.fft.rfft(windowed))[np.newaxis, :]
+    fft = _cut_log_spectra(fft, fft_size, sample_rate, bins, min_bins)
+    return log_bin_spectra(fft, bins)[0]
+
+
+class BeatIndex:
+    """Sorted beat times with O(log n) lookups via ``np.searchsorted``.
+
+    Every query accepts a scalar or an array of times, so a whole frame
+    timeline can be answered in one call.
+    """
+
+    def __init__(self, beats: Optional[np.ndarray] = None):
+        self.times = np.sort(np.asarray(beats if beats is not None else [], dtype=np.float64))
+        # Sentinels so every lookup has a previous and a next neighbor
+        self._padded = np.concatenate(([-np.inf], self.times, [np.inf]))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _neighbors(self, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Previous beat (<= t) and next beat (> t); -inf/inf when there is none
+        idx = np.searchsorted(self.times, times, side='right')
+        return self._padded[idx], self._padded[idx + 1]
+
+    def nearest_distance(self, times) -> np.ndarray:
+        """Distance to the nearest beat (inf when there are no beats)."""
+        times = np.asarray(times, dtype=np.float64)
+        previous, following = self._neighbors(times)
+        return np.minimum(times - previous, following - times)
+
+    def is_beat(self, time: float, threshold: float) -> bool:
+        return bool(self.nearest_distance(time) < threshold)
+
+    def beat_mask(self, times, threshold: float) -> np.ndarray:
+        """True where a beat lies within ``threshold`` seconds."""
+        return self.nearest_distance(times) < threshold
+
+    def time_since_beat(self, times) -> np.ndarray:
+        """Seconds since the last beat at or before each time (inf before the first)."""
+        times = np.asarray(times, dtype=np.float64)
+        previous, _ = self._neighbors(times)
+        return times - previous
+
+    def beat_phase(self, times) -> np.ndarray:
+        """Position between the surrounding beats in [0, 1) (NaN outside the beat grid)."""
+        times = np.asarray(times, dtype=np.float64)
+        previous, following = self._neighbors(times)
+        with np.errstate(invalid='ignore'):
+            phase = (times - previous) / (following - previous)
+        return np.where(np.isfinite(previous) & np.isfinite(following), phase, np.nan)
+
+
+class FrameFeatures:
+    """Frame-aligned audio feature tables for a fixed frame rate.
+
+    Row ``i`` describes the audio around ``i / fps`` using the same centered
+    windows as ``AudioProcessor.get_audio_segment``. Each table is computed
+    in one vectorized pass the first time it is requested and then reused,
+    so layers read a row per frame instead of redoing FFTs and RMS.
+    """
+
+    def __init__(self, audio_data: np.ndarray, sample_rate: int, fps: float,
+                 beats: Optional[np.ndarray] = None):
+        self.audio_data = audio_data
+        self.sample_rate = sample_rate
+        self.fps = fps
+        self.beat_index = beats if isinstance(beats, BeatIndex) else BeatIndex(beats)
+
+        duration = len(audio_data) / sample_rate
+        self.num_frames = int(duration * fps) + 1
+        # Same arithmetic as the render loops: frame_idx * (1 / fps)
+        self.times = np.arange(self.num_frames) * (1.0 / fps)
+
+        self._tables: Dict[tuple, np.ndarray] = {}
+        self._squares_cumsum = None
+
+    def frame_index(self, time: float) -> Optional[int]:
+        """Row for ``time`` if it lands on a frame of this table, else None."""
+        idx = int(round(time * self.fps))
+        if 0 <= idx < self.num_frames and abs(self.times[idx] - time) < 1e-6:
+            return idx
+        return None
+
+    def _segment_bounds(self, window: float) -> Tuple[np.ndarray, np.ndarray]:
+        half = window / 2
+        num_samples = len(self.audio_data)
+        starts = np.maximum(0, (self.times - half) * self.sample_rate).astype(np.int64)
+        ends = np.minimum(num_samples, (self.times + half) * self.sample_rate).astype(np.int64)
+        starts = np.minimum(starts, num_samples)
+        ends = np.maximum(ends, starts)
+        return starts, ends
+
+    def rms(self, window: float, min_samples: int = 1) -> np.ndarray:
+        """Per-frame RMS of the centered window (NaN where it holds fewer than ``min_samples``)."""
+        min_samples = max(min_samples, 1)
+        key = ('rms', window, min_samples)
+        if key not in self._tables:
+            if self._squares_cumsum is None:
+                squares = np.square(self.audio_data, dtype=np.float64)
+                self._squares_cumsum = np.concatenate(([0.0], np.cumsum(squares)))
+
+            starts, ends = self._segment_bounds(window)
+            lengths = ends - starts
+            cumsum = self._squares_cumsum
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_sq = (cumsum[ends] - cumsum[starts]) / lengths
+            rms = np.sqrt(np.maximum(mean_sq, 0.0))
+            rms[lengths < min_samples] = np.nan
+            self._tables[key] = rms
+        return self._tables[key]
+
+    def log_spectrum(self, bins: int, window: float = SPECTRUM_WINDOW,
+                     min_bins: Optional[int] = None) -> np.ndarray:
+        """Per-frame log-binned spectra, shape (frames, bins).
+
+        Rows are NaN where the window holds fewer than MIN_FFT_SAMPLES samples.
+        """
+        key = ('log_spectrum', bins, window, min_bins)
+        if key not in self._tables:
+            self._tables[key] = self._compute_log_spectrum(bins, window, min_bins)
+        return self._tables[key]
+
+    def _compute_log_spectrum(self, bins, window, min_bins):
+        starts, ends = self._segment_bounds(window)
+        lengths = ends - starts
+        table = np.full((self.num_frames, bins), np.nan)
+
+        valid = lengths >= MIN_FFT_SAMPLES
+        fft_sizes = np.minimum(MAX_FFT_SIZE, lengths)
+
+        # Interior frames share one FFT size; only the edges of the track differ
+        for fft_size in np.unique(fft_sizes[valid]):
+            rows = np.nonzero(valid & (fft_sizes == fft_size))[0]
+            hann = np.hanning(fft_size)
+            offsets = np.arange(fft_size)
+
+            for batch_start in range(0, len(rows), BATCH_FRAMES):
+                batch = rows[batch_start:batch_start + BATCH_FRAMES]
+                segments = self.audio_data[starts[batch, np.newaxis] + offsets]
+                fft = np.abs(np.fft.rfft(segments * hann, axis=1))
+                fft = _cut_log_spectra(fft, fft_size, self.sample_rate, bins, min_bins)
+                table[batch] = log_bin_spectra(fft, bins)
+
+        return table
+
+    def band_energies(self, window: float, fft_size: int = MIN_FFT_SAMPLES) -> np.ndarray:
+        """Per-frame mean FFT magnitude of bass/mids/highs, shape (frames, 3).
+
+        Uses an unwindowed FFT of the first ``fft_size`` samples of the window.
+        Rows are NaN where the window is shorter than ``fft_size``.
+        """
+        key = ('band_energies', window, fft_size)
+        if key not in self._tables:
+            starts, ends = self._segment_bounds(window)
+            table = np.full((self.num_frames, 3), np.nan)
+            rows = np.nonzero(ends - starts >= fft_size)[0]
+            offsets = np.arange(fft_size)
+
+            for batch_start in range(0, len(rows), BATCH_FRAMES):
+                batch = rows[batch_start:batch_start + BATCH_FRAMES]
+                segments = self.audio_data[starts[batch, np.newaxis] + offsets]
+                fft = np.abs(np.fft.rfft(segments, axis=1))
+                num_fft = fft.shape[1]
+                mid_start = num_fft // 8
+                mid_end = num_fft // 2
+                table[batch, 0] = fft[:, :mid_start].mean(axis=1)
+                table[batch, 1] = fft[:, mid_start:mid_end].mean(axis=1)
+                table[batch, 2] = fft[:, mid_end:].mean(axis=1)
+
+            self._tables[key] = table
+        return self._tables[key]
+
+    def beat_flags(self, threshold: float) -> np.ndarray:
+        """Per-frame flag: a detected beat lies within ``threshold`` seconds."""
+        key = ('beat_flags', threshold)
+        if key not in self._tables:
+            self._tables[key] = self.beat_index.beat_mask(self.times, threshold)
+        return self._tables[key]
+
+    def time_since_beat(self) -> np.ndarray:
+        """Per-frame seconds since the last beat (inf before the first beat)."""
+        key = ('time_since_beat',)
+        if key not in self._tables:
+            self._tables[key] = self.beat_index.time_since_beat(self.times)
+        return self._tables[key]
+
+    def beat_phase(self) -> np.ndarray:
+        """Per-frame position between surrounding beats in [0, 1), NaN outside them."""
+        key = ('beat_phase',)
+        if key not in self._tables:
+            self._tables[key] = self.beat_index.beat_phase(self.times)
+        return self._tables[key]
@@ -4,6 +4,9 @@ from typing import Dict, Any, Optional
 import os
 from abc import ABC, abstractmethod
 
+from .analysis_cache import AnalysisCache
+from .audio_features import BeatIndex, FrameFeatures
+
 
 class IAudioSource(ABC):
     @abstractmethod
@@ -32,8 +35,12 @@ class AudioProcessor(IAudioSource):
         self.sample_rate = None
         self.duration = None
         self.beats = None
-        self.spectrogram = None
+        self.beat_index = BeatIndex()
+        self._spectrograms = {}
+        self._cache = None
+        self._cache_key = None
         self.original_audio_path = None
+        self.frame_features = None
         
     def load_audio(self, file_path: str):
         if not os.path.exists(file_path):
@@ -43,6 +50,28 @@ class AudioProcessor(IAudioSource):
         self.original_audio_path = file_path
         
         audio_config = self.config['audio']
+        cache = AnalysisCache.from_config(audio_config.get('cache'))
+        cache_key = cache.make_key(file_path, audio_config) if cache else None
+        self._cache, self._cache_key = cache, cache_key
+        self._spectrograms = {}
+        
+        if cache and self._load_from_cache(cache, cache_key):
+            print(f"Loaded decoded audio and analysis from cache ({cache_key[:12]})")
+            print(f"Duration: {self.duration:.2f} sec, Sample rate: {self.sample_rate} Hz")
+            print(f"Tempo: {self.tempo:.0f} BPM, Beats: {len(self.beats)}")
+        else:
+            self._decode_audio(file_path, audio_config)
+            self._analyze_audio()
+            if cache:
+                cache.store(cache_key, self.audio_data, self.sample_rate, self.duration,
+                            self.tempo, self.beats)
+        
+        fps = self.config.get('video', {}).get('fps')
+        if fps:
+            self.prepare_frame_features(fps)
+        return self
+    
+    def _decode_audio(self, file_path: str, audio_config: Dict[str, Any]):
         self.audio_data, self.sample_rate = librosa.load(
             file_path,
             sr=audio_config['sample_rate'],
@@ -57,9 +86,19 @@ class AudioProcessor(IAudioSource):
         
         if audio_config.get('bass_boost', 1.0) != 1.0:
             self._apply_bass_boost(audio_config['bass_boost'])
-        
-        self._analyze_audio()
-        return self
+    
+    def _load_from_cache(self, cache: AnalysisCache, key: str) -> bool:
+        entry = cache.load(key)
+        if entry is None:
+            return False
+        # Memory-mapped and read-only: pages are shared with other jobs on the same track
+        self.audio_data = entry['audio_data']
+        self.sample_rate = entry['sample_rate']
+        self.duration = entry['duration']
+        self.tempo = entry['tempo']
+        self.beats = entry['beats']
+        self.beat_index = BeatIndex(self.beats)
+        return True
     
     def _apply_bass_boost(self, factor: float):
         from scipy import signal
@@ -80,9 +119,49 @@ class AudioProcessor(IAudioSource):
             self.tempo = float(tempo)
         
         self.beats = librosa.frames_to_time(beats, sr=self.sample_rate)
-        self.spectrogram = np.abs(librosa.stft(self.audio_data))
+        self.beat_index = BeatIndex(self.beats)
         print(f"Tempo: {self.tempo:.0f} BPM, Beats: {len(self.beats)}")
     
+    @property
+    def spectrogram(self) -> Optional[np.ndarray]:
+        """Full-track magnitude STFT with librosa's defaults, computed on first use."""
+        return self.get_spectrogram()
+    
+    def get_spectrogram(self, n_fft: int = 2048, hop_length: int = 512,
+                        dtype=np.float32) -> Optional[np.ndarray]:
+        """Magnitude STFT of the whole track, shape (1 + n_fft // 2, frames).
+        
+        Nothing reads a full-track spectrogram while rendering, so it is only
+        built when a consumer asks, at that consumer's hop size. Pass
+        ``dtype=np.float16`` to halve its memory. With the analysis cache
+        enabled it is stored next to the cached PCM and memory-mapped.
+        """
+        if self.audio_data is None:
+            return None
+        
+        key = (n_fft, hop_length, np.dtype(dtype).name)
+        if key not in self._spectrograms:
+            spectrogram = None
+            if self._cache:
+                spectrogram = self._cache.load_spectrogram(self._cache_key, n_fft, hop_length, dtype)
+            if spectrogram is None:
+                spectrogram = np.abs(
+                    librosa.stft(self.audio_data, n_fft=n_fft, hop_length=hop_length)
+                ).astype(dtype, copy=False)
+                if self._cache:
+                    mapped = self._cache.store_spectrogram(
+                        self._cache_key, n_fft, hop_length, spectrogram
+                    )
+                    if mapped is not None:
+                        spectrogram = mapped
+            self._spectrograms[key] = spectrogram
+        return self._spectrograms[key]
+    
+    def prepare_frame_features(self, fps: float) -> FrameFeatures:
+        """Set up frame-aligned feature tables for rendering at ``fps``."""
+        self.frame_features = FrameFeatures(self.audio_data, self.sample_rate, fps, self.beat_index)
+        return self.frame_features
+    
     def get_audio_segment(self, time_point: float, window_duration: float = 1.0) -> Optional[np.ndarray]:
         if self.audio_data is None:
             return None
@@ -96,9 +175,17 @@ class AudioProcessor(IAudioSource):
         return self.audio_data[start_sample:end_sample]
     
     def is_beat_at_time(self, time: float, threshold: float = 0.1) -> bool:
-        if self.beats is None:
-            return False
-        return np.any(np.abs(self.beats - time) < threshold)
+        return self.beat_index.is_beat(time, threshold)
+    
+    def beat_mask(self, times, threshold: float = 0.1) -> np.ndarray:
+        """Vectorized is_beat_at_time over an array of times."""
+        return self.beat_index.beat_mask(times, threshold)
+    
+    def time_since_beat(self, times) -> np.ndarray:
+        return self.beat_index.time_since_beat(times)
+    
+    def beat_phase(self, times) -> np.ndarray:
+        return self.beat_index.beat_phase(times)
     
     @property
     def duration(self) -> float:
@@ -1,34 +1,88 @@
 import argparse
 import os
+import stat
 import sys
 from pathlib import Path
 
 from audio_visualizer.config_loader import ConfigLoader, ConfigError
 from audio_visualizer.audio_processor import AudioProcessor
+from audio_visualizer.streaming_audio import StreamingAudioSource
+from audio_visualizer.live_audio import LiveAudioSource
+from audio_visualizer.realtime_renderer import RealtimeRenderer
+from audio_visualizer.still import StillRenderer, encode_image, image_format
 from audio_visualizer.visualizer_factory import VisualizerFactory
 from audio_visualizer.video_renderer import VideoRenderer
 
 
+def run_live(config, args):
+    source = LiveAudioSource(config)
+    is_pipe = args.audio_file == '-' or stat.S_ISFIFO(os.stat(args.audio_file).st_mode)
+    if is_pipe:
+        source.open_pipe(args.audio_file)
+    else:
+        source.replay_file(args.audio_file)
+    
+    visualizer = VisualizerFactory.create('pipeline', config, source)
+    renderer = VideoRenderer(config)
+    # A replayed file starts with the session, so it can be muxed back in
+    encoder = renderer.create_encoder(args.output, None if is_pipe else args.audio_file)
+    
+    try:
+        with encoder:
+            RealtimeRenderer(config).run(source, visualizer, encoder.write, args.duration)
+    finally:
+        source.close()
+    print(f"Recording: {args.output}")
+
+
+def run_still(config, audio_proc, args):
+    if not 0 <= args.still <= audio_proc.duration:
+        raise ValueError(f"--still {args.still} is outside the track (0-{audio_proc.duration:.2f} s)")
+    
+    visualizer = VisualizerFactory.create('pipeline', config, audio_proc)
+    still = StillRenderer(visualizer, config['video']['fps'],
+                          config['video'].get('preroll_seconds', 2.0))
+    with open(args.output, 'wb') as f:
+        f.write(encode_image(still.render(args.still), image_format(args.output)))
+    print(f"Still at {args.still:.2f} s: {args.output}")
+
+
 def cli():
     parser = argparse.ArgumentParser(
         description='Audio Visualizer - create visualizations for audio files'
     )
     parser.add_argument('audio_file', help='Path to audio file')
-    parser.add_argument('-o', '--output', default='output.mp4', 
-                       help='Path for output video file')
+    parser.add_argument('-o', '--output', default=None,
+                       help='Path for output video file (default: output.mp4, or still.png with --still)')
     parser.add_argument('-c', '--config', default=None,
                        help='Path to YAML configuration file')
     parser.add_argument('--width', type=int, help='Video width')
     parser.add_argument('--height', type=int, help='Video height')
     parser.add_argument('--fps', type=int, help='Video FPS')
+    parser.add_argument('--workers', type=int,
+                       help='Parallel render processes (0 = one per CPU core)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Decode audio in blocks instead of loading it whole (long recordings)')
+    parser.add_argument('--live', action='store_true',
+                       help='Render in real time from a live source: the audio file is replayed '
+                            'at real-time speed, or a FIFO/"-" supplies raw mono float32 PCM')
+    parser.add_argument('--duration', type=float,
+                       help='Stop a --live session after this many seconds')
+    parser.add_argument('--still', type=float, metavar='T',
+                       help='Render only the frame at T seconds, as a PNG or JPEG image')
     parser.add_argument('--debug', action='store_true', 
                        help='Enable debug mode')
     
     args = parser.parse_args()
+    if args.output is None:
+        args.output = 'still.png' if args.still is not None else 'output.mp4'
     
-    if not os.path.exists(args.audio_file):
+    if not os.path.exists(args.audio_file) and not (args.live and args.audio_file == '-'):
         print(f"Error: File {args.audio_file} not found!")
         sys.exit(1)
+    if args.still is not None and image_format(args.output) is None:
+        print(f"Error: --still writes .png or .jpg images, not {args.output}")
+        sys.exit(1)
     
     try:
         config_loader = ConfigLoader(args.config)
@@ -40,6 +94,8 @@ def cli():
             config['video']['height'] = args.height
         if args.fps:
             config['video']['fps'] = args.fps
+        if args.workers is not None:
+            config['video']['workers'] = args.workers
         
         if args.debug:
             config['debug'] = True
@@ -54,9 +110,20 @@ def cli():
             pipeline_order = config['pipeline'].get('order', [])
             print(f"Layer order: {', '.join(pipeline_order)}")
         
-        audio_proc = AudioProcessor(config)
+        if args.live:
+            run_live(config, args)
+            return
+        
+        if args.stream:
+            audio_proc = StreamingAudioSource(config)
+        else:
+            audio_proc = AudioProcessor(config)
         audio_proc.load_audio(args.audio_file)
         
+        if args.still is not None:
+            run_still(config, audio_proc, args)
+            return
+        
         visualizer = VisualizerFactory.create('pipeline', config, audio_proc)
         
         renderer = VideoRenderer(config)
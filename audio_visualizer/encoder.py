@@ -0,0 +1,149 @@
+import subprocess
+import tempfile
+from time import perf_counter
+import numpy as np
+from typing import Optional, List
+
+
+class FFmpegEncoder:
+    """Streams raw BGR frames into a single ffmpeg process.
+
+    ffmpeg reads the frames as ``bgr24`` from stdin, so no per-frame color
+    conversion is needed. When ``audio_path`` is given the audio is encoded
+    and muxed in the same pass, so no intermediate video file is written;
+    ``audio_offset`` seconds of it are skipped first, for renders of a
+    window of the track.
+
+    With ``fragment_seconds`` the output is a fragmented MP4 with a
+    keyframe, and so a new fragment, every ``fragment_seconds``. Each
+    fragment is playable as soon as it is written, so the file can be
+    watched while it is still being rendered.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 audio_path: Optional[str] = None, codec: str = 'libx264',
+                 preset: str = 'medium', crf: int = 18, audio_bitrate: str = '192k',
+                 output_args: Optional[List[str]] = None, audio_offset: float = 0.0,
+                 fragment_seconds: Optional[float] = None):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio_path = audio_path
+        self.audio_offset = audio_offset
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.audio_bitrate = audio_bitrate
+        self.output_args = output_args or []
+        self.fragment_seconds = fragment_seconds
+        self.process = None
+        self._stderr = None
+        # Optional FrameProfiler for the convert/encode spans of write()
+        self.profiler = None
+
+    def build_command(self) -> List[str]:
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{self.width}x{self.height}',
+            '-r', str(self.fps),
+            '-i', '-',
+        ]
+        if self.audio_path:
+            if self.audio_offset > 0:
+                cmd += ['-ss', f'{self.audio_offset:.3f}']
+            cmd += ['-i', self.audio_path, '-map', '0:v:0', '-map', '1:a:0']
+
+        cmd += [
+            '-c:v', self.codec,
+            '-preset', self.preset,
+            '-crf', str(self.crf),
+            '-pix_fmt', 'yuv420p',
+        ]
+        if self.audio_path:
+            cmd += ['-c:a', 'aac', '-b:a', self.audio_bitrate, '-shortest']
+        else:
+            cmd += ['-an']
+
+        if self.fragment_seconds:
+            cmd += [
+                '-g', str(max(1, int(round(self.fps * self.fragment_seconds)))),
+                '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+                # Write each fragment out as soon as it is complete
+                '-flush_packets', '1',
+            ]
+
+        return cmd + self.output_args + [self.output_path]
+
+    def open(self):
+        # stderr goes to a file: a pipe nobody reads could fill up and stall ffmpeg
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            self.build_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+        return self
+
+    def write(self, frame: np.ndarray):
+        if self.process is None:
+            self.open()
+        start = perf_counter()
+        data = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self.profiler is not None:
+            write_start = perf_counter()
+            self.profiler.record('convert', start, write_start)
+            start = write_start
+        try:
+            self.process.stdin.write(data.data)
+            if self.profiler is not None:
+                self.profiler.record('encode', start)
+        except BrokenPipeError:
+            self.process.wait()
+            raise RuntimeError(f"FFmpeg error: {self._read_stderr()}") from None
+
+    def close(self):
+        """Finish the stream and wait for ffmpeg to finalize the output file."""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        error = self._read_stderr()
+        self._cleanup()
+        if returncode != 0:
+            raise RuntimeError(f"FFmpeg error: {error}")
+
+    def abort(self):
+        """Stop ffmpeg without finalizing the output."""
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.wait()
+        self._cleanup()
+
+    def _read_stderr(self) -> str:
+        if self._stderr is None:
+            return ''
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', errors='replace')[:200]
+
+    def _cleanup(self):
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+        self.process = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import threading
+import numpy as np
+from typing import Any, BinaryIO, Dict, Optional
+
+from .audio_features import BeatIndex
+from .audio_processor import IAudioSource
+from .streaming_audio import OnsetBeatDetector
+
+
+class LiveAudioSource(IAudioSource):
+    """Audio source fed by a rolling PCM stream.
+
+    Samples arrive through ``push`` — directly from any callback (e.g. a
+    sound card driver), from a raw float32 FIFO/pipe via ``feed_from_pipe``,
+    or from an audio file replayed in real time via ``replay_file`` as a
+    stand-in for a microphone or loopback device. Time is measured in
+    seconds of audio received; only the last ``buffer_seconds`` are kept.
+    Beats are detected online as the samples come in.
+    """
+
+    BLOCK_SECONDS = 0.02
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        audio_config = config['audio']
+        live_config = audio_config.get('live', {})
+        self.sample_rate = audio_config.get('sample_rate') or 44100
+        self.buffer_seconds = live_config.get('buffer_seconds', 10.0)
+        self.original_audio_path = None
+        self.frame_features = None
+
+        self.capacity = int(self.buffer_seconds * self.sample_rate)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.samples_received = 0
+        self.beat_detector = OnsetBeatDetector(self.sample_rate)
+        self.ended = threading.Event()
+
+        self._lock = threading.Lock()
+        self._feeder = None
+        self._process = None
+
+    def push(self, samples: np.ndarray):
+        """Append mono float samples; safe to call from any thread."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+        count = len(samples)
+        with self._lock:
+            # Circular write: absolute sample n lives at buffer[n % capacity]
+            start = self.samples_received % self.capacity
+            first = min(count, self.capacity - start)
+            self.buffer[start:start + first] = samples[:first]
+            self.buffer[:count - first] = samples[first:]
+            self.samples_received += count
+            self.beat_detector.process(samples)
+            self.beat_detector.forget_before(self.current_time - self.buffer_seconds)
+
+    @property
+    def current_time(self) -> float:
+        """Seconds of audio received so far: the live edge of the stream."""
+        return self.samples_received / self.sample_rate
+
+    def get_audio_segment(self, time_point: float, window_duration: float = 1.0) -> Optional[np.ndarray]:
+        with self._lock:
+            oldest = max(0, self.samples_received - self.capacity)
+            start_sample = int(max(oldest, (time_point - window_duration / 2) * self.sample_rate))
+            end_sample = int(min(self.samples_received, (time_point + window_duration / 2) * self.sample_rate))
+            if start_sample >= end_sample:
+                return None
+            # Copy out: the feeder thread keeps overwriting the ring
+            indices = np.arange(start_sample, end_sample) % self.capacity
+            return self.buffer[indices]
+
+    def _beat_index(self) -> BeatIndex:
+        with self._lock:
+            return BeatIndex(np.fromiter(self.beat_detector.beats, dtype=np.float64))
+
+    def is_beat_at_time(self, time: float, threshold: float = 0.1) -> bool:
+        return self._beat_index().is_beat(time, threshold)
+
+    def time_since_beat(self, time: float) -> float:
+        return float(self._beat_index().time_since_beat(time))
+
+    def beat_phase(self, time: float) -> float:
+        return float(self._beat_index().beat_phase(time))
+
+    @property
+    def tempo(self) -> float:
+        beats = self._beat_index().times
+        if len(beats) < 2:
+            return 120.0
+        return float(60.0 / np.median(np.diff(beats)))
+
+    @property
+    def duration(self) -> float:
+        return self.current_time
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate if hasattr(self, '_sample_rate') else 0
+
+    @sample_rate.setter
+    def sample_rate(self, value: int):
+        self._sample_rate = value
+
+    def feed_from_pipe(self, stream: BinaryIO):
+        """Start a thread pushing raw mono float32 (f32le) PCM read from ``stream``."""
+        block_bytes = max(1, int(self.BLOCK_SECONDS * self.sample_rate)) * 4
+
+        def run():
+            try:
+                while True:
+                    data = stream.read(block_bytes)
+                    if not data:
+                        break
+                    data = data[:len(data) - len(data) % 4]
+                    if data:
+                        self.push(np.frombuffer(data, dtype=np.float32))
+            finally:
+                self.ended.set()
+
+        self._feeder = threading.Thread(target=run, daemon=True)
+        self._feeder.start()
+        return self
+
+    def open_pipe(self, path: str):
+        """Read raw PCM from a FIFO or file path (``-`` for stdin)."""
+        if path == '-':
+            return self.feed_from_pipe(os.fdopen(os.dup(0), 'rb'))
+        return self.feed_from_pipe(open(path, 'rb'))
+
+    def replay_file(self, file_path: str):
+        """Replay an audio file at real-time speed, as a stand-in for a live input."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Audio file not found: {file_path}")
+        self.original_audio_path = file_path
+        # -re makes ffmpeg deliver samples no faster than real time
+        self._process = subprocess.Popen(
+            ['ffmpeg', '-loglevel', 'error', '-re', '-i', file_path,
+             '-f', 'f32le', '-ac', '1', '-ar', str(self.sample_rate), '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        return self.feed_from_pipe(self._process.stdout)
+
+    def close(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        self.ended.set()
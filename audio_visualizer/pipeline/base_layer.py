@@ -1,12 +1,42 @@
 from abc import ABC, abstractmethod
+from fractions import Fraction
+from time import perf_counter
 import numpy as np
 import cv2
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from ..audio_features import SPECTRUM_WINDOW, log_binned_spectrum
 
 
 class BaseLayer(ABC):
     layer_type: str = "base"
     
+    # Layers that set this report everything they draw through _mark_dirty*,
+    # so blending (and clearing the canvas) can be limited to that rectangle
+    tracks_dirty_rect: bool = False
+    
+    # Blend modes for which a black foreground leaves the background unchanged
+    ROI_BLEND_MODES = ('add', 'screen', 'multiply')
+    
+    # layer_config values the quality governor may scale down, as
+    # key -> (default, minimum); see set_quality_level
+    QUALITY_KNOBS: Dict[str, tuple] = {}
+    
+    # Factor applied to every quality knob at each level (0 = as configured);
+    # level 1 only turns anti-aliasing off, and is skipped by layers that
+    # are not antialiased (see quality_factors)
+    QUALITY_FACTORS = (1.0, 1.0, 0.5, 0.25)
+    
+    # Layers that set this draw lines with self.line_type
+    antialiased: bool = False
+    
+    # layer_config lengths in pixels, as key -> default; a layer with a
+    # render_scale (or a video.pixel_scale render) gets them scaled to its canvas
+    PIXEL_PARAMS: Dict[str, Any] = {}
+    
+    # Whether PipelineRenderer may build the layer on a reduced canvas
+    scalable: bool = True
+    
     def __init__(self, config: Dict[str, Any], audio_processor, width: int, height: int):
         self.config = config
         self.audio = audio_processor
@@ -22,54 +52,350 @@ class BaseLayer(ABC):
         
         self.opacity = self.layer_config.get('opacity', 1.0)
         self.blend_mode = self.layer_config.get('blend_mode', 'overwrite')
+        
+        # Size of the frames this layer composites into; differs from
+        # width/height when PipelineRenderer built it with a render_scale
+        self.render_scale = min(float(self.layer_config.get('render_scale', 1.0)), 1.0)
+        self.output_width = width
+        self.output_height = height
+        # Canvas pixels per pixel of the resolution the settings were made
+        # for; sizes not covered by PIXEL_PARAMS are multiplied by it
+        self.pixel_scale = self.render_scale * config.get('video', {}).get('pixel_scale', 1.0)
+        self._small_frame = None
+        self._upscaled = None
+        self._upscaled_source = None
+        
+        # Scratch buffers for blended rendering, allocated once and reused
+        self._canvas = None
+        self._canvas_rect = None
+        self._blend_buffer = None
+        self._blend_mask = None
+        
+        # Bounding box drawn this frame, see _mark_dirty
+        self._dirty_rect = None
+        
+        self.quality_level = 0
+        self.line_type = cv2.LINE_AA
+        self._base_layer_config = None
+        
+        # Set by PipelineRenderer.set_profiler; records upscale/blend spans
+        self.profiler = None
+    
+    @classmethod
+    def scale_pixel_params(cls, layer_config: Dict[str, Any], scale: float) -> Dict[str, Any]:
+        """Copy of ``layer_config`` with PIXEL_PARAMS sized for a canvas ``scale`` times as large."""
+        scaled = dict(layer_config)
+        for key, default in cls.PIXEL_PARAMS.items():
+            value = layer_config.get(key, default)
+            if isinstance(value, int) and not isinstance(value, bool):
+                scaled[key] = max(1, int(round(value * scale))) if value > 0 else value
+            elif isinstance(value, float):
+                scaled[key] = value * scale
+        return scaled
+    
+    @property
+    def is_scaled(self) -> bool:
+        return (self.width, self.height) != (self.output_width, self.output_height)
     
     def render(self, time: float, frame: np.ndarray) -> np.ndarray:
         if self.blend_mode == 'overwrite' or self.opacity >= 0.99:
-            return self._render_direct(time, frame)
+            if not self.is_scaled:
+                return self._render_direct(time, frame)
+            # Drawn over a downsampled copy of the frame below, then scaled
+            # back up; meant for the first layer (a background)
+            self._small_frame = cv2.resize(frame, (self.width, self.height), dst=self._small_frame,
+                                           interpolation=cv2.INTER_AREA)
+            small = self._render_direct(time, self._small_frame)
+            if small.flags.writeable:
+                return cv2.resize(small, (frame.shape[1], frame.shape[0]), dst=frame,
+                                  interpolation=cv2.INTER_LINEAR)
+            # A cached read-only plate: upscale it once and share the result too
+            if self._upscaled_source is not small:
+                self._upscaled = cv2.resize(small, (frame.shape[1], frame.shape[0]),
+                                            interpolation=cv2.INTER_LINEAR)
+                self._upscaled.flags.writeable = False
+                self._upscaled_source = small
+            return self._upscaled
+        
+        layer_canvas = self._get_canvas((self.height, self.width) + frame.shape[2:])
+        self._dirty_rect = None
+        layer_canvas = self._render_direct(time, layer_canvas)
+        
+        rect = None
+        if self.tracks_dirty_rect and layer_canvas is self._canvas:
+            rect = self._dirty_rect or (0, 0, 0, 0)
+            self._canvas_rect = rect
         else:
-            layer_canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-            layer_canvas = self._render_direct(time, layer_canvas)
+            self._canvas_rect = None
+        
+        if self.is_scaled:
+            start = perf_counter()
+            layer_canvas, rect = self._upscale(layer_canvas, frame.shape, rect)
+            if self.profiler is not None:
+                self.profiler.record(f"upscale:{self.layer_type}", start)
+        
+        start = perf_counter()
+        frame = self._composite(frame, layer_canvas, rect)
+        if self.profiler is not None:
+            self.profiler.record(f"blend:{self.layer_type}", start)
+        return frame
+    
+    def _composite(self, frame: np.ndarray, layer_canvas: np.ndarray, rect) -> np.ndarray:
+        if rect is None or self.blend_mode not in self.ROI_BLEND_MODES:
             return self._apply_blend(frame, layer_canvas)
+        
+        x0, y0, x1, y1 = rect
+        if x1 > x0 and y1 > y0:
+            # Views into both frames: the blend writes straight into ``frame``
+            self._apply_blend(frame[y0:y1, x0:x1], layer_canvas[y0:y1, x0:x1])
+        return frame
+    
+    @property
+    def quality_factors(self) -> tuple:
+        """QUALITY_FACTORS for this layer; without anti-aliasing the level-1 step would change nothing."""
+        if self.antialiased:
+            return self.QUALITY_FACTORS
+        return self.QUALITY_FACTORS[:1] + self.QUALITY_FACTORS[2:]
+    
+    @property
+    def max_quality_level(self) -> int:
+        if self.QUALITY_KNOBS:
+            return len(self.quality_factors) - 1
+        return 1 if self.antialiased else 0
+    
+    def set_quality_level(self, level: int):
+        """Render at a lower quality level; 0 restores the configured settings."""
+        level = max(0, min(level, self.max_quality_level))
+        if level == self.quality_level:
+            return
+        # Subclasses may rebind layer_config in their __init__, so the
+        # configured values are captured on the first change
+        if self._base_layer_config is None:
+            self._base_layer_config = self.layer_config
+        base = self._base_layer_config
+        
+        if level == 0:
+            self.layer_config = base
+        else:
+            factor = self.quality_factors[level]
+            layer_config = dict(base)
+            for key, (default, minimum) in self.QUALITY_KNOBS.items():
+                value = base.get(key, default)
+                scaled = max(min(minimum, value), value * factor)
+                layer_config[key] = int(round(scaled)) if isinstance(value, int) else scaled
+            self.layer_config = layer_config
+        
+        self.line_type = cv2.LINE_AA if level == 0 else cv2.LINE_8
+        self.quality_level = level
+    
+    @staticmethod
+    def _upscaled_span(low: int, high: int, size: int, out_size: int):
+        """Source and output span covering [low, high) plus the bilinear taps around it.
+        
+        The source span starts and ends on multiples of the ratio's
+        denominator, so resizing just that span lands on exactly the pixels
+        (and values) a full-canvas resize would produce.
+        """
+        step = Fraction(out_size, size).denominator
+        low = max(0, low - 1) // step * step
+        high = min(size, -(-(high + 1) // step) * step)
+        return low, high, low * out_size // size, high * out_size // size
+    
+    def _upscale(self, canvas: np.ndarray, shape, rect):
+        """Upsample a reduced-size canvas to ``shape``, mapping its dirty rect along."""
+        if self._upscaled is None or self._upscaled.shape != shape:
+            self._upscaled = np.empty(shape, dtype=np.uint8)
+        out_height, out_width = shape[:2]
+        if rect is None:
+            cv2.resize(canvas, (out_width, out_height), dst=self._upscaled,
+                       interpolation=cv2.INTER_LINEAR)
+            return self._upscaled, None
+        
+        x0, y0, x1, y1 = rect
+        if x1 <= x0 or y1 <= y0:
+            return self._upscaled, rect
+        # Only the dirty area is resized; the rest of the buffer is never read
+        sx0, sx1, x0, x1 = self._upscaled_span(x0, x1, self.width, out_width)
+        sy0, sy1, y0, y1 = self._upscaled_span(y0, y1, self.height, out_height)
+        cv2.resize(canvas[sy0:sy1, sx0:sx1], (x1 - x0, y1 - y0), dst=self._upscaled[y0:y1, x0:x1],
+                   interpolation=cv2.INTER_LINEAR)
+        return self._upscaled, (x0, y0, x1, y1)
+    
+    def _get_canvas(self, shape) -> np.ndarray:
+        """Per-layer scratch canvas, cleared in place instead of reallocated."""
+        if self._canvas is None or self._canvas.shape != shape:
+            self._canvas = np.zeros(shape, dtype=np.uint8)
+        elif self._canvas_rect is None:
+            self._canvas.fill(0)
+        else:
+            # Only the area drawn last frame can be non-zero
+            x0, y0, x1, y1 = self._canvas_rect
+            self._canvas[y0:y1, x0:x1] = 0
+        return self._canvas
+    
+    def _get_blend_buffer(self, shape) -> np.ndarray:
+        # Sized for the full frame; dirty-rect blends use the top-left corner
+        height, width = shape[:2]
+        if (self._blend_buffer is None or self._blend_buffer.shape[0] < height
+                or self._blend_buffer.shape[1] < width):
+            self._blend_buffer = np.empty((max(height, self.height), max(width, self.width), 3),
+                                          dtype=np.uint8)
+        return self._blend_buffer[:height, :width]
+    
+    def _get_blend_mask(self, shape) -> np.ndarray:
+        height, width = shape[:2]
+        if (self._blend_mask is None or self._blend_mask.shape[0] < height
+                or self._blend_mask.shape[1] < width):
+            self._blend_mask = np.empty((max(height, self.height), max(width, self.width)),
+                                        dtype=np.uint8)
+        return self._blend_mask[:height, :width]
+    
+    def _mark_dirty(self, x0, y0, x1, y1, pad: int = 0):
+        """Grow this frame's dirty rect to cover pixels [x0, x1) x [y0, y1), plus ``pad``."""
+        x0 = max(0, int(np.floor(x0)) - pad)
+        y0 = max(0, int(np.floor(y0)) - pad)
+        x1 = min(self.width, int(np.ceil(x1)) + pad)
+        y1 = min(self.height, int(np.ceil(y1)) + pad)
+        if self._dirty_rect is not None:
+            rx0, ry0, rx1, ry1 = self._dirty_rect
+            x0, y0, x1, y1 = min(x0, rx0), min(y0, ry0), max(x1, rx1), max(y1, ry1)
+        self._dirty_rect = (x0, y0, max(x0, x1), max(y0, y1))
+    
+    def _mark_dirty_points(self, points, pad: int = 0):
+        """Mark the bounding box of (n, 2) x/y points; ``pad`` covers line width."""
+        points = np.asarray(points).reshape(-1, 2)
+        if len(points) == 0:
+            return
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        self._mark_dirty(low[0], low[1], high[0] + 1, high[1] + 1, pad)
+    
+    def _mark_dirty_circle(self, center_x, center_y, radius, pad: int = 0):
+        self._mark_dirty(center_x - radius, center_y - radius,
+                         center_x + radius + 1, center_y + radius + 1, pad)
     
     @abstractmethod
     def _render_direct(self, time: float, canvas: np.ndarray) -> np.ndarray:
         pass
     
     def _apply_blend(self, background: np.ndarray, foreground: np.ndarray) -> np.ndarray:
+        # Blends write into ``background`` (the pipeline's working frame) with
+        # saturating uint8 OpenCV ops; the foreground canvas is left untouched
+        # so layers may hand back buffers they keep between frames.
         if self.blend_mode == 'overwrite':
             return foreground
         elif self.blend_mode == 'normal':
             return cv2.addWeighted(background, 1 - self.opacity, 
-                                 foreground, self.opacity, 0)
+                                 foreground, self.opacity, 0, dst=background)
         elif self.blend_mode == 'add':
-            blended = cv2.add(background, (foreground * self.opacity).astype(np.uint8))
-            return np.clip(blended, 0, 255)
+            return cv2.addWeighted(background, 1.0, foreground, self.opacity, 0,
+                                   dst=background)
         elif self.blend_mode == 'multiply':
             # Multiply blend: darken by multiplying pixel values
             # Only apply where foreground has content (non-black pixels)
-            bg_float = background.astype(np.float32) / 255.0
-            fg_float = foreground.astype(np.float32) / 255.0
-            
-            # Create a mask of where foreground has content
-            fg_mask = np.any(foreground > 5, axis=2).astype(np.float32)
-            fg_mask = fg_mask[:, :, np.newaxis]
+            mask = self._get_blend_mask(background.shape)
+            cv2.inRange(foreground, (0, 0, 0), (5, 5, 5), dst=mask)
+            cv2.bitwise_not(mask, dst=mask)
             
-            # Multiply blend where foreground exists, keep background elsewhere
-            multiplied = (bg_float * fg_float * 255).astype(np.uint8)
+            # bg * fg / 255, then mixed with the original background by opacity
+            blended = self._get_blend_buffer(background.shape)
+            cv2.multiply(background, foreground, dst=blended, scale=1 / 255)
+            cv2.addWeighted(background, 1 - self.opacity, blended, self.opacity, 0, dst=blended)
             
-            # Blend between original background and multiplied result
-            # based on opacity and foreground mask
-            blend_factor = fg_mask * self.opacity
-            result = (background.astype(np.float32) * (1 - blend_factor) + 
-                     multiplied.astype(np.float32) * blend_factor)
-            return np.clip(result, 0, 255).astype(np.uint8)
+            # Keep the background where the foreground is empty
+            return cv2.copyTo(blended, mask, dst=background)
         elif self.blend_mode == 'screen':
-            bg_float = 1.0 - background.astype(np.float32) / 255.0
-            fg_float = 1.0 - foreground.astype(np.float32) / 255.0
-            result = 1.0 - (bg_float * fg_float * self.opacity + bg_float * (1 - self.opacity))
-            return (result * 255).astype(np.uint8)
+            # 1 - (1 - bg) * (1 - fg * opacity), in 0..255 units
+            inverse_fg = self._get_blend_buffer(background.shape)
+            cv2.convertScaleAbs(foreground, dst=inverse_fg, alpha=self.opacity)
+            cv2.bitwise_not(inverse_fg, dst=inverse_fg)
+            cv2.bitwise_not(background, dst=background)
+            cv2.multiply(background, inverse_fg, dst=background, scale=1 / 255)
+            return cv2.bitwise_not(background, dst=background)
         else:
-            return foreground
+            np.copyto(background, foreground)
+            return background
+    
+    def _frame_features(self, time: float):
+        """Return (features, row) when ``time`` lands on a precomputed frame."""
+        features = getattr(self.audio, 'frame_features', None)
+        if features is None:
+            return None, None
+        idx = features.frame_index(time)
+        if idx is None:
+            return None, None
+        return features, idx
+    
+    def _audio_sample_rate(self) -> int:
+        if hasattr(self.audio, '_sample_rate') and self.audio.sample_rate > 0:
+            return self.audio.sample_rate
+        return 44100
+    
+    def get_log_spectrum(self, time: float, bins: int, window: float = SPECTRUM_WINDOW,
+                         min_bins: Optional[int] = None) -> Optional[np.ndarray]:
+        """Log-binned spectrum around ``time``, or None if there is too little audio."""
+        features, idx = self._frame_features(time)
+        if features is not None:
+            row = features.log_spectrum(bins, window, min_bins)[idx]
+            return None if np.isnan(row[0]) else row
+        
+        audio_segment = self.audio.get_audio_segment(time, window)
+        return log_binned_spectrum(audio_segment, self._audio_sample_rate(), bins, min_bins)
+    
+    def get_rms(self, time: float, window: float, min_samples: int = 1) -> Optional[float]:
+        """RMS of the window around ``time``, or None if it holds fewer than ``min_samples``."""
+        features, idx = self._frame_features(time)
+        if features is not None:
+            value = features.rms(window, min_samples)[idx]
+            return None if np.isnan(value) else float(value)
+        
+        audio_segment = self.audio.get_audio_segment(time, window)
+        if audio_segment is None or len(audio_segment) < max(min_samples, 1):
+            return None
+        return float(np.sqrt(np.mean(audio_segment ** 2)))
+    
+    def get_band_energies(self, time: float, window: float, fft_size: int = 256) -> Optional[np.ndarray]:
+        """Mean FFT magnitude of [bass, mids, highs] around ``time``, or None."""
+        features, idx = self._frame_features(time)
+        if features is not None:
+            row = features.band_energies(window, fft_size)[idx]
+            return None if np.isnan(row[0]) else row
+        
+        audio_segment = self.audio.get_audio_segment(time, window)
+        if audio_segment is None or len(audio_segment) < fft_size:
+            return None
+        fft = np.abs(np.fft.rfft(audio_segment[:fft_size]))
+        mid_start = len(fft) // 8
+        mid_end = len(fft) // 2
+        return np.array([
+            np.mean(fft[:mid_start]),
+            np.mean(fft[mid_start:mid_end]),
+            np.mean(fft[mid_end:]),
+        ])
+    
+    def is_beat(self, time: float, threshold: float) -> bool:
+        features, idx = self._frame_features(time)
+        if features is not None:
+            return bool(features.beat_flags(threshold)[idx])
+        return bool(self.audio.is_beat_at_time(time, threshold=threshold))
+    
+    def time_since_beat(self, time: float) -> float:
+        """Seconds since the last beat at or before ``time`` (inf if none)."""
+        features, idx = self._frame_features(time)
+        if features is not None:
+            return float(features.time_since_beat()[idx])
+        if hasattr(self.audio, 'time_since_beat'):
+            return float(self.audio.time_since_beat(time))
+        return float('inf')
+    
+    def beat_phase(self, time: float) -> float:
+        """Position between the surrounding beats in [0, 1), NaN outside them."""
+        features, idx = self._frame_features(time)
+        if features is not None:
+            return float(features.beat_phase()[idx])
+        if hasattr(self.audio, 'beat_phase'):
+            return float(self.audio.beat_phase(time))
+        return float('nan')
     
     def get_color_gradient(self, ratio: float):
         """Get interpolated color between primary and secondary.
@@ -89,3 +415,18 @@ class BaseLayer(ABC):
             secondary = np.array(self.config['visualization']['colors']['secondary'])
         
         return (primary * (1 - ratio) + secondary * ratio).astype(np.uint8)
+
+    def get_color_gradients(self, ratios) -> np.ndarray:
+        """Vectorized get_color_gradient: one uint8 color row per ratio."""
+        if self.layer_config.get('color_primary'):
+            primary = np.array(self.layer_config['color_primary'])
+        else:
+            primary = np.array(self.config['visualization']['colors']['primary'])
+        
+        if self.layer_config.get('color_secondary'):
+            secondary = np.array(self.layer_config['color_secondary'])
+        else:
+            secondary = np.array(self.config['visualization']['colors']['secondary'])
+        
+        ratios = np.asarray(ratios, dtype=np.float64)[..., np.newaxis]
+        return (primary * (1 - ratios) + secondary * ratios).astype(np.uint8)
@@ -0,0 +1,151 @@
+import cv2
+import numpy as np
+from typing import Dict, Tuple
+
+# Circles covering at most this many pixels are splatted from precomputed
+# offsets; past that a cv2.circle call per circle is faster
+STAMP_MAX_PIXELS = 64
+
+_stamp_cache: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _as_colors(colors, count: int) -> np.ndarray:
+    colors = np.asarray(colors)
+    if colors.ndim == 1:
+        colors = np.broadcast_to(colors, (count, 3))
+    return colors.astype(np.uint8, copy=False)
+
+
+def _as_ints(values, count: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(values, dtype=np.int64), (count,))
+
+
+def _buckets(colors: np.ndarray, thickness: np.ndarray):
+    """Yield (index array, color tuple, thickness) per unique color/thickness."""
+    keys = (
+        (thickness << 24)
+        | (colors[:, 0].astype(np.int64) << 16)
+        | (colors[:, 1].astype(np.int64) << 8)
+        | colors[:, 2].astype(np.int64)
+    )
+    order = np.argsort(keys, kind='stable')
+    splits = np.flatnonzero(np.diff(keys[order])) + 1
+    for group in np.split(order, splits):
+        first = group[0]
+        yield group, tuple(int(c) for c in colors[first]), int(thickness[first])
+
+
+def draw_segments(frame: np.ndarray, starts, ends, colors, thickness=1,
+                  line_type: int = cv2.LINE_8) -> np.ndarray:
+    """Draw line segments ``starts[i] -> ends[i]`` in one call per color/thickness.
+
+    ``starts``/``ends`` are (n, 2) integer x/y arrays; ``colors`` is one color
+    or an (n, 3) array; ``thickness`` is a scalar or an (n,) array. Pixels
+    match per-segment cv2.line calls, though overlapping segments from
+    different buckets may stack in a different order.
+    """
+    starts = np.asarray(starts, dtype=np.int32).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=np.int32).reshape(-1, 2)
+    count = len(starts)
+    if count == 0:
+        return frame
+
+    segments = np.stack([starts, ends], axis=1)
+    colors = _as_colors(colors, count)
+    thickness = _as_ints(thickness, count)
+
+    for group, color, width in _buckets(colors, thickness):
+        cv2.polylines(frame, segments[group], False, color, width, line_type)
+    return frame
+
+
+def draw_polyline_segments(frame: np.ndarray, points, colors, thickness=1,
+                           line_type: int = cv2.LINE_8, closed: bool = False) -> np.ndarray:
+    """Draw the segments of a polyline, each with its own color/thickness.
+
+    Segment ``i`` joins ``points[i]`` and ``points[i + 1]``; with ``closed`` an
+    extra segment joins the last point back to the first.
+    """
+    points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+    if len(points) < 2:
+        return frame
+    ends = np.roll(points, -1, axis=0) if closed else points[1:]
+    starts = points if closed else points[:-1]
+    return draw_segments(frame, starts, ends, colors, thickness, line_type)
+
+
+def _disc_offsets(radius: int, thickness: int) -> Tuple[np.ndarray, np.ndarray]:
+    key = (radius, thickness)
+    if key not in _stamp_cache:
+        # Rasterize once with OpenCV itself so stamps match cv2.circle exactly
+        extent = radius + max(thickness, 1) + 1
+        stamp = np.zeros((2 * extent + 1, 2 * extent + 1), dtype=np.uint8)
+        cv2.circle(stamp, (extent, extent), radius, 1, thickness)
+        dy, dx = np.nonzero(stamp)
+        _stamp_cache[key] = (dy - extent, dx - extent)
+    return _stamp_cache[key]
+
+
+def draw_discs(frame: np.ndarray, centers, radii, colors, thickness: int = -1) -> np.ndarray:
+    """Draw circles (filled with ``thickness=-1``, outlined otherwise).
+
+    Small circles are splatted in bulk from precomputed pixel offsets;
+    larger ones fall back to one cv2.circle call each.
+    """
+    centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+    count = len(centers)
+    if count == 0:
+        return frame
+
+    radii = _as_ints(radii, count)
+    colors = _as_colors(colors, count)
+    height, width = frame.shape[:2]
+    pixels = frame.reshape(-1, frame.shape[2])
+
+    for radius in np.unique(radii):
+        group = np.flatnonzero(radii == radius)
+        radius = int(radius)
+        dy, dx = _disc_offsets(radius, thickness)
+
+        if len(dy) > STAMP_MAX_PIXELS:
+            for (x, y), color in zip(centers[group].tolist(), colors[group].tolist()):
+                cv2.circle(frame, (x, y), radius, color, thickness)
+            continue
+
+        xs, ys = centers[group, 0], centers[group, 1]
+        reach = max(np.abs(dx).max(), np.abs(dy).max())
+        inside = (xs >= reach) & (xs < width - reach) & (ys >= reach) & (ys < height - reach)
+
+        # Stamps fully inside the frame: one linear index per pixel, no clipping
+        offsets = dy * width + dx
+        linear = (ys[inside] * width + xs[inside])[:, np.newaxis] + offsets
+        pixels[linear.ravel()] = np.repeat(colors[group[inside]], len(offsets), axis=0)
+
+        # Stamps crossing the border: clip pixel by pixel
+        edge = ~inside
+        if np.any(edge):
+            px = (xs[edge, np.newaxis] + dx).ravel()
+            py = (ys[edge, np.newaxis] + dy).ravel()
+            pixel_colors = np.repeat(colors[group[edge]], len(dx), axis=0)
+            visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            pixels[py[visible] * width + px[visible]] = pixel_colors[visible]
+
+    return frame
+
+
+def draw_rects(frame: np.ndarray, top_left, bottom_right, colors) -> np.ndarray:
+    """Draw filled rectangles with inclusive corners, like cv2.rectangle(..., -1).
+
+    Filled rectangles are already a single fast OpenCV primitive, so this only
+    hoists the per-rectangle color and coordinate conversion out of the loop.
+    """
+    top_left = np.asarray(top_left, dtype=np.int32).reshape(-1, 2)
+    bottom_right = np.asarray(bottom_right, dtype=np.int32).reshape(-1, 2)
+    count = len(top_left)
+    if count == 0:
+        return frame
+
+    colors = _as_colors(colors, count).tolist()
+    for p1, p2, color in zip(top_left.tolist(), bottom_right.tolist(), colors):
+        cv2.rectangle(frame, p1, p2, color, -1)
+    return frame
@@ -33,12 +33,14 @@ class LayerRegistry:
             raise TypeError(f"Layer must inherit from BaseLayer: {layer_class}")
         self._layer_classes[name] = layer_class
     
-    def create_layer(self, name: str, config: Dict[str, Any], 
-                     audio_processor, width: int, height: int) -> BaseLayer:
+    def get_layer_class(self, name: str) -> Type[BaseLayer]:
         if name not in self._layer_classes:
             raise KeyError(f"Layer type not registered: {name}")
-        
-        layer_class = self._layer_classes[name]
+        return self._layer_classes[name]
+    
+    def create_layer(self, name: str, config: Dict[str, Any], 
+                     audio_processor, width: int, height: int) -> BaseLayer:
+        layer_class = self.get_layer_class(name)
         return layer_class(config, audio_processor, width, height)
     
     def get_available_layers(self) -> list:
@@ -6,7 +6,34 @@ from ..base_layer import BaseLayer
 class BackgroundLayer(BaseLayer):
     layer_type = "background"
     
+    GRADIENT_DIRECTIONS = ('vertical', 'horizontal', 'radial')
+    QUALITY_KNOBS = {'animated_scale': (1.0, 0.25)}
+    PIXEL_PARAMS = {'blur': 0}
+    
+    def __init__(self, config, audio_processor, width: int, height: int):
+        super().__init__(config, audio_processor, width, height)
+        self._plate = None
+    
     def _render_direct(self, time: float, frame: np.ndarray) -> np.ndarray:
+        if not self._is_static():
+            return self._render_background(time, frame)
+        
+        if self._plate is None:
+            plate = self._render_background(0.0, np.zeros_like(frame))
+            # Shared across frames: read-only so a later layer can't draw into
+            # it; PipelineRenderer copies it before handing it on
+            plate.flags.writeable = False
+            self._plate = plate
+        return self._plate
+    
+    def _is_static(self) -> bool:
+        # Gradients and solid fills don't depend on time or on the layers below
+        bg_type = self.layer_config.get('type', 'gradient')
+        if bg_type == 'gradient':
+            return self.layer_config.get('direction', 'vertical') in self.GRADIENT_DIRECTIONS
+        return bg_type == 'solid'
+    
+    def _render_background(self, time: float, frame: np.ndarray) -> np.ndarray:
         bg_config = self.layer_config
         bg_type = bg_config.get('type', 'gradient')
         
@@ -59,22 +86,49 @@ class BackgroundLayer(BaseLayer):
             wave_speed3 = bg_config.get('wave_speed3', 0.5)
             wave_amplitude = bg_config.get('wave_amplitude', 0.15)
             
-            y_indices, x_indices = np.indices((self.height, self.width))
+            # The field is smooth, so it can be evaluated on a coarser grid
+            # and upscaled (animated_scale < 1)
+            scale = float(bg_config.get('animated_scale', 1.0))
+            grid_w = max(2, int(round(self.width * scale))) if scale < 1 else self.width
+            grid_h = max(2, int(round(self.height * scale))) if scale < 1 else self.height
+            # Full-resolution pixel coordinates of the grid sample centers
+            xs = (np.arange(grid_w) + 0.5) * (self.width / grid_w) - 0.5
+            ys = (np.arange(grid_h) + 0.5) * (self.height / grid_h) - 0.5
             
-            # Slow, gentle waves for a subtle animated background
-            wave1 = np.sin(y_indices * 0.005 + time * wave_speed1) * wave_amplitude
-            wave2 = np.sin(x_indices * 0.004 + time * wave_speed2 + 1.5) * wave_amplitude
-            wave3 = np.sin((x_indices + y_indices) * 0.003 + time * wave_speed3) * wave_amplitude * 0.5
+            # Slow, gentle waves for a subtle animated background.
+            # wave1 depends only on y and wave2 only on x, so each is a 1-D vector;
+            # wave3 = sin(a*x + a*y + p) is split with the angle-sum identity
+            # into products of 1-D vectors, leaving no per-pixel sin calls.
+            wave1 = np.sin(ys * 0.005 + time * wave_speed1) * wave_amplitude
+            wave2 = np.sin(xs * 0.004 + time * wave_speed2 + 1.5) * wave_amplitude
+            x_phase = xs * 0.003
+            y_phase = ys * 0.003 + time * wave_speed3
+            wave3_amplitude = wave_amplitude * 0.5
             
-            # Base gradient ratio (vertical) + wave perturbation
-            base_ratio = y_indices.astype(np.float32) / max(self.height - 1, 1)
-            ratio = np.clip(base_ratio + wave1 + wave2 + wave3, 0.0, 1.0)
-            ratio = ratio[:, :, np.newaxis]
+            # Base gradient ratio (vertical) + the 1-D wave terms
+            base_ratio = ys / max(self.height - 1, 1)
+            column = (base_ratio + wave1).astype(np.float32)[:, np.newaxis]
+            row = wave2.astype(np.float32)[np.newaxis, :]
             
-            # Interpolate between the two dark colors
+            ratio = np.sin(x_phase).astype(np.float32)[np.newaxis, :] * \
+                (np.cos(y_phase) * wave3_amplitude).astype(np.float32)[:, np.newaxis]
+            ratio += np.cos(x_phase).astype(np.float32)[np.newaxis, :] * \
+                (np.sin(y_phase) * wave3_amplitude).astype(np.float32)[:, np.newaxis]
+            ratio += column
+            ratio += row
+            np.clip(ratio, 0.0, 1.0, out=ratio)
+            
+            # Interpolate between the two dark colors, one channel at a time
+            # (c1 + (c2 - c1) * ratio, saturated to uint8 by OpenCV)
             c1 = color1.astype(np.float32)
             c2 = color2.astype(np.float32)
-            frame = (c1 * (1 - ratio) + c2 * ratio).astype(np.uint8)
+            frame = cv2.merge([
+                cv2.convertScaleAbs(ratio, alpha=float(c2[c] - c1[c]), beta=float(c1[c]))
+                for c in range(3)
+            ])
+            
+            if (grid_w, grid_h) != (self.width, self.height):
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
         
         elif bg_type == 'solid':
             # Solid background: fill with color_primary (or explicit 'color' key)
@@ -1,10 +1,10 @@
-import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_discs
 
 
 class CircularParticle:
-    def __init__(self, width, height, config, spawn_time=0):
+    def __init__(self, width, height, config, spawn_time=0, size_scale=1.0):
         self.center_x = width // 2
         self.center_y = height // 2
         self.max_radius = min(width, height) // 3
@@ -19,7 +19,7 @@ class CircularParticle:
         self.base_speed = np.random.uniform(0.01, 0.04)
         self.direction = np.random.choice([-1, 1])
 
-        self.size = np.random.uniform(2.0, 5.0)
+        self.size = np.random.uniform(2.0, 5.0) * size_scale
         self.current_size = self.size
         self.color_ratio = np.random.uniform(0, 1)
 
@@ -77,35 +77,11 @@ class CircularParticle:
 
         return self.life > 0.05
 
-    def draw(self, frame, colors):
-        if self.life <= 0.05:
-            return
-
-        primary = np.array(colors.get("primary", [0, 255, 255]), dtype=np.float64)
-        secondary = np.array(colors.get("secondary", [255, 0, 255]), dtype=np.float64)
-        color = primary * (1 - self.color_ratio) + secondary * self.color_ratio
-
-        # Apply life alpha
-        alpha = self.life * 0.9
-        color = (color * alpha).astype(np.uint8)
-        color_tuple = tuple(int(c) for c in color)
-
-        ix, iy = int(self.x), int(self.y)
-        size = max(1, int(self.current_size))
-
-        cv2.circle(frame, (ix, iy), size, color_tuple, -1)
-
-        # Glow for larger particles
-        if size > 2 and self.life > 0.3:
-            glow_alpha = self.life * 0.3
-            glow_color = (primary * (1 - self.color_ratio) + secondary * self.color_ratio)
-            glow_color = (glow_color * glow_alpha).astype(np.uint8)
-            glow_tuple = tuple(int(c) for c in glow_color)
-            cv2.circle(frame, (ix, iy), size + 2, glow_tuple, 1)
-
 
 class CircularParticlesLayer(BaseLayer):
     layer_type = "circular_particles"
+    QUALITY_KNOBS = {"count": (100, 20)}
+    PIXEL_PARAMS = {"orbit_radius_min": 100, "orbit_radius_max": 400}
 
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -118,23 +94,21 @@ class CircularParticlesLayer(BaseLayer):
         count = self.layer_config.get("count", 100)
         for _ in range(count):
             self.particles.append(
-                CircularParticle(self.width, self.height, self.config, 0)
+                CircularParticle(self.width, self.height, self.config, 0, self.pixel_scale)
             )
 
     def _render_direct(self, time, frame):
         window = 0.05
-        audio_segment = self.audio.get_audio_segment(time, window)
+        audio_level = self.get_rms(time, window)
 
-        if audio_segment is not None and len(audio_segment) > 0:
-            audio_level = np.sqrt(np.mean(audio_segment ** 2))
-        else:
+        if audio_level is None:
             audio_level = 0
 
         # Smooth audio level
         audio_level = self.prev_audio_level * 0.7 + audio_level * 0.3
         self.prev_audio_level = audio_level
 
-        beat = self.audio.is_beat_at_time(time, threshold=0.05)
+        beat = self.is_beat(time, threshold=0.05)
 
         # Spawn new particles to maintain count
         target_count = self.layer_config.get("count", 100)
@@ -145,7 +119,7 @@ class CircularParticlesLayer(BaseLayer):
             spawn_count = min(3, target_count - len(self.particles))
             for _ in range(spawn_count):
                 self.particles.append(
-                    CircularParticle(self.width, self.height, self.config, time)
+                    CircularParticle(self.width, self.height, self.config, time, self.pixel_scale)
                 )
             self.last_spawn_time = time
 
@@ -159,9 +133,34 @@ class CircularParticlesLayer(BaseLayer):
         alive_particles = []
         for particle in self.particles:
             if particle.update(audio_level, beat):
-                particle.draw(frame, colors)
                 alive_particles.append(particle)
 
-        self.particles = alive_particles
+        # The quality governor may have lowered the count
+        self.particles = alive_particles[:target_count]
+        self._draw_particles(frame, colors)
 
         return frame
+
+    def _draw_particles(self, frame, colors):
+        if not self.particles:
+            return
+
+        xs = np.array([p.x for p in self.particles], dtype=np.int64)
+        ys = np.array([p.y for p in self.particles], dtype=np.int64)
+        sizes = np.maximum(1, np.array([p.current_size for p in self.particles]).astype(np.int32))
+        ratio = np.array([p.color_ratio for p in self.particles])[:, np.newaxis]
+        life = np.array([p.life for p in self.particles])
+
+        primary = np.array(colors.get("primary", [0, 255, 255]), dtype=np.float64)
+        secondary = np.array(colors.get("secondary", [255, 0, 255]), dtype=np.float64)
+        base_colors = primary * (1 - ratio) + secondary * ratio
+
+        # Apply life alpha
+        particle_colors = (base_colors * (life * 0.9)[:, np.newaxis]).astype(np.uint8)
+        centers = np.column_stack([xs, ys])
+        draw_discs(frame, centers, sizes, particle_colors)
+
+        # Glow for larger particles
+        glowing = (sizes > 2) & (life > 0.3)
+        glow_colors = (base_colors[glowing] * (life[glowing] * 0.3)[:, np.newaxis]).astype(np.uint8)
+        draw_discs(frame, centers[glowing], sizes[glowing] + 2, glow_colors, thickness=1)
@@ -1,10 +1,13 @@
-import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_discs, draw_segments
 
 
 class CircularSpectrumLayer(BaseLayer):
     layer_type = "circular_spectrum"
+    tracks_dirty_rect = True
+    QUALITY_KNOBS = {"bins": (48, 16)}
+    PIXEL_PARAMS = {"bar_width": 3, "inner_radius": 250}
 
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -16,65 +19,20 @@ class CircularSpectrumLayer(BaseLayer):
         self.prev_bar_lengths = None
 
     def _render_direct(self, time, frame):
-        window = 0.08  # Wider window for better frequency resolution
-        audio_segment = self.audio.get_audio_segment(time, window)
-
         bins = min(64, self.layer_config.get("bins", 48))
 
-        if audio_segment is None or len(audio_segment) < 256:
+        # Wider window and larger FFT for better frequency resolution,
+        # logarithmic frequency binning for perceptually even distribution
+        freq_data = self.get_log_spectrum(time, bins)
+
+        if freq_data is None:
             if self.prev_spectrum is not None:
                 self.prev_spectrum *= 0.9
                 freq_data = self.prev_spectrum
             else:
                 return frame
         else:
-            # Use larger FFT for better frequency resolution
-            fft_size = min(4096, len(audio_segment))
-            # Apply Hann window to reduce spectral leakage
-            windowed = audio_segment[:fft_size] * np.hanning(fft_size)
-            fft = np.abs(np.fft.rfft(windowed))
-
-            # Limit to useful frequency range (~12kHz)
-            sr = self.audio.sample_rate if hasattr(self.audio, '_sample_rate') and self.audio.sample_rate > 0 else 44100
-            max_useful_freq = 12000
-            max_bin_index = min(len(fft), int(max_useful_freq * fft_size / sr))
-            max_bin_index = max(max_bin_index, bins)
-            fft = fft[:max_bin_index]
-
-            fft = np.log1p(fft)
-
             # Normalize
-            if np.max(fft) > 0:
-                fft = fft / np.max(fft)
-
-            # Logarithmic frequency binning for perceptually even distribution
-            if len(fft) > bins:
-                fft_resampled = np.zeros(bins)
-                log_centers = np.logspace(
-                    np.log10(1),
-                    np.log10(len(fft) - 1),
-                    bins
-                )
-                log_edges = np.zeros(bins + 1)
-                log_edges[0] = max(0, log_centers[0] - (log_centers[1] - log_centers[0]) / 2)
-                log_edges[-1] = min(len(fft), log_centers[-1] + (log_centers[-1] - log_centers[-2]) / 2)
-                for i in range(1, bins):
-                    log_edges[i] = (log_centers[i - 1] + log_centers[i]) / 2
-
-                for i in range(bins):
-                    start = int(log_edges[i])
-                    end = int(log_edges[i + 1])
-                    start = max(0, min(start, len(fft) - 1))
-                    end = max(start + 1, min(end, len(fft)))
-                    fft_resampled[i] = np.mean(fft[start:end])
-
-                freq_data = fft_resampled
-            else:
-                x_old = np.linspace(0, 1, len(fft))
-                x_new = np.linspace(0, 1, bins)
-                freq_data = np.interp(x_new, x_old, fft)
-
-            # Normalize again
             max_val = np.max(freq_data)
             if max_val > 0:
                 freq_data = freq_data / max_val
@@ -110,40 +68,46 @@ class CircularSpectrumLayer(BaseLayer):
 
         inner_radius = self.layer_config.get("inner_radius", 250)
 
-        for i, angle in enumerate(angles):
-            amplitude = freq_data[i] if i < len(freq_data) else 0
-
-            target_length = self.max_radius * amplitude * 0.3
-
-            # Attack/release smoothing for each bar (faster release)
-            if target_length > self.prev_bar_lengths[i]:
-                self.prev_bar_lengths[i] = self.prev_bar_lengths[i] * 0.2 + target_length * 0.8
-            else:
-                self.prev_bar_lengths[i] = self.prev_bar_lengths[i] * 0.7 + target_length * 0.3
-
-            bar_length = self.prev_bar_lengths[i]
-            outer_radius = inner_radius + bar_length
-
-            rotated_angle = angle + rotation
-
-            start_x = int(self.center_x + inner_radius * np.cos(rotated_angle))
-            start_y = int(self.center_y + inner_radius * np.sin(rotated_angle))
-            end_x = int(self.center_x + outer_radius * np.cos(rotated_angle))
-            end_y = int(self.center_y + outer_radius * np.sin(rotated_angle))
-
-            # Color gradient based on frequency bin
-            color_ratio = i / max(num_bars - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-            # Apply amplitude-based alpha
-            alpha = max(0.3, amplitude * 0.7 + 0.3)
-            color = (color * alpha).astype(np.uint8)
-            color_tuple = tuple(int(c) for c in color)
-
-            cv2.line(frame, (start_x, start_y), (end_x, end_y), color_tuple, bar_width)
-
-            # Bright dot at the tip
-            if bar_length > 3:
-                tip_color = tuple(min(255, int(c * 1.4)) for c in color_tuple)
-                cv2.circle(frame, (end_x, end_y), bar_width // 2 + 1, tip_color, -1)
+        amplitude = freq_data
+        target_lengths = self.max_radius * amplitude * 0.3
+
+        # Attack/release smoothing for each bar (faster release)
+        rising = target_lengths > self.prev_bar_lengths
+        self.prev_bar_lengths = np.where(
+            rising,
+            self.prev_bar_lengths * 0.2 + target_lengths * 0.8,
+            self.prev_bar_lengths * 0.7 + target_lengths * 0.3,
+        )
+
+        bar_lengths = self.prev_bar_lengths
+        outer_radius = inner_radius + bar_lengths
+
+        rotated_angles = angles + rotation
+        cos_a = np.cos(rotated_angles)
+        sin_a = np.sin(rotated_angles)
+
+        starts = np.column_stack([
+            (self.center_x + inner_radius * cos_a).astype(np.int32),
+            (self.center_y + inner_radius * sin_a).astype(np.int32),
+        ])
+        ends = np.column_stack([
+            (self.center_x + outer_radius * cos_a).astype(np.int32),
+            (self.center_y + outer_radius * sin_a).astype(np.int32),
+        ])
+
+        # Color gradient based on frequency bin
+        colors = self.get_color_gradients(np.arange(num_bars) / max(num_bars - 1, 1))
+        # Apply amplitude-based alpha
+        alpha = np.maximum(0.3, amplitude * 0.7 + 0.3)[:, np.newaxis]
+        colors = (colors * alpha).astype(np.uint8)
+
+        draw_segments(frame, starts, ends, colors, bar_width)
+        self._mark_dirty_points(starts, pad=bar_width + 2)
+        self._mark_dirty_points(ends, pad=bar_width + 2)
+
+        # Bright dot at the tip
+        tipped = bar_lengths > 3
+        tip_colors = np.minimum(255, (colors[tipped] * 1.4).astype(np.int32))
+        draw_discs(frame, ends[tipped], bar_width // 2 + 1, tip_colors)
 
         return frame
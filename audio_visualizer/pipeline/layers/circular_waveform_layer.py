@@ -1,10 +1,15 @@
 import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_polyline_segments, draw_segments
 
 
 class CircularWaveformLayer(BaseLayer):
     layer_type = "circular_waveform"
+    tracks_dirty_rect = True
+    antialiased = True
+    QUALITY_KNOBS = {"points": (360, 64)}
+    PIXEL_PARAMS = {"line_width": 2}
 
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -64,151 +69,93 @@ class CircularWaveformLayer(BaseLayer):
 
         return frame
 
+    def _ring_points(self, radii, angles):
+        xs = (self.center_x + radii * np.cos(angles)).astype(np.int32)
+        ys = (self.center_y + radii * np.sin(angles)).astype(np.int32)
+        return np.column_stack([xs, ys])
+
+    def _loop_ratios(self, num_points):
+        # Gradient along the ring; the closing segment uses the end color
+        ratios = np.arange(num_points) / max(num_points - 1, 1)
+        ratios[-1] = 1.0
+        return ratios
+
     def _render_mirror_circular(self, frame, audio, angles, line_width):
-        # Outer ring (positive amplitude)
-        points_outer = []
-        # Inner ring (negative/mirror amplitude)
-        points_inner = []
-
-        for i in range(len(audio)):
-            amplitude = audio[i]
-            angle = angles[i]
-
-            # Outer: base radius + positive displacement (gentle)
-            r_outer = self.max_radius * (1.0 + amplitude * 0.2)
-            x = int(self.center_x + r_outer * np.cos(angle))
-            y = int(self.center_y + r_outer * np.sin(angle))
-            points_outer.append((x, y))
-
-            # Inner: base radius - displacement (mirror, gentle)
-            r_inner = self.max_radius * (1.0 - abs(amplitude) * 0.12)
-            x2 = int(self.center_x + r_inner * np.cos(angle))
-            y2 = int(self.center_y + r_inner * np.sin(angle))
-            points_inner.append((x2, y2))
-
-        if len(points_outer) > 1:
+        # Outer ring (positive amplitude): base radius + displacement (gentle)
+        points_outer = self._ring_points(self.max_radius * (1.0 + audio * 0.2), angles)
+        # Inner ring (negative/mirror amplitude): base radius - displacement
+        points_inner = self._ring_points(self.max_radius * (1.0 - np.abs(audio) * 0.12), angles)
+
+        if len(audio) > 1:
+            ratios = self._loop_ratios(len(audio))
+
             # Draw outer ring with gradient
-            pts = np.array(points_outer, np.int32).reshape((-1, 1, 2))
-            for i in range(len(points_outer) - 1):
-                color_ratio = i / max(len(points_outer) - 1, 1)
-                color = self.get_color_gradient(color_ratio)
-                color_tuple = tuple(int(c) for c in color)
-                cv2.line(frame, points_outer[i], points_outer[i + 1],
-                         color_tuple, line_width, cv2.LINE_AA)
-            # Close the loop
-            color = self.get_color_gradient(1.0)
-            color_tuple = tuple(int(c) for c in color)
-            cv2.line(frame, points_outer[-1], points_outer[0],
-                     color_tuple, line_width, cv2.LINE_AA)
-
-        if len(points_inner) > 1:
+            colors = self.get_color_gradients(ratios)
+            draw_polyline_segments(frame, points_outer, colors, line_width,
+                                   self.line_type, closed=True)
+            self._mark_dirty_points(points_outer, pad=line_width + 2)
+
             # Draw inner ring with dimmer gradient
-            for i in range(len(points_inner) - 1):
-                color_ratio = i / max(len(points_inner) - 1, 1)
-                color = self.get_color_gradient(color_ratio) * 0.6
-                color_tuple = tuple(int(c) for c in color.astype(np.uint8))
-                cv2.line(frame, points_inner[i], points_inner[i + 1],
-                         color_tuple, max(1, line_width - 1), cv2.LINE_AA)
-            color = self.get_color_gradient(1.0) * 0.6
-            color_tuple = tuple(int(c) for c in color.astype(np.uint8))
-            cv2.line(frame, points_inner[-1], points_inner[0],
-                     color_tuple, max(1, line_width - 1), cv2.LINE_AA)
+            colors = (self.get_color_gradients(ratios) * 0.6).astype(np.uint8)
+            draw_polyline_segments(frame, points_inner, colors, max(1, line_width - 1),
+                                   self.line_type, closed=True)
+            self._mark_dirty_points(points_inner, pad=line_width + 2)
 
     def _render_filled_circular(self, frame, audio, angles, line_width):
-        waveform_points = []
-        for i in range(len(audio)):
-            amplitude = audio[i]
-            angle = angles[i]
-            radius = self.max_radius * (1 + amplitude * 0.3)
-
-            x = int(self.center_x + radius * np.cos(angle))
-            y = int(self.center_y + radius * np.sin(angle))
-            waveform_points.append((x, y))
+        waveform_points = self._ring_points(self.max_radius * (1 + audio * 0.3), angles)
 
         if len(waveform_points) > 2:
-            pts = np.array(waveform_points, np.int32)
             # Fill with semi-transparent color
             color = self.get_color_gradient(0.5)
             fill_color = tuple(int(c * 0.3) for c in color)
-            cv2.fillPoly(frame, [pts], fill_color)
+            cv2.fillPoly(frame, [waveform_points], fill_color)
 
             # Draw outline with gradient
-            for i in range(len(waveform_points) - 1):
-                color_ratio = i / max(len(waveform_points) - 1, 1)
-                color = self.get_color_gradient(color_ratio)
-                color_tuple = tuple(int(c) for c in color)
-                cv2.line(frame, waveform_points[i], waveform_points[i + 1],
-                         color_tuple, line_width, cv2.LINE_AA)
-            color = self.get_color_gradient(1.0)
-            color_tuple = tuple(int(c) for c in color)
-            cv2.line(frame, waveform_points[-1], waveform_points[0],
-                     color_tuple, line_width, cv2.LINE_AA)
+            colors = self.get_color_gradients(self._loop_ratios(len(waveform_points)))
+            draw_polyline_segments(frame, waveform_points, colors, line_width,
+                                   self.line_type, closed=True)
+            self._mark_dirty_points(waveform_points, pad=line_width + 2)
 
     def _render_bars_circular(self, frame, audio, angles, line_width):
         # Reduce number of bars for cleaner look
         step = max(1, len(audio) // 72)
+        indices = np.arange(0, len(audio), step)
 
-        for i in range(0, len(audio), step):
-            amplitude = abs(audio[i])
-            angle = angles[i]
-            bar_length = self.max_radius * amplitude * 0.5
+        amplitude = np.abs(audio[indices])
+        bar_length = self.max_radius * amplitude * 0.5
 
-            inner_r = self.max_radius * 0.9
-            outer_r = inner_r + bar_length
+        inner_r = self.max_radius * 0.9
+        outer_r = inner_r + bar_length
 
-            start_x = int(self.center_x + inner_r * np.cos(angle))
-            start_y = int(self.center_y + inner_r * np.sin(angle))
-            end_x = int(self.center_x + outer_r * np.cos(angle))
-            end_y = int(self.center_y + outer_r * np.sin(angle))
+        starts = self._ring_points(np.full(len(indices), inner_r), angles[indices])
+        ends = self._ring_points(outer_r, angles[indices])
 
-            color_ratio = i / max(len(audio) - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-            alpha = max(0.3, amplitude * 0.7 + 0.3)
-            color = (color * alpha).astype(np.uint8)
-            color_tuple = tuple(int(c) for c in color)
+        colors = self.get_color_gradients(indices / max(len(audio) - 1, 1))
+        alpha = np.maximum(0.3, amplitude * 0.7 + 0.3)[:, np.newaxis]
+        colors = (colors * alpha).astype(np.uint8)
 
-            cv2.line(frame, (start_x, start_y), (end_x, end_y),
-                     color_tuple, line_width + 1, cv2.LINE_AA)
+        draw_segments(frame, starts, ends, colors, line_width + 1, self.line_type)
+        self._mark_dirty_points(starts, pad=line_width + 3)
+        self._mark_dirty_points(ends, pad=line_width + 3)
 
         return frame
 
     def _render_energy_circular(self, frame, audio, angles, line_width):
         """Energy style: line thickness and brightness vary with local amplitude."""
-        points = []
-        for i in range(len(audio)):
-            amplitude = audio[i]
-            angle = angles[i]
-            r = self.max_radius * (1.0 + amplitude * 0.2)
-            x = int(self.center_x + r * np.cos(angle))
-            y = int(self.center_y + r * np.sin(angle))
-            points.append((x, y))
+        points = self._ring_points(self.max_radius * (1.0 + audio * 0.2), angles)
 
         if len(points) < 2:
             return
 
-        for i in range(len(points) - 1):
-            local_energy = abs(audio[i])
-            # Thickness varies with energy
-            thickness = max(1, int(line_width * (1 + local_energy * 3)))
-            thickness = min(thickness, line_width * 5)
-
-            color_ratio = i / max(len(points) - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-            # Brightness varies with energy
-            alpha = max(0.25, local_energy * 0.75 + 0.25)
-            color = (color * alpha).astype(np.uint8)
-            color_tuple = tuple(int(c) for c in color)
-
-            cv2.line(frame, points[i], points[i + 1],
-                     color_tuple, thickness, cv2.LINE_AA)
-
-        # Close the loop
-        local_energy = abs(audio[-1])
-        thickness = max(1, int(line_width * (1 + local_energy * 3)))
-        thickness = min(thickness, line_width * 5)
-        color = self.get_color_gradient(1.0)
-        alpha = max(0.25, local_energy * 0.75 + 0.25)
-        color = (color * alpha).astype(np.uint8)
-        color_tuple = tuple(int(c) for c in color)
-        cv2.line(frame, points[-1], points[0],
-                 color_tuple, thickness, cv2.LINE_AA)
+        local_energy = np.abs(audio)
+        # Thickness varies with energy
+        thickness = np.maximum(1, (line_width * (1 + local_energy * 3)).astype(np.int32))
+        thickness = np.minimum(thickness, line_width * 5)
+
+        colors = self.get_color_gradients(self._loop_ratios(len(points)))
+        # Brightness varies with energy
+        alpha = np.maximum(0.25, local_energy * 0.75 + 0.25)[:, np.newaxis]
+        colors = (colors * alpha).astype(np.uint8)
+
+        draw_polyline_segments(frame, points, colors, thickness, self.line_type, closed=True)
+        self._mark_dirty_points(points, pad=int(thickness.max()) + 2)
@@ -5,6 +5,24 @@ from ..base_layer import BaseLayer
 
 class EffectsLayer(BaseLayer):
     layer_type = "effects"
+    QUALITY_KNOBS = {"glow_size": (15, 3)}
+    PIXEL_PARAMS = {"glow_size": 15, "chromatic_shift": 2}
+    # Post-processes the whole frame, so it always runs at full size;
+    # render_scale only applies to the glow's blur
+    scalable = False
+
+    # Extra rows/columns of grain noise, so each frame can crop it at a new offset
+    GRAIN_MARGIN = 64
+
+    def __init__(self, config, audio_processor, width: int, height: int):
+        super().__init__(config, audio_processor, width, height)
+        # Per-resolution tables, rebuilt only when the frame size or settings change
+        self._vignette_key = None
+        self._vignette_mask = None
+        self._grain_key = None
+        self._grain_noise = None
+        self._glow_buffer = None
+        self._glow_small = None
 
     def _render_direct(self, time: float, frame: np.ndarray) -> np.ndarray:
         effects = self.layer_config.get("effects", [])
@@ -28,13 +46,46 @@ class EffectsLayer(BaseLayer):
         if intensity <= 0:
             return frame
 
-        # Ensure kernel size is odd
-        if size % 2 == 0:
-            size += 1
-
-        blurred = cv2.GaussianBlur(frame, (size, size), 0)
-        result = cv2.addWeighted(frame, 1.0, blurred, intensity, 0)
-        return np.clip(result, 0, 255).astype(np.uint8)
+        if self._glow_buffer is None or self._glow_buffer.shape != frame.shape:
+            self._glow_buffer = np.empty_like(frame)
+
+        if self.render_scale < 1.0:
+            # Blur a downsampled copy (with a proportionally smaller kernel)
+            # and upsample the result; the glow is soft enough not to show it
+            height, width = frame.shape[:2]
+            small_size = (max(1, int(round(width * self.render_scale))),
+                          max(1, int(round(height * self.render_scale))))
+            self._glow_small = cv2.resize(frame, small_size, dst=self._glow_small,
+                                          interpolation=cv2.INTER_AREA)
+            size = max(3, int(round(size * self.render_scale)) | 1)
+            cv2.GaussianBlur(self._glow_small, (size, size), 0, dst=self._glow_small)
+            blurred = cv2.resize(self._glow_small, (width, height), dst=self._glow_buffer,
+                                 interpolation=cv2.INTER_LINEAR)
+        else:
+            # Ensure kernel size is odd
+            if size % 2 == 0:
+                size += 1
+            blurred = cv2.GaussianBlur(frame, (size, size), 0, dst=self._glow_buffer)
+        # addWeighted saturates to uint8 itself
+        return cv2.addWeighted(frame, 1.0, blurred, intensity, 0, dst=frame)
+
+    def _get_vignette_mask(self, height, width, strength):
+        key = (height, width, strength)
+        if self._vignette_key != key:
+            kernel_x = cv2.getGaussianKernel(width, width / 3)
+            kernel_y = cv2.getGaussianKernel(height, height / 3)
+            kernel = kernel_y * kernel_x.T
+
+            mask = kernel / kernel.max()
+            # Invert: 1 at center, fading to (1-strength) at edges
+            vignette_mask = 1.0 - ((1.0 - mask) * strength)
+            vignette_mask = np.clip(vignette_mask, 0, 1)
+
+            # 3-channel uint8 fixed point (255 = 1.0) for cv2.multiply
+            mask = np.round(vignette_mask * 255).astype(np.uint8)
+            self._vignette_mask = cv2.merge([mask, mask, mask])
+            self._vignette_key = key
+        return self._vignette_mask
 
     def _apply_vignette(self, frame):
         strength = self.layer_config.get("vignette_strength", 0.3)
@@ -43,21 +94,20 @@ class EffectsLayer(BaseLayer):
             return frame
 
         height, width = frame.shape[:2]
-        kernel_x = cv2.getGaussianKernel(width, width / 3)
-        kernel_y = cv2.getGaussianKernel(height, height / 3)
-        kernel = kernel_y * kernel_x.T
-
-        mask = kernel / kernel.max()
-        # Invert: 1 at center, fading to (1-strength) at edges
-        vignette_mask = 1.0 - ((1.0 - mask) * strength)
-        vignette_mask = np.clip(vignette_mask, 0, 1)
-
-        # Apply to all channels
-        result = frame.astype(np.float32)
-        for i in range(3):
-            result[:, :, i] = result[:, :, i] * vignette_mask
-
-        return np.clip(result, 0, 255).astype(np.uint8)
+        mask = self._get_vignette_mask(height, width, strength)
+        return cv2.multiply(frame, mask, dst=frame, scale=1 / 255)
+
+    def _get_grain_noise(self, shape, amount):
+        key = (shape, amount)
+        if self._grain_key != key:
+            height, width, channels = shape
+            margin = self.GRAIN_MARGIN
+            noise = np.random.standard_normal(
+                (height + margin, width + margin, channels)).astype(np.float32)
+            noise = np.round(noise * (amount * 255))
+            self._grain_noise = np.clip(noise, -255, 255).astype(np.int16)
+            self._grain_key = key
+        return self._grain_noise
 
     def _apply_grain(self, frame, time):
         amount = self.layer_config.get("grain_amount", 0.05)
@@ -65,8 +115,13 @@ class EffectsLayer(BaseLayer):
         if amount <= 0:
             return frame
 
-        noise = np.random.randn(*frame.shape) * amount * 255
-        return np.clip(frame.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+        # Crop the pre-generated noise at a random offset instead of drawing
+        # a fresh float64 field every frame
+        noise = self._get_grain_noise(frame.shape, amount)
+        height, width = frame.shape[:2]
+        dy, dx = np.random.randint(0, self.GRAIN_MARGIN + 1, size=2)
+        tile = noise[dy:dy + height, dx:dx + width]
+        return cv2.add(frame, tile, dst=frame, dtype=cv2.CV_8U)
 
     def _apply_chromatic_aberration(self, frame, time):
         shift = self.layer_config.get("chromatic_shift", 2)
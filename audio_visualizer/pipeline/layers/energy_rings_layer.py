@@ -13,6 +13,9 @@ class EnergyRingsLayer(BaseLayer):
     Inner rings = high frequencies, outer rings = low frequencies (bass).
     """
     layer_type = "energy_rings"
+    tracks_dirty_rect = True
+    antialiased = True
+    PIXEL_PARAMS = {"base_thickness": 2}
 
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -28,7 +31,7 @@ class EnergyRingsLayer(BaseLayer):
 
         # Calculate ring zones — each ring gets an equal radial band
         # Total usable radius
-        min_r = 40  # innermost ring center
+        min_r = 40 * self.pixel_scale  # innermost ring center
         max_r = int(min(width, height) * 0.4)  # outermost ring center
         
         # Each ring gets a zone: [zone_start, zone_end]
@@ -52,51 +55,12 @@ class EnergyRingsLayer(BaseLayer):
         self.smoothed_energies = np.zeros(self.num_rings)
         self.prev_rms = 0.0
 
-    def _get_frequency_bands(self, audio_segment):
+    def _get_frequency_bands(self, time):
         """Split audio into frequency bands for each ring."""
-        if audio_segment is None or len(audio_segment) < 256:
+        bands = self.get_log_spectrum(time, self.num_rings, min_bins=self.num_rings * 2)
+        if bands is None:
             return np.zeros(self.num_rings)
 
-        fft_size = min(4096, len(audio_segment))
-        windowed = audio_segment[:fft_size] * np.hanning(fft_size)
-        fft = np.abs(np.fft.rfft(windowed))
-
-        # Limit to useful frequency range (~12kHz)
-        sr = self.audio.sample_rate if hasattr(self.audio, '_sample_rate') and self.audio.sample_rate > 0 else 44100
-        max_useful_freq = 12000
-        max_bin_index = min(len(fft), int(max_useful_freq * fft_size / sr))
-        max_bin_index = max(max_bin_index, self.num_rings * 2)
-        fft = fft[:max_bin_index]
-
-        fft = np.log1p(fft)
-
-        max_val = np.max(fft)
-        if max_val > 0:
-            fft = fft / max_val
-
-        # Split into bands using logarithmic spacing
-        bands = np.zeros(self.num_rings)
-        if len(fft) < self.num_rings:
-            return bands
-
-        log_centers = np.logspace(
-            np.log10(1),
-            np.log10(len(fft) - 1),
-            self.num_rings
-        )
-        log_edges = np.zeros(self.num_rings + 1)
-        log_edges[0] = max(0, log_centers[0] - (log_centers[1] - log_centers[0]) / 2)
-        log_edges[-1] = min(len(fft), log_centers[-1] + (log_centers[-1] - log_centers[-2]) / 2)
-        for i in range(1, self.num_rings):
-            log_edges[i] = (log_centers[i - 1] + log_centers[i]) / 2
-
-        for i in range(self.num_rings):
-            start = int(log_edges[i])
-            end = int(log_edges[i + 1])
-            start = max(0, min(start, len(fft) - 1))
-            end = max(start + 1, min(end, len(fft)))
-            bands[i] = np.mean(fft[start:end])
-
         # Balance: boost higher bands slightly
         freq_balance = np.linspace(0.7, 1.4, self.num_rings)
         bands = bands * freq_balance
@@ -109,15 +73,12 @@ class EnergyRingsLayer(BaseLayer):
         return bands
 
     def _render_direct(self, time: float, frame: np.ndarray) -> np.ndarray:
-        audio_segment = self.audio.get_audio_segment(time, 0.08)
-
         # Get frequency band energies
-        band_energies = self._get_frequency_bands(audio_segment)
+        band_energies = self._get_frequency_bands(time)
 
         # Overall RMS for global reactivity
-        if audio_segment is not None and len(audio_segment) > 0:
-            rms = np.sqrt(np.mean(audio_segment ** 2))
-        else:
+        rms = self.get_rms(time, 0.08)
+        if rms is None:
             rms = 0
         rms = self.prev_rms * 0.7 + rms * 0.3
         self.prev_rms = rms
@@ -174,7 +135,9 @@ class EnergyRingsLayer(BaseLayer):
 
             cv2.ellipse(frame, (self.center_x, self.center_y),
                         (axes_x, axes_y), angle_deg, 0, 360,
-                        color_tuple, thickness, cv2.LINE_AA)
+                        color_tuple, thickness, self.line_type)
+            self._mark_dirty_circle(self.center_x, self.center_y,
+                                    max(axes_x, axes_y), pad=thickness + 2)
 
             # Glow effect for high-energy rings
             if self.glow_enabled and energy > 0.4:
@@ -184,7 +147,9 @@ class EnergyRingsLayer(BaseLayer):
                 glow_thickness = thickness + 2
                 cv2.ellipse(frame, (self.center_x, self.center_y),
                             (axes_x + 2, axes_y + 2), angle_deg, 0, 360,
-                            glow_tuple, glow_thickness, cv2.LINE_AA)
+                            glow_tuple, glow_thickness, self.line_type)
+                self._mark_dirty_circle(self.center_x, self.center_y,
+                                        max(axes_x, axes_y) + 2, pad=glow_thickness + 2)
 
         # Center dot pulses gently with overall RMS
         center_size = max(2, int(3 + rms * 8))
@@ -193,6 +158,7 @@ class EnergyRingsLayer(BaseLayer):
         center_c = (center_color * center_brightness).astype(np.uint8)
         center_tuple = tuple(int(c) for c in center_c)
         cv2.circle(frame, (self.center_x, self.center_y), center_size,
-                   center_tuple, -1, cv2.LINE_AA)
+                   center_tuple, -1, self.line_type)
+        self._mark_dirty_circle(self.center_x, self.center_y, center_size, pad=2)
 
         return frame
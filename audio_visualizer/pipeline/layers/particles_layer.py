@@ -1,47 +1,70 @@
-import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_discs, draw_segments
 
 
-class Particle:
-    def __init__(self, width, height, config, spawn_time=0):
-        self.x = np.random.uniform(0, width)
-        self.y = np.random.uniform(0, height)
-        
-        self.config = config
-        particles_config = config['pipeline']['particles']
-        
-        min_speed = particles_config.get('min_speed', 0.1)
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(min_speed, min_speed * 3)
-        self.vx = np.cos(angle) * speed
-        self.vy = np.sin(angle) * speed
-        
-        self.size = np.random.uniform(2.0, 5.0)
-        self.color_ratio = np.random.uniform(0, 1)
-        
-        self.life = 1.0
-        self.decay_min = particles_config.get('decay_min', 0.997)
-        self.decay_max = particles_config.get('decay_max', 0.999)
-        self.decay = np.random.uniform(self.decay_min, self.decay_max)
-        
+class ParticleSystem:
+    """Particles stored as a structure of arrays.
+    
+    Every attribute lives in one contiguous numpy array indexed by particle,
+    so physics, wrap-around, culling and respawn are a handful of vectorized
+    operations per frame regardless of the particle count.
+    """
+    
+    def __init__(self, width, height, config, draw_scale=1.0):
         self.width = width
         self.height = height
-        self.spawn_time = spawn_time
-        self.max_lifetime = particles_config.get('max_lifetime', 600)
-        
-        self.last_audio_force = [0, 0]
+        self.config = config
+        # Positions and speeds are in video pixels; drawing maps them onto
+        # a canvas this many times the video size
+        self.draw_scale = draw_scale
+        
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.vx = np.empty(0)
+        self.vy = np.empty(0)
+        self.size = np.empty(0)
+        self.color_ratio = np.empty(0)
+        self.life = np.empty(0)
+        self.decay = np.empty(0)
+        self.lifetime = np.empty(0, dtype=np.int32)  # Frames left before forced removal
         # Each particle has a unique phase offset for organic movement
-        self.phase_offset = np.random.uniform(0, 2 * np.pi)
+        self.phase_offset = np.empty(0)
         # Each particle has its own preferred beat direction (random, not from center)
-        self.beat_angle = np.random.uniform(0, 2 * np.pi)
+        self.beat_angle = np.empty(0)
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def spawn(self, count):
+        particles_config = self.config['pipeline']['particles']
         
+        min_speed = particles_config.get('min_speed', 0.1)
+        decay_min = particles_config.get('decay_min', 0.997)
+        decay_max = particles_config.get('decay_max', 0.999)
+        max_lifetime = particles_config.get('max_lifetime', 600)
+        
+        angle = np.random.uniform(0, 2 * np.pi, count)
+        speed = np.random.uniform(min_speed, min_speed * 3, count)
+        
+        self.x = np.concatenate([self.x, np.random.uniform(0, self.width, count)])
+        self.y = np.concatenate([self.y, np.random.uniform(0, self.height, count)])
+        self.vx = np.concatenate([self.vx, np.cos(angle) * speed])
+        self.vy = np.concatenate([self.vy, np.sin(angle) * speed])
+        self.size = np.concatenate([self.size, np.random.uniform(2.0, 5.0, count)])
+        self.color_ratio = np.concatenate([self.color_ratio, np.random.uniform(0, 1, count)])
+        self.life = np.concatenate([self.life, np.ones(count)])
+        self.decay = np.concatenate([self.decay, np.random.uniform(decay_min, decay_max, count)])
+        self.lifetime = np.concatenate([self.lifetime, np.full(count, max_lifetime, dtype=np.int32)])
+        self.phase_offset = np.concatenate([self.phase_offset, np.random.uniform(0, 2 * np.pi, count)])
+        self.beat_angle = np.concatenate([self.beat_angle, np.random.uniform(0, 2 * np.pi, count)])
+    
     def update(self, audio_force, beat_force, rms, time):
+        """Advance all particles by one frame and drop the dead ones."""
         particles_config = self.config['pipeline']['particles']
         
         force_multiplier = particles_config.get('force_multiplier', 8.0)
         max_speed = particles_config.get('max_speed', 6.0)
-        bounce_strength = particles_config.get('bounce_strength', 0.85)
         
         # Smooth audio influence - use rms to scale the coherent force direction
         audio_strength = rms * force_multiplier
@@ -57,12 +80,12 @@ class Particle:
         # On beat: push each particle in its own random direction (beautiful scatter)
         if beat_force > 0:
             # Slowly rotate beat direction over time for variety
-            self.beat_angle += np.random.uniform(-0.5, 0.5)
+            self.beat_angle += np.random.uniform(-0.5, 0.5, len(self))
             beat_push = beat_force * 2.5
             self.vx += np.cos(self.beat_angle) * beat_push
             self.vy += np.sin(self.beat_angle) * beat_push
             # Refresh life slightly on beat
-            self.life = min(1.0, self.life + 0.1)
+            np.minimum(self.life + 0.1, 1.0, out=self.life)
         
         # Organic drift — each particle wanders in its own pattern
         drift_strength = 0.05
@@ -78,97 +101,95 @@ class Particle:
         self.vy *= 0.96
         
         # Speed limit
-        speed = np.sqrt(self.vx**2 + self.vy**2)
-        if speed > max_speed:
-            scale = max_speed / speed
-            self.vx *= scale
-            self.vy *= scale
+        speed = np.hypot(self.vx, self.vy)
+        too_fast = speed > max_speed
+        if np.any(too_fast):
+            scale = max_speed / speed[too_fast]
+            self.vx[too_fast] *= scale
+            self.vy[too_fast] *= scale
         
         # Wrap around screen edges — particles reappear on the opposite side
-        if self.x < 0:
-            self.x += self.width
-        elif self.x > self.width:
-            self.x -= self.width
-            
-        if self.y < 0:
-            self.y += self.height
-        elif self.y > self.height:
-            self.y -= self.height
+        self.x[self.x < 0] += self.width
+        self.x[self.x > self.width] -= self.width
+        self.y[self.y < 0] += self.height
+        self.y[self.y > self.height] -= self.height
         
         # Gentle life decay - particles live much longer now
         self.life *= self.decay
+        self.lifetime -= 1
         
-        self.max_lifetime -= 1
-        if self.max_lifetime <= 0:
-            return False
-            
-        return self.life > 0.03
+        alive = (self.lifetime > 0) & (self.life > 0.03)
+        if not np.all(alive):
+            self._keep(alive)
     
-    def get_color(self):
-        # Use per-layer color overrides if available
-        particles_config = self.config['pipeline']['particles']
-        global_colors = self.config['visualization']['colors']
-        primary = np.array(particles_config.get('color_primary', global_colors['primary']))
-        secondary = np.array(particles_config.get('color_secondary', global_colors['secondary']))
-        
-        color = (primary * (1 - self.color_ratio) + secondary * self.color_ratio).astype(np.uint8)
-        return color
+    def truncate(self, count):
+        """Drop all but the first ``count`` particles."""
+        self._keep(slice(0, count))
+    
+    def _keep(self, mask):
+        for name in ('x', 'y', 'vx', 'vy', 'size', 'color_ratio', 'life', 'decay',
+                     'lifetime', 'phase_offset', 'beat_angle'):
+            setattr(self, name, getattr(self, name)[mask])
     
     def draw(self, frame):
-        if self.life < 0.03:
+        if len(self) == 0:
             return
         
+        # Use per-layer color overrides if available
         particles_config = self.config['pipeline']['particles']
+        global_colors = self.config['visualization']['colors']
+        primary = np.array(particles_config.get('color_primary', global_colors['primary']))
+        secondary = np.array(particles_config.get('color_secondary', global_colors['secondary']))
         trail_enabled = particles_config.get('trail_enabled', True)
         use_alpha = particles_config.get('use_alpha', True)
-        
-        base_color = self.get_color()
         opacity = particles_config.get('opacity', 0.8)
-        if use_alpha:
-            alpha = self.life * opacity
-        else:
-            alpha = opacity
-        color = (base_color * alpha).astype(np.uint8)
-        bgr_color = (int(color[2]), int(color[1]), int(color[0]))
-        
-        current_size = max(1, int(self.size * (0.5 + self.life * 0.5)))
         
-        cv2.circle(frame, (int(self.x), int(self.y)), current_size, bgr_color, -1)
+        ratio = self.color_ratio[:, np.newaxis]
+        # Colors are configured as RGB; flip to BGR for OpenCV
+        base_color = (primary * (1 - ratio) + secondary * ratio).astype(np.uint8)[:, ::-1]
+        life = self.life[:, np.newaxis]
+        alpha = life * opacity if use_alpha else opacity
+        colors = (base_color * alpha).astype(np.uint8)
+        glow_colors = (base_color * (life * 0.3)).astype(np.uint8)
+        trail_colors = (base_color * (life * 0.4)).astype(np.uint8)
+        
+        scale = self.draw_scale
+        sizes = np.maximum(1, (self.size * (0.5 + self.life * 0.5) * scale).astype(np.int32))
+        xs = (self.x * scale).astype(np.int32)
+        ys = (self.y * scale).astype(np.int32)
+        
+        # Trail effect for fast-moving, still-bright particles
+        speed = np.hypot(self.vx, self.vy)
+        has_trail = (speed > 1.5) & (self.life > 0.2) if trail_enabled else np.zeros(len(self), dtype=bool)
+        trail_len = np.minimum(speed * 2, 12)
+        inv_speed = 1.0 / np.maximum(speed, 0.1)
+        trail_xs = ((self.x - self.vx * inv_speed * trail_len) * scale).astype(np.int32)
+        trail_ys = ((self.y - self.vy * inv_speed * trail_len) * scale).astype(np.int32)
+        
+        centers = np.column_stack([xs, ys])
+        draw_discs(frame, centers, sizes, colors)
         
         # Glow effect for larger particles
-        if current_size > 2:
-            glow_size = current_size + 2
-            glow_alpha = self.life * 0.3
-            glow_color = (base_color * glow_alpha).astype(np.uint8)
-            glow_bgr = (int(glow_color[2]), int(glow_color[1]), int(glow_color[0]))
-            cv2.circle(frame, (int(self.x), int(self.y)), glow_size, glow_bgr, 1)
-        
-        # Trail effect
-        if trail_enabled:
-            speed = np.sqrt(self.vx**2 + self.vy**2)
-            if speed > 1.5 and self.life > 0.2:
-                trail_len = min(speed * 2, 12)
-                dx = -self.vx / max(speed, 0.1) * trail_len
-                dy = -self.vy / max(speed, 0.1) * trail_len
-                
-                trail_x = int(self.x + dx)
-                trail_y = int(self.y + dy)
-                
-                trail_alpha = self.life * 0.4
-                trail_color = (base_color * trail_alpha).astype(np.uint8)
-                trail_bgr = (int(trail_color[2]), int(trail_color[1]), int(trail_color[0]))
-                
-                cv2.line(frame, (int(self.x), int(self.y)), (trail_x, trail_y), 
-                        trail_bgr, max(1, current_size // 2))
+        large = sizes > 2 * scale
+        draw_discs(frame, centers[large], sizes[large] + max(1, int(round(2 * scale))),
+                   glow_colors[large], thickness=1)
+        
+        draw_segments(frame, centers[has_trail],
+                      np.column_stack([trail_xs, trail_ys])[has_trail],
+                      trail_colors[has_trail], np.maximum(1, sizes[has_trail] // 2))
 
 
 class ParticlesLayer(BaseLayer):
     layer_type = "particles"
+    QUALITY_KNOBS = {'count': (150, 20)}
     
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
         self.particles_config = config['pipeline']['particles']
-        self.particles = []
+        # Simulated in pixels of the resolution the settings were made for
+        scale = self.pixel_scale
+        self.particles = ParticleSystem(int(round(self.width / scale)), int(round(self.height / scale)),
+                                        self.config, draw_scale=scale)
         
         self.rms_history = []
         self.force_history = []
@@ -181,17 +202,14 @@ class ParticlesLayer(BaseLayer):
     
     def init_particles(self):
         count = self.particles_config.get('count', 150)
-        for _ in range(count):
-            self.particles.append(Particle(self.width, self.height, self.config))
+        self.particles.spawn(count)
     
     def get_audio_forces(self, time):
-        audio_segment = self.audio.get_audio_segment(time, 0.05)
+        rms = self.get_rms(time, 0.05, min_samples=50)
         
-        if audio_segment is None or len(audio_segment) < 50:
+        if rms is None:
             return self.prev_rms * 0.95, self.prev_force
         
-        rms = np.sqrt(np.mean(audio_segment**2))
-        
         self.rms_history.append(rms)
         if len(self.rms_history) > self.max_history:
             self.rms_history.pop(0)
@@ -205,39 +223,32 @@ class ParticlesLayer(BaseLayer):
             weight_sum += w
         smoothed_rms /= weight_sum if weight_sum > 0 else 1
         
-        if len(audio_segment) >= 256:
-            fft = np.abs(np.fft.rfft(audio_segment[:256]))
+        bands = self.get_band_energies(time, 0.05)
+        
+        if bands is not None:
+            bass, mids, highs = bands
             
-            if len(fft) > 10:
-                bass = np.mean(fft[:len(fft)//8])
-                mid_start = len(fft) // 8
-                mid_end = len(fft) // 2
-                mids = np.mean(fft[mid_start:mid_end]) if mid_end > mid_start else 1.0
-                highs = np.mean(fft[mid_end:]) if len(fft) > mid_end else 1.0
-                
-                # Use slow-varying angles for coherent movement direction
-                # These change slowly so particles move in a consistent direction
-                t = time
-                force_x = (
-                    np.sin(t * 0.3) * bass * 2.0 +
-                    np.cos(t * 0.7) * mids * 1.5 +
-                    np.sin(t * 1.2) * highs * 0.8
-                )
-                force_y = (
-                    np.cos(t * 0.4) * bass * 2.0 +
-                    np.sin(t * 0.6) * mids * 1.5 +
-                    np.cos(t * 1.0) * highs * 0.8
-                )
-                
-                # Normalize to unit direction
-                force_mag = np.sqrt(force_x**2 + force_y**2)
-                if force_mag > 0:
-                    force_x /= force_mag
-                    force_y /= force_mag
-                
-                audio_force = [force_x, force_y]
-            else:
-                audio_force = [np.sin(time * 0.5), np.cos(time * 0.4)]
+            # Use slow-varying angles for coherent movement direction
+            # These change slowly so particles move in a consistent direction
+            t = time
+            force_x = (
+                np.sin(t * 0.3) * bass * 2.0 +
+                np.cos(t * 0.7) * mids * 1.5 +
+                np.sin(t * 1.2) * highs * 0.8
+            )
+            force_y = (
+                np.cos(t * 0.4) * bass * 2.0 +
+                np.sin(t * 0.6) * mids * 1.5 +
+                np.cos(t * 1.0) * highs * 0.8
+            )
+            
+            # Normalize to unit direction
+            force_mag = np.sqrt(force_x**2 + force_y**2)
+            if force_mag > 0:
+                force_x /= force_mag
+                force_y /= force_mag
+            
+            audio_force = [force_x, force_y]
         else:
             audio_force = [np.sin(time * 0.5), np.cos(time * 0.4)]
         
@@ -263,30 +274,24 @@ class ParticlesLayer(BaseLayer):
     def _render_direct(self, time: float, frame: np.ndarray) -> np.ndarray:
         rms, audio_force = self.get_audio_forces(time)
         
-        beat_force = 1.0 if self.audio.is_beat_at_time(time, threshold=0.05) else 0.0
+        beat_force = 1.0 if self.is_beat(time, threshold=0.05) else 0.0
         
-        particles_to_remove = []
+        self.particles.update(audio_force, beat_force, rms, time)
+        self.particles.draw(frame)
         
-        for i, particle in enumerate(self.particles):
-            if particle.update(audio_force, beat_force, rms, time):
-                particle.draw(frame)
-            else:
-                particles_to_remove.append(i)
-                
-        for idx in sorted(particles_to_remove, reverse=True):
-            self.particles.pop(idx)
-        
-        target_count = self.particles_config.get('count', 150)
+        # layer_config rather than particles_config: the quality governor
+        # may have lowered the count
+        target_count = self.layer_config.get('count', 150)
         current_count = len(self.particles)
         
         spawn_rate = self.particles_config.get('spawn_rate', 0.3)
         
-        if current_count < target_count:
+        if current_count > target_count:
+            self.particles.truncate(target_count)
+        elif current_count < target_count:
             # Spawn particles gradually, not all at once
             particles_needed = target_count - current_count
             particles_to_spawn = max(1, min(int(particles_needed * spawn_rate), 5))
-            
-            for _ in range(particles_to_spawn):
-                self.particles.append(Particle(self.width, self.height, self.config, time))
+            self.particles.spawn(particles_to_spawn)
         
         return frame
@@ -1,10 +1,13 @@
-import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_polyline_segments, draw_rects, draw_segments
 
 
 class SpectrumLayer(BaseLayer):
     layer_type = "spectrum"
+    tracks_dirty_rect = True
+    QUALITY_KNOBS = {"bins": (64, 16)}
+    PIXEL_PARAMS = {"bar_spacing": 2, "inner_radius": 50, "wave_thickness": 2}
 
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -13,63 +16,17 @@ class SpectrumLayer(BaseLayer):
         self.prev_spectrum = None
 
     def get_instant_spectrum(self, time):
-        window = 0.08  # Wider window for better frequency resolution
-        audio_segment = self.audio.get_audio_segment(time, window)
-
         target_bins = self.layer_config.get("bins", 64)
 
-        if audio_segment is None or len(audio_segment) < 256:
+        # Wider window and larger FFT for better frequency resolution,
+        # logarithmic frequency binning for perceptually even distribution
+        fft = self.get_log_spectrum(time, target_bins)
+
+        if fft is None:
             if self.prev_spectrum is not None:
                 return self.prev_spectrum * 0.9
             return np.zeros(target_bins)
 
-        # Use a larger FFT window for better frequency resolution
-        fft_size = min(4096, len(audio_segment))
-        # Apply Hann window to reduce spectral leakage
-        windowed = audio_segment[:fft_size] * np.hanning(fft_size)
-        fft = np.abs(np.fft.rfft(windowed))
-
-        # Limit to useful frequency range (up to ~10kHz instead of full Nyquist ~22kHz)
-        # This ensures all bins map to frequencies where music actually has content
-        sr = self.audio.sample_rate if hasattr(self.audio, '_sample_rate') and self.audio.sample_rate > 0 else 44100
-        max_useful_freq = 12000  # Hz — covers virtually all musical content
-        max_bin_index = min(len(fft), int(max_useful_freq * fft_size / sr))
-        max_bin_index = max(max_bin_index, target_bins)  # Safety floor
-        fft = fft[:max_bin_index]
-
-        # Log scale for perceptual loudness
-        fft = np.log1p(fft)
-
-        # Use LOGARITHMIC frequency binning for perceptually even distribution
-        if len(fft) > target_bins:
-            fft_resampled = np.zeros(target_bins)
-            # Create logarithmically spaced center frequencies
-            log_centers = np.logspace(
-                np.log10(1),  # Start from index 1 (skip DC)
-                np.log10(len(fft) - 1),
-                target_bins
-            )
-            # Create bin edges as midpoints between centers
-            log_edges = np.zeros(target_bins + 1)
-            log_edges[0] = max(0, log_centers[0] - (log_centers[1] - log_centers[0]) / 2)
-            log_edges[-1] = min(len(fft), log_centers[-1] + (log_centers[-1] - log_centers[-2]) / 2)
-            for i in range(1, target_bins):
-                log_edges[i] = (log_centers[i - 1] + log_centers[i]) / 2
-
-            for i in range(target_bins):
-                start = int(log_edges[i])
-                end = int(log_edges[i + 1])
-                start = max(0, min(start, len(fft) - 1))
-                end = max(start + 1, min(end, len(fft)))
-                fft_resampled[i] = np.mean(fft[start:end])
-
-            fft = fft_resampled
-        else:
-            # If we have fewer FFT bins than target, interpolate up
-            x_old = np.linspace(0, 1, len(fft))
-            x_new = np.linspace(0, 1, target_bins)
-            fft = np.interp(x_new, x_old, fft)
-
         # Normalize to 0-1 range
         max_val = np.max(fft)
         if max_val > 0:
@@ -143,35 +100,36 @@ class SpectrumLayer(BaseLayer):
                 # Moderate release — bars fall at a natural pace
                 self.prev_heights[i] = self.prev_heights[i] * 0.75 + target_heights[i] * 0.25
 
-        bar_heights = self.prev_heights.astype(np.int32)
-
-        for i, bar_height in enumerate(bar_heights):
-            if bar_height < 2:
-                bar_height = 2  # Minimum visible height
-
-            x = start_x + i * (bar_width + bar_spacing)
-            y_top = self.height - bar_height
-
-            color_ratio = i / max(num_bars - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-
-            if use_alpha:
-                alpha = max(0.2, freq_data[i] * 0.8 + 0.2)
-                color = (color * alpha).astype(np.uint8)
-
-            color_tuple = tuple(int(c) for c in color)
-
-            # Draw bar with slight rounded top
-            cv2.rectangle(
-                frame, (x, y_top), (x + bar_width, self.height), color_tuple, -1
-            )
-
-            # Add a bright cap on top of each bar
-            if bar_height > 4:
-                cap_color = tuple(min(255, int(c * 1.5)) for c in color_tuple)
-                cv2.rectangle(
-                    frame, (x, y_top), (x + bar_width, y_top + 2), cap_color, -1
-                )
+        # Minimum visible height
+        bar_heights = np.maximum(self.prev_heights.astype(np.int32), 2)
+
+        xs = start_x + np.arange(num_bars) * (bar_width + bar_spacing)
+        y_tops = self.height - bar_heights
+
+        colors = self.get_color_gradients(np.arange(num_bars) / max(num_bars - 1, 1))
+
+        if use_alpha:
+            alpha = np.maximum(0.2, freq_data * 0.8 + 0.2)[:, np.newaxis]
+            colors = (colors * alpha).astype(np.uint8)
+
+        # Draw bars
+        draw_rects(
+            frame,
+            np.column_stack([xs, y_tops]),
+            np.column_stack([xs + bar_width, np.full(num_bars, self.height)]),
+            colors,
+        )
+
+        # Add a bright cap on top of each bar
+        capped = bar_heights > 4
+        cap_colors = np.minimum(255, (colors[capped] * 1.5).astype(np.int32))
+        draw_rects(
+            frame,
+            np.column_stack([xs[capped], y_tops[capped]]),
+            np.column_stack([xs[capped] + bar_width, y_tops[capped] + 2]),
+            cap_colors,
+        )
+        self._mark_dirty(xs.min(), y_tops.min(), xs.max() + bar_width + 1, self.height)
 
     def _render_circular(self, frame, freq_data, time):
         center_x, center_y = self.width // 2, self.height // 2
@@ -195,19 +153,21 @@ class SpectrumLayer(BaseLayer):
 
         thicknesses = np.clip((freq_data * 6 + 2).astype(np.int32), 2, 8)
 
-        for i in range(num_bars):
-            color_ratio = i / max(num_bars - 1, 1)
-            color = self.get_color_gradient(color_ratio)
+        colors = self.get_color_gradients(np.arange(num_bars) / max(num_bars - 1, 1))
 
-            if use_alpha:
-                alpha = max(0.2, freq_data[i] * 0.8 + 0.2)
-                color = (color * alpha).astype(np.uint8)
+        if use_alpha:
+            alpha = np.maximum(0.2, freq_data * 0.8 + 0.2)[:, np.newaxis]
+            colors = (colors * alpha).astype(np.uint8)
 
-            color_tuple = tuple(int(c) for c in color)
-
-            cv2.line(
-                frame, (x1s[i], y1s[i]), (x2s[i], y2s[i]), color_tuple, int(thicknesses[i])
-            )
+        draw_segments(
+            frame,
+            np.column_stack([x1s, y1s]),
+            np.column_stack([x2s, y2s]),
+            colors,
+            thicknesses,
+        )
+        self._mark_dirty_points(np.column_stack([x1s, y1s]), pad=int(thicknesses.max()) + 2)
+        self._mark_dirty_points(np.column_stack([x2s, y2s]), pad=int(thicknesses.max()) + 2)
 
     def _render_wave(self, frame, freq_data, time):
         num_points = len(freq_data)
@@ -226,19 +186,12 @@ class SpectrumLayer(BaseLayer):
         y_points = smoothed_ys.astype(np.int32)
         wave_thickness = self.layer_config.get("wave_thickness", 2)
 
-        for i in range(num_points - 1):
-            color_ratio = i / max(num_points - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-
-            if use_alpha:
-                alpha = max(0.2, (freq_data[i] + freq_data[i + 1]) / 2 * 0.8 + 0.2)
-                color = (color * alpha).astype(np.uint8)
-
-            color_tuple = tuple(int(c) for c in color)
-            cv2.line(
-                frame,
-                (x_points[i], y_points[i]),
-                (x_points[i + 1], y_points[i + 1]),
-                color_tuple,
-                wave_thickness,
-            )
+        colors = self.get_color_gradients(np.arange(num_points - 1) / max(num_points - 1, 1))
+
+        if use_alpha:
+            alpha = np.maximum(0.2, (freq_data[:-1] + freq_data[1:]) / 2 * 0.8 + 0.2)
+            colors = (colors * alpha[:, np.newaxis]).astype(np.uint8)
+
+        points = np.column_stack([x_points, y_points])
+        draw_polyline_segments(frame, points, colors, wave_thickness)
+        self._mark_dirty_points(points, pad=wave_thickness + 2)
@@ -1,10 +1,14 @@
 import cv2
 import numpy as np
 from ..base_layer import BaseLayer
+from ..drawing import draw_polyline_segments
 
 
 class WaveformLayer(BaseLayer):
     layer_type = "waveform"
+    antialiased = True
+    QUALITY_KNOBS = {'points': (300, 64)}
+    PIXEL_PARAMS = {'line_width': 2}
     
     def __init__(self, config, audio_processor, width, height):
         super().__init__(config, audio_processor, width, height)
@@ -22,14 +26,12 @@ class WaveformLayer(BaseLayer):
                 return self.prev_waveform * 0.9
             return np.zeros(200)
         
-        target_points = min(300, len(audio_segment))
+        target_points = min(self.layer_config.get('points', 300), len(audio_segment))
         if len(audio_segment) > target_points:
             # Use proper downsampling with averaging instead of just stepping
             step = len(audio_segment) // target_points
-            audio_segment = np.array([
-                np.mean(audio_segment[i:i+step]) 
-                for i in range(0, len(audio_segment) - step + 1, step)
-            ])
+            num_chunks = len(audio_segment) // step
+            audio_segment = audio_segment[:num_chunks * step].reshape(num_chunks, step).mean(axis=1)
             if len(audio_segment) > target_points:
                 audio_segment = audio_segment[:target_points]
         
@@ -38,7 +40,7 @@ class WaveformLayer(BaseLayer):
         if max_amp > 0:
             audio_segment = audio_segment / max_amp
         
-        smoothing = self.waveform_config.get('smoothing', 0.5)
+        smoothing = self.layer_config.get('smoothing', 0.5)
         if self.prev_waveform is not None and smoothing > 0:
             if len(audio_segment) == len(self.prev_waveform):
                 audio_segment = self.prev_waveform * smoothing + audio_segment * (1 - smoothing)
@@ -72,18 +74,17 @@ class WaveformLayer(BaseLayer):
         
         return frame
     
+    def _segment_ratios(self, num_points):
+        return np.arange(num_points - 1) / max(num_points - 1, 1)
+    
     def _render_simple(self, frame, audio_segment, time, amplitude):
         x_points = np.linspace(0, self.width - 1, len(audio_segment), dtype=np.int32)
         y_points = (self.center_y + audio_segment * (self.height * 0.18)).astype(np.int32)
         
         # Draw with gradient color
-        for i in range(len(x_points) - 1):
-            color_ratio = i / max(len(x_points) - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-            color_tuple = tuple(int(c) for c in color)
-            cv2.line(frame, (x_points[i], y_points[i]), 
-                     (x_points[i+1], y_points[i+1]), color_tuple, 
-                     self.line_width, cv2.LINE_AA)
+        colors = self.get_color_gradients(self._segment_ratios(len(x_points)))
+        draw_polyline_segments(frame, np.column_stack([x_points, y_points]), colors,
+                               self.line_width, self.line_type)
     
     def _render_mirror(self, frame, audio_segment, time, amplitude):
         x_points = np.linspace(0, self.width - 1, len(audio_segment), dtype=np.int32)
@@ -92,26 +93,20 @@ class WaveformLayer(BaseLayer):
         y_bottom = (self.center_y + displacement).astype(np.int32)
         
         # Draw with gradient colors
-        for i in range(len(x_points) - 1):
-            color_ratio = i / max(len(x_points) - 1, 1)
-            color_top = self.get_color_gradient(color_ratio * 0.6)
-            color_bottom = self.get_color_gradient(0.4 + color_ratio * 0.6)
-            
-            ct_top = tuple(int(c) for c in color_top)
-            ct_bottom = tuple(int(c) for c in color_bottom)
-            
-            cv2.line(frame, (x_points[i], y_top[i]), 
-                     (x_points[i+1], y_top[i+1]), ct_top, 
-                     self.line_width, cv2.LINE_AA)
-            cv2.line(frame, (x_points[i], y_bottom[i]), 
-                     (x_points[i+1], y_bottom[i+1]), ct_bottom, 
-                     self.line_width, cv2.LINE_AA)
+        ratios = self._segment_ratios(len(x_points))
+        colors_top = self.get_color_gradients(ratios * 0.6)
+        colors_bottom = self.get_color_gradients(0.4 + ratios * 0.6)
+        
+        draw_polyline_segments(frame, np.column_stack([x_points, y_top]), colors_top,
+                               self.line_width, self.line_type)
+        draw_polyline_segments(frame, np.column_stack([x_points, y_bottom]), colors_bottom,
+                               self.line_width, self.line_type)
         
         # Draw center line (subtle)
         center_color = self.get_color_gradient(0.5) * 0.3
         center_tuple = tuple(int(c) for c in center_color.astype(np.uint8))
         cv2.line(frame, (0, self.center_y), (self.width, self.center_y), 
-                 center_tuple, 1, cv2.LINE_AA)
+                 center_tuple, 1, self.line_type)
     
     def _render_filled(self, frame, audio_segment, time, amplitude):
         x_points = np.linspace(0, self.width - 1, len(audio_segment), dtype=np.int32)
@@ -129,34 +124,23 @@ class WaveformLayer(BaseLayer):
         cv2.fillPoly(frame, [fill_points], fill_color)
         
         # Draw outline with gradient
-        for i in range(len(x_points) - 1):
-            color_ratio = i / max(len(x_points) - 1, 1)
-            line_color = self.get_color_gradient(color_ratio)
-            line_tuple = tuple(int(c) for c in line_color)
-            cv2.line(frame, (x_points[i], y_points[i]),
-                     (x_points[i+1], y_points[i+1]), line_tuple,
-                     self.line_width, cv2.LINE_AA)
+        colors = self.get_color_gradients(self._segment_ratios(len(x_points)))
+        draw_polyline_segments(frame, points, colors, self.line_width, self.line_type)
     
     def _render_energy(self, frame, audio_segment, time, amplitude):
         x_points = np.linspace(0, self.width - 1, len(audio_segment), dtype=np.int32)
         y_points = (self.center_y + audio_segment * (self.height * 0.18)).astype(np.int32)
         
-        for i in range(len(x_points) - 1):
-            x1, y1 = x_points[i], y_points[i]
-            x2, y2 = x_points[i + 1], y_points[i + 1]
-            dy = abs(y2 - y1)
-            
-            # Thickness varies with energy (amplitude change)
-            thickness = int(self.line_width * (1 + dy / 15))
-            thickness = max(1, min(thickness, self.line_width * 4))
-            
-            # Color intensity varies with local energy
-            local_energy = abs(audio_segment[i])
-            color_ratio = i / max(len(x_points) - 1, 1)
-            color = self.get_color_gradient(color_ratio)
-            alpha = max(0.3, local_energy * 0.7 + 0.3)
-            color = (color * alpha).astype(np.uint8)
-            color_tuple = tuple(int(c) for c in color)
-            
-            cv2.line(frame, (x1, y1), (x2, y2), color_tuple, 
-                     thickness, cv2.LINE_AA)
+        # Thickness varies with energy (amplitude change)
+        dy = np.abs(np.diff(y_points))
+        thickness = (self.line_width * (1 + dy / 15)).astype(np.int32)
+        thickness = np.clip(thickness, 1, max(1, self.line_width * 4))
+        
+        # Color intensity varies with local energy
+        local_energy = np.abs(audio_segment[:-1])
+        colors = self.get_color_gradients(self._segment_ratios(len(x_points)))
+        alpha = np.maximum(0.3, local_energy * 0.7 + 0.3)[:, np.newaxis]
+        colors = (colors * alpha).astype(np.uint8)
+        
+        draw_polyline_segments(frame, np.column_stack([x_points, y_points]), colors,
+                               thickness, self.line_type)
@@ -1,3 +1,4 @@
+from time import perf_counter
 import cv2
 import numpy as np
 from typing import List, Dict, Any
@@ -12,12 +13,18 @@ class PipelineRenderer(IVisualizer):
         self.audio = audio_processor
         self.width = config['video']['width']
         self.height = config['video']['height']
+        # Draft renders run at a fraction of the resolution the layer
+        # settings were made for; their pixel sizes are scaled to match
+        self.pixel_scale = config['video'].get('pixel_scale', 1.0)
         
         if 'pipeline' not in config:
             raise KeyError("Section 'pipeline' missing in config")
         
         self.layer_registry = LayerRegistry()
         self.layers = self._create_layers()
+        # Seconds each layer took on the last frame, in pipeline order
+        self.layer_times = [0.0] * len(self.layers)
+        self.profiler = None
         print(f"Pipeline created: {len(self.layers)} layers")
     
     def _create_layers(self):
@@ -26,15 +33,28 @@ class PipelineRenderer(IVisualizer):
         
         for layer_name in pipeline_order:
             try:
-                layer = self.layer_registry.create_layer(
-                    layer_name, 
-                    self.config, 
-                    self.audio, 
-                    self.width, 
-                    self.height
-                )
+                layer_config = self.config['pipeline'].get(layer_name, {})
+                scale = layer_config.get('render_scale', 1.0)
+                if scale < 1.0 and self.layer_registry.get_layer_class(layer_name).scalable:
+                    layer = self._create_scaled_layer(layer_name, scale)
+                    print(f"  + {layer_name} (at {layer.width}x{layer.height})")
+                elif self.pixel_scale != 1.0:
+                    layer_class = self.layer_registry.get_layer_class(layer_name)
+                    layer = layer_class(
+                        self._config_with_layer(
+                            layer_name, layer_class.scale_pixel_params(layer_config, self.pixel_scale)),
+                        self.audio, self.width, self.height)
+                    print(f"  + {layer_name}")
+                else:
+                    layer = self.layer_registry.create_layer(
+                        layer_name, 
+                        self.config, 
+                        self.audio, 
+                        self.width, 
+                        self.height
+                    )
+                    print(f"  + {layer_name}")
                 layers.append(layer)
-                print(f"  + {layer_name}")
             except KeyError as e:
                 available = self.layer_registry.get_available_layers()
                 raise ValueError(
@@ -44,12 +64,54 @@ class PipelineRenderer(IVisualizer):
         
         return layers
     
+    def _create_scaled_layer(self, layer_name: str, scale: float):
+        # The layer is built for the reduced canvas, with its pixel-sized
+        # settings scaled to match; BaseLayer.render upsamples it to the frame
+        layer_class = self.layer_registry.get_layer_class(layer_name)
+        layer_config = layer_class.scale_pixel_params(self.config['pipeline'][layer_name],
+                                                      scale * self.pixel_scale)
+        
+        width = max(1, int(round(self.width * scale)))
+        height = max(1, int(round(self.height * scale)))
+        layer = layer_class(self._config_with_layer(layer_name, layer_config), self.audio, width, height)
+        layer.output_width = self.width
+        layer.output_height = self.height
+        return layer
+    
+    def _config_with_layer(self, layer_name: str, layer_config: Dict[str, Any]) -> Dict[str, Any]:
+        # Shallow copy of the config with one layer's settings replaced
+        config = dict(self.config)
+        config['pipeline'] = dict(self.config['pipeline'])
+        config['pipeline'][layer_name] = layer_config
+        return config
+    
+    def set_profiler(self, profiler):
+        """Record per-layer, blend and copy spans into ``profiler`` (None to stop)."""
+        self.profiler = profiler
+        for layer in self.layers:
+            layer.profiler = profiler
+    
     def render_frame(self, time: float) -> np.ndarray:
+        profiler = self.profiler
+        frame_start = perf_counter()
         current_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
         
-        for layer in self.layers:
+        for i, layer in enumerate(self.layers):
+            start = perf_counter()
+            # Layers may return a shared read-only buffer (e.g. a cached
+            # background plate); copy it before the next layer draws on it
+            if not current_frame.flags.writeable:
+                current_frame = current_frame.copy()
+                if profiler is not None:
+                    profiler.record('copy', start)
             current_frame = layer.render(time, current_frame)
+            end = perf_counter()
+            self.layer_times[i] = end - start
+            if profiler is not None:
+                profiler.record(f"layer:{layer.layer_type}", start, end)
         
+        if profiler is not None:
+            profiler.record('render', frame_start)
         return current_frame
     
     def get_layer_info(self):
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+
+# Decisions kept for metrics()
+RECENT_DECISIONS = 100
+
+
+class QualityGovernor:
+    """Trades layer quality for speed to keep frames within a time budget.
+
+    Fed the work time of every frame and the per-layer times from
+    PipelineRenderer, it keeps exponential moving averages of both. While
+    the frame average is above ``high_water`` of the budget, the slowest
+    layer that can still degrade is stepped down one quality level (see
+    BaseLayer.set_quality_level). After ``recover_frames`` consecutive
+    frames below ``low_water``, the most recently degraded layer is stepped
+    back up. ``cooldown_frames`` after each change lets the averages settle
+    before the next decision.
+    """
+
+    def __init__(self, layers: Sequence, frame_budget: float, high_water: float = 0.9,
+                 low_water: float = 0.6, smoothing: float = 0.1,
+                 cooldown_frames: int = 15, recover_frames: int = 60):
+        self.layers = list(layers)
+        self.frame_budget = frame_budget
+        self.high_water = high_water
+        self.low_water = low_water
+        self.smoothing = smoothing
+        self.cooldown_frames = cooldown_frames
+        self.recover_frames = recover_frames
+
+        self.frame_time = None
+        self.layer_times = [0.0] * len(self.layers)
+        self.frames = 0
+        self.step_downs = 0
+        self.step_ups = 0
+        self.decisions = deque(maxlen=RECENT_DECISIONS)
+
+        self._frames_since_change = 0
+        self._headroom_frames = 0
+        # Indices of degraded layers, most recent last, for stepping back up
+        self._degraded: List[int] = []
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], layers: Sequence) -> Optional['QualityGovernor']:
+        """Build a governor from the ``quality_governor`` section, or None if disabled."""
+        governor_config = config.get('quality_governor', {})
+        if not governor_config.get('enabled', False):
+            return None
+        return cls(
+            layers,
+            1.0 / config['video']['fps'],
+            high_water=governor_config.get('high_water', 0.9),
+            low_water=governor_config.get('low_water', 0.6),
+            cooldown_frames=governor_config.get('cooldown_frames', 15),
+            recover_frames=governor_config.get('recover_frames', 60),
+        )
+
+    def update(self, frame_time: float, layer_times: Sequence[float]) -> Optional[dict]:
+        """Account one frame; returns the decision taken, if any."""
+        s = self.smoothing
+        if self.frame_time is None:
+            self.frame_time = frame_time
+            self.layer_times = list(layer_times)
+        else:
+            self.frame_time = self.frame_time * (1 - s) + frame_time * s
+            self.layer_times = [avg * (1 - s) + t * s
+                                for avg, t in zip(self.layer_times, layer_times)]
+        self.frames += 1
+        self._frames_since_change += 1
+
+        if self.frame_time < self.frame_budget * self.low_water:
+            self._headroom_frames += 1
+        else:
+            self._headroom_frames = 0
+
+        if self._frames_since_change < self.cooldown_frames:
+            return None
+
+        if self.frame_time > self.frame_budget * self.high_water:
+            candidates = [i for i, layer in enumerate(self.layers)
+                          if layer.quality_level < layer.max_quality_level]
+            if not candidates:
+                return None
+            index = max(candidates, key=lambda i: self.layer_times[i])
+            self._degraded.append(index)
+            self.step_downs += 1
+            return self._change(index, +1, 'over budget')
+
+        if self._headroom_frames >= self.recover_frames and self._degraded:
+            index = self._degraded.pop()
+            self.step_ups += 1
+            self._headroom_frames = 0
+            return self._change(index, -1, 'headroom')
+
+        return None
+
+    def _change(self, index: int, step: int, reason: str) -> dict:
+        layer = self.layers[index]
+        previous = layer.quality_level
+        layer.set_quality_level(previous + step)
+        self._frames_since_change = 0
+
+        decision = {
+            'frame': self.frames,
+            'layer': layer.layer_type,
+            'from_level': previous,
+            'to_level': layer.quality_level,
+            'reason': reason,
+            'frame_ms': self.frame_time * 1000,
+            'layer_ms': self.layer_times[index] * 1000,
+        }
+        self.decisions.append(decision)
+        return decision
+
+    def metrics(self) -> dict:
+        return {
+            'frames': self.frames,
+            'budget_ms': self.frame_budget * 1000,
+            'frame_ms': (self.frame_time or 0.0) * 1000,
+            'step_downs': self.step_downs,
+            'step_ups': self.step_ups,
+            'levels': {layer.layer_type: layer.quality_level for layer in self.layers},
+            'layer_ms': {layer.layer_type: t * 1000
+                         for layer, t in zip(self.layers, self.layer_times)},
+            'decisions': list(self.decisions),
+        }
@@ -0,0 +1,117 @@
+import json
+import os
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class FrameProfiler:
+    """Wall-clock timings of the render hot path.
+
+    Spans are recorded by name: ``frame`` for a whole iteration of the
+    render loop, ``render`` for PipelineRenderer.render_frame, and within it
+    ``layer:<type>`` per layer, ``upscale:<type>`` / ``blend:<type>`` for
+    compositing and ``copy`` for duplicating read-only plates; ``convert``
+    and ``encode`` cover turning the frame into the encoder's raw bgr24
+    layout and writing it to ffmpeg.
+
+    Durations of every frame feed the summary (p50/p95/max per stage); the
+    individual spans of the first ``max_trace_frames`` frames are kept for
+    the Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+    """
+
+    def __init__(self, max_trace_frames: int = 3000):
+        self.max_trace_frames = max_trace_frames
+        self.frames = 0
+        self.durations = defaultdict(list)
+        # (pid, name, start, duration) for the trace
+        self.events = []
+        self.pid = os.getpid()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['FrameProfiler']:
+        """A profiler if ``profiling.enabled`` (or ``debug``) is set, else None."""
+        profiling_config = config.get('profiling', {})
+        if not (profiling_config.get('enabled', False) or config.get('debug', False)):
+            return None
+        return cls(profiling_config.get('max_trace_frames', 3000))
+
+    def record(self, name: str, start: float, end: Optional[float] = None):
+        """Record a span that began at ``start`` (a perf_counter value)."""
+        if end is None:
+            end = perf_counter()
+        duration = end - start
+        self.durations[name].append(duration)
+        if self.frames < self.max_trace_frames:
+            self.events.append((self.pid, name, start, duration))
+
+    def record_frame(self, start: float, end: Optional[float] = None):
+        self.record('frame', start, end)
+        self.frames += 1
+
+    def merge(self, other: 'FrameProfiler'):
+        """Fold in the spans of another profiler, e.g. from a render worker process."""
+        self.frames += other.frames
+        for name, durations in other.durations.items():
+            self.durations[name].extend(durations)
+        self.events.extend(other.events)
+
+    def summary(self) -> Dict[str, Any]:
+        stages = {}
+        for name, durations in self.durations.items():
+            times = np.array(durations) * 1000
+            stages[name] = {
+                'count': len(times),
+                'total_ms': float(times.sum()),
+                'per_frame_ms': float(times.sum() / self.frames) if self.frames else 0.0,
+                'p50_ms': float(np.percentile(times, 50)),
+                'p95_ms': float(np.percentile(times, 95)),
+                'max_ms': float(times.max()),
+            }
+        return {'frames': self.frames, 'stages': stages}
+
+    def report(self) -> str:
+        summary = self.summary()
+        stages = sorted(summary['stages'].items(), key=lambda item: -item[1]['total_ms'])
+        width = max([len(name) for name, _ in stages] + [5])
+        lines = [f"Profile over {summary['frames']} frames (ms)",
+                 f"{'stage':<{width}}  {'per frame':>9}  {'p50':>7}  {'p95':>7}  {'max':>7}"]
+        for name, stats in stages:
+            lines.append(f"{name:<{width}}  {stats['per_frame_ms']:>9.2f}  {stats['p50_ms']:>7.2f}  "
+                         f"{stats['p95_ms']:>7.2f}  {stats['max_ms']:>7.2f}")
+        return '\n'.join(lines)
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_chrome_trace(self, path: str):
+        """Write the kept spans in the Chrome trace event format (one track per process)."""
+        origin = min((start for _, _, start, _ in self.events), default=0.0)
+        events = [{
+            'name': name,
+            'cat': name.split(':', 1)[0],
+            'ph': 'X',
+            'ts': (start - origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': pid,
+            'tid': pid,
+        } for pid, name, start, duration in self.events]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def write_reports(self, output_path: str, config: Dict[str, Any]):
+        """Print the summary and write ``<prefix>.profile.json`` and ``<prefix>.trace.json``.
+
+        The prefix is ``profiling.output`` if set, else ``output_path`` without its extension.
+        """
+        prefix = config.get('profiling', {}).get('output') or os.path.splitext(output_path)[0]
+        json_path = f"{prefix}.profile.json"
+        trace_path = f"{prefix}.trace.json"
+        self.write_json(json_path)
+        self.write_chrome_trace(trace_path)
+        print(self.report())
+        print(f"Profile: {json_path}")
+        print(f"Trace: {trace_path}")
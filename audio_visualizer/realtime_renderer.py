@@ -0,0 +1,149 @@
+import math
+import time
+from collections import deque
+import numpy as np
+from typing import Callable, Optional
+
+from .pipeline.quality_governor import QualityGovernor
+
+
+# Render times kept for the rolling mean/p95 (a minute and a half at 30 fps)
+RECENT_FRAMES = 3000
+
+
+class RealtimeRenderer:
+    """Renders a live source at a fixed frame rate against the wall clock.
+
+    Each frame has a budget of ``1 / fps``. Frames are rendered at the live
+    edge of the audio minus ``latency`` (so centered analysis windows are
+    mostly filled). When rendering falls a whole frame behind, the missed
+    frames are dropped rather than queued; the sink gets the previous frame
+    again for each of them so a recording keeps a constant frame rate.
+    With ``quality_governor.enabled``, layer quality is lowered while frames
+    run over budget and restored when there is headroom.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        video_config = config['video']
+        live_config = config.get('audio', {}).get('live', {})
+        self.fps = video_config['fps']
+        self.frame_budget = 1.0 / self.fps
+        self.latency = live_config.get('latency', 0.05)
+        self.stats = {}
+        self.governor = None
+
+    def _reset_stats(self):
+        self.stats = {
+            'frames_rendered': 0,
+            'frames_dropped': 0,
+            'frames_over_budget': 0,
+            'render_times': deque(maxlen=RECENT_FRAMES),
+        }
+
+    def run(self, source, visualizer, sink: Optional[Callable[[np.ndarray], None]] = None,
+            max_seconds: Optional[float] = None):
+        """Render until the source ends, ``max_seconds`` pass, or Ctrl+C."""
+        self._reset_stats()
+        stats = self.stats
+        if hasattr(visualizer, 'layer_times'):
+            self.governor = QualityGovernor.from_config(self.config, visualizer.layers)
+        previous_frame = None
+
+        print(f"Live rendering at {self.fps} fps (budget {self.frame_budget * 1000:.1f} ms/frame)")
+
+        # Wait for the first audio so the clock starts with the stream
+        while source.current_time < self.latency and not source.ended.is_set():
+            time.sleep(0.005)
+
+        start = time.perf_counter()
+        frame_idx = 0
+        try:
+            while True:
+                if frame_idx >= self._frame_limit(source, max_seconds):
+                    break
+
+                deadline = start + (frame_idx + 1) * self.frame_budget
+                render_start = time.perf_counter()
+                frame = visualizer.render_frame(max(0.0, source.current_time - self.latency))
+                render_time = time.perf_counter() - render_start
+
+                stats['frames_rendered'] += 1
+                stats['render_times'].append(render_time)
+                if render_time > self.frame_budget:
+                    stats['frames_over_budget'] += 1
+                if sink is not None:
+                    sink(frame)
+                previous_frame = frame
+                frame_idx += 1
+                
+                if self.governor is not None:
+                    # Encoder writes share the budget, so they count as work too
+                    decision = self.governor.update(time.perf_counter() - render_start,
+                                                    visualizer.layer_times)
+                    if decision is not None:
+                        print(f"Quality: {decision['layer']} level {decision['from_level']} -> "
+                              f"{decision['to_level']} ({decision['reason']}, "
+                              f"{decision['frame_ms']:.1f} ms/frame)")
+
+                now = time.perf_counter()
+                if now < deadline:
+                    time.sleep(deadline - now)
+                else:
+                    # Behind schedule: skip the frame slots that have already passed
+                    # (never past the end, or the recording outruns its audio)
+                    behind = int((now - deadline) / self.frame_budget)
+                    behind = max(0, min(behind, self._frame_limit(source, max_seconds) - frame_idx))
+                    if behind > 0:
+                        stats['frames_dropped'] += behind
+                        frame_idx += behind
+                        if sink is not None:
+                            for _ in range(behind):
+                                sink(previous_frame)
+        except KeyboardInterrupt:
+            print("Live rendering stopped")
+
+        self._print_summary(time.perf_counter() - start)
+        return self.summary()
+
+    def _frame_limit(self, source, max_seconds: Optional[float]) -> float:
+        """Frames the session may cover: up to ``max_seconds``, or the stream's end."""
+        limit = float('inf')
+        if max_seconds is not None:
+            limit = math.ceil(max_seconds * self.fps - 1e-9)
+        if source.ended.is_set():
+            limit = min(limit, math.ceil((source.current_time - self.latency) * self.fps - 1e-9))
+        return limit
+
+    def summary(self) -> dict:
+        times = np.array(self.stats.get('render_times', []), dtype=np.float64) * 1000
+        total = self.stats.get('frames_rendered', 0) + self.stats.get('frames_dropped', 0)
+        summary = {
+            'fps': self.fps,
+            'budget_ms': self.frame_budget * 1000,
+            'frames_rendered': self.stats.get('frames_rendered', 0),
+            'frames_dropped': self.stats.get('frames_dropped', 0),
+            'frames_over_budget': self.stats.get('frames_over_budget', 0),
+            'drop_ratio': self.stats.get('frames_dropped', 0) / total if total else 0.0,
+            'render_ms_mean': float(times.mean()) if len(times) else 0.0,
+            'render_ms_p95': float(np.percentile(times, 95)) if len(times) else 0.0,
+            'render_ms_max': float(times.max()) if len(times) else 0.0,
+        }
+        if self.governor is not None:
+            summary['quality'] = self.governor.metrics()
+        return summary
+
+    def _print_summary(self, elapsed: float):
+        summary = self.summary()
+        print(f"Live session: {elapsed:.1f} s, "
+              f"{summary['frames_rendered']} frames rendered, "
+              f"{summary['frames_dropped']} dropped ({summary['drop_ratio'] * 100:.1f}%), "
+              f"{summary['frames_over_budget']} over budget")
+        print(f"Render time: mean {summary['render_ms_mean']:.1f} ms, "
+              f"p95 {summary['render_ms_p95']:.1f} ms, max {summary['render_ms_max']:.1f} ms "
+              f"(budget {summary['budget_ms']:.1f} ms)")
+        if 'quality' in summary:
+            quality = summary['quality']
+            levels = ', '.join(f"{name} {level}" for name, level in quality['levels'].items() if level)
+            print(f"Quality: {quality['step_downs']} step downs, {quality['step_ups']} step ups; "
+                  f"final levels: {levels or 'all full quality'}")
@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+IMAGE_FORMATS = {
+    'png': ('.png', 'image/png'),
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'jpg': ('.jpg', 'image/jpeg'),
+}
+
+
+class StillRenderer:
+    """Renders single frames of a visualizer at arbitrary times (stills, scrubbing).
+
+    Stateful layers (smoothing, particles) are warmed up by rendering the
+    ``preroll_seconds`` before the requested frame. A request a little
+    after the previous one continues from it instead, so scrubbing forward
+    costs only the frames in between. Layer state left over from earlier
+    requests is not reset, so a still approximates the same frame of a full
+    render rather than matching it pixel for pixel.
+    """
+
+    def __init__(self, visualizer, fps: float, preroll_seconds: float = 2.0):
+        self.visualizer = visualizer
+        self.fps = fps
+        self.preroll_frames = max(0, int(preroll_seconds * fps))
+        # Visualizers are not thread-safe; hold this around render()
+        self.lock = threading.Lock()
+        self._last_index = None
+        self._last_frame = None
+
+    def render(self, time: float) -> np.ndarray:
+        """The frame shown at ``time`` seconds, as a BGR image."""
+        index = max(0, int(round(time * self.fps)))
+        if index == self._last_index:
+            return self._last_frame
+
+        start = max(0, index - self.preroll_frames)
+        if self._last_index is not None and start <= self._last_index < index:
+            start = self._last_index + 1
+        for i in range(start, index):
+            self.visualizer.render_frame(i / self.fps)
+
+        # The last layer may hand back a buffer it reuses on the next frame
+        frame = np.array(self.visualizer.render_frame(index / self.fps))
+        self._last_index, self._last_frame = index, frame
+        return frame
+
+
+def encode_image(frame: np.ndarray, fmt: str = 'png', quality: int = 90) -> bytes:
+    """Encode a BGR frame as PNG or JPEG."""
+    ext = IMAGE_FORMATS[fmt][0]
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if ext == '.jpg' else []
+    ok, data = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise RuntimeError(f"Could not encode the frame as {fmt}")
+    return data.tobytes()
+
+
+def image_format(path: str, default: str = 'png') -> Optional[str]:
+    """The IMAGE_FORMATS key for ``path``'s extension, ``default`` without one, None if unsupported."""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    if not ext:
+        return default
+    return ext if ext in IMAGE_FORMATS else None
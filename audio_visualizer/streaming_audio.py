@@ -0,0 +1,333 @@
+import os
+import re
+import subprocess
+from collections import deque
+import numpy as np
+from typing import Dict, Any, Optional
+
+from .audio_features import BeatIndex
+from .audio_processor import IAudioSource
+
+
+def probe_audio(file_path: str):
+    """Return (duration seconds, native sample rate) by reading ffmpeg's input banner."""
+    result = subprocess.run(
+        ['ffmpeg', '-hide_banner', '-i', file_path],
+        capture_output=True, text=True, encoding='utf-8', errors='replace',
+    )
+    duration = re.search(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)', result.stderr)
+    rate = re.search(r'Audio:.*?(\d+) Hz', result.stderr)
+    if duration is None or rate is None:
+        raise ValueError(f"Could not read audio stream info: {file_path}")
+    hours, minutes, seconds = duration.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds), int(rate.group(1))
+
+
+class OnsetBeatDetector:
+    """Incremental beat detector: spectral flux onsets with adaptive peak picking.
+
+    Samples are fed in arbitrary blocks; a flux peak becomes a beat once
+    ``POST_MAX`` frames after it have been seen, so beats lag the decoded
+    audio by ``lookahead`` seconds. Only a short flux history is kept.
+    """
+
+    N_FFT = 1024
+    HOP = 512
+    PRE_MAX = 3            # Frames a peak must dominate before it...
+    POST_MAX = 3           # ...and after it
+    AVERAGE_FRAMES = 43    # ~0.5 s at 44.1 kHz for the adaptive threshold
+    THRESHOLD_STD = 1.5    # Peak must exceed mean + this many std devs
+    MIN_INTERVAL = 0.25    # Seconds between beats (caps detection at 240 BPM)
+
+    def __init__(self, sample_rate: int, start_sample: int = 0):
+        self.sample_rate = sample_rate
+        self.window = np.hanning(self.N_FFT).astype(np.float32)
+        self.beats = deque()
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._tail_start = start_sample      # Absolute sample index of _tail[0]
+        self._frame_origin = start_sample    # Absolute sample index of frame 0
+        self._prev_spectrum = None
+        self._flux = np.zeros(0)
+        self._flux_start = 0                 # Frame index of _flux[0]
+        self._frames_seen = 0
+        self._next_candidate = 0
+        self._last_beat = -np.inf
+
+    @property
+    def lookahead(self) -> float:
+        return (self.POST_MAX + 1) * self.HOP / self.sample_rate + self.N_FFT / self.sample_rate
+
+    def _frame_time(self, frame_index: int) -> float:
+        center = self._frame_origin + frame_index * self.HOP + self.N_FFT // 2
+        return center / self.sample_rate
+
+    def process(self, samples: np.ndarray):
+        data = np.concatenate([self._tail, samples])
+        num_frames = 0 if len(data) < self.N_FFT else (len(data) - self.N_FFT) // self.HOP + 1
+        if num_frames == 0:
+            self._tail = data
+            return
+
+        offsets = np.arange(num_frames)[:, np.newaxis] * self.HOP + np.arange(self.N_FFT)
+        spectra = np.log1p(np.abs(np.fft.rfft(data[offsets] * self.window, axis=1)))
+        previous = spectra[0] if self._prev_spectrum is None else self._prev_spectrum
+        diffs = np.diff(np.vstack([previous, spectra]), axis=0)
+        flux = np.maximum(diffs, 0).mean(axis=1)
+        self._prev_spectrum = spectra[-1]
+
+        consumed = num_frames * self.HOP
+        self._tail = data[consumed:]
+        self._tail_start += consumed
+
+        self._flux = np.concatenate([self._flux, flux])
+        self._frames_seen += num_frames
+        self._pick_peaks()
+
+        # Keep just enough flux history for the next candidates' windows
+        keep_from = max(0, self._next_candidate - self.AVERAGE_FRAMES - self.PRE_MAX)
+        if keep_from > self._flux_start:
+            self._flux = self._flux[keep_from - self._flux_start:]
+            self._flux_start = keep_from
+
+    def _pick_peaks(self):
+        last_ready = self._frames_seen - 1 - self.POST_MAX
+        for frame in range(self._next_candidate, last_ready + 1):
+            i = frame - self._flux_start
+            value = self._flux[i]
+            local = self._flux[max(0, i - self.PRE_MAX):i + self.POST_MAX + 1]
+            if value <= 0 or value < local.max():
+                continue
+            history = self._flux[max(0, i - self.AVERAGE_FRAMES):i + 1]
+            if value < history.mean() + self.THRESHOLD_STD * history.std():
+                continue
+            time = self._frame_time(frame)
+            if time - self._last_beat >= self.MIN_INTERVAL:
+                self.beats.append(time)
+                self._last_beat = time
+        self._next_candidate = max(self._next_candidate, last_ready + 1)
+
+    def forget_before(self, time: float):
+        while self.beats and self.beats[0] < time:
+            self.beats.popleft()
+
+
+class StreamingAudioSource(IAudioSource):
+    """Audio source that decodes in blocks through an ffmpeg pipe.
+
+    Only a window of ``buffer_seconds`` around the render cursor is held in
+    memory, and beats are detected incrementally as audio is decoded, so
+    memory stays constant regardless of track length. Reading forward is
+    sequential; a request before the buffered window restarts the decoder
+    at that position (this is also what a forked parallel worker does).
+
+    Differences from AudioProcessor: normalization needs one extra decoding
+    pass to find the peak, bass boost uses a causal filter, beats are onset
+    peaks rather than librosa's tempo-tracked beats, and there are no
+    precomputed frame feature tables.
+    """
+
+    BLOCK_SECONDS = 1.0
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        audio_config = config['audio']
+        streaming_config = audio_config.get('streaming', {})
+        self.buffer_seconds = streaming_config.get('buffer_seconds', 30.0)
+        self.original_audio_path = None
+        self.frame_features = None
+        self.sample_rate = None
+        self.duration = None
+        self.gain = 1.0
+        self._decoder = None
+        self._decoder_pid = None
+
+    def load_audio(self, file_path: str):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Audio file not found: {file_path}")
+
+        print(f"Streaming audio: {file_path}")
+        self.original_audio_path = file_path
+        audio_config = self.config['audio']
+
+        self.duration, native_rate = probe_audio(file_path)
+        self.sample_rate = audio_config.get('sample_rate') or native_rate
+        self.total_samples = int(self.duration * self.sample_rate)
+        print(f"Duration: {self.duration:.2f} sec, Sample rate: {self.sample_rate} Hz")
+
+        self.capacity = int(self.buffer_seconds * self.sample_rate)
+        self.block_samples = int(self.BLOCK_SECONDS * self.sample_rate)
+        self.buffer = np.zeros(self.capacity + self.block_samples, dtype=np.float32)
+
+        self.bass_boost = audio_config.get('bass_boost', 1.0)
+        if self.bass_boost != 1.0:
+            from scipy import signal
+            self._bass_filter = signal.butter(3, 0.1, 'low')
+
+        if audio_config['normalize']:
+            # Peak normalization needs the global peak: one constant-memory pass
+            print("Scanning peak level...")
+            peak = self._scan_peak()
+            self.gain = 1.0 / peak if peak > 0 else 1.0
+
+        self._restart(0)
+        return self
+
+    def _open_decoder(self, start_sample: int):
+        cmd = ['ffmpeg', '-loglevel', 'error']
+        if start_sample > 0:
+            cmd += ['-ss', f"{start_sample / self.sample_rate:.6f}"]
+        cmd += [
+            '-i', self.original_audio_path,
+            '-f', 'f32le', '-ac', '1', '-ar', str(self.sample_rate), '-',
+        ]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _read_block(self, decoder) -> Optional[np.ndarray]:
+        data = decoder.stdout.read(self.block_samples * 4)
+        if not data:
+            return None
+        data = data[:len(data) - len(data) % 4]
+        return np.frombuffer(data, dtype=np.float32)
+
+    def _scan_peak(self) -> float:
+        decoder = self._open_decoder(0)
+        peak = 0.0
+        try:
+            while True:
+                block = self._read_block(decoder)
+                if block is None:
+                    break
+                peak = max(peak, float(np.max(np.abs(block))) if len(block) else 0.0)
+        finally:
+            decoder.stdout.close()
+            decoder.wait()
+        return peak
+
+    def _close_decoder(self):
+        if self._decoder is not None and self._decoder_pid == os.getpid():
+            self._decoder.kill()
+            self._decoder.wait()
+        self._decoder = None
+
+    def _restart(self, start_sample: int):
+        self._close_decoder()
+        self._decoder = self._open_decoder(start_sample)
+        self._decoder_pid = os.getpid()
+        self.buffer_start = start_sample    # Absolute sample index of buffer[0]
+        self.buffer_fill = 0
+        self.eof = False
+        self._filter_state = None
+        self.beat_detector = OnsetBeatDetector(self.sample_rate, start_sample)
+
+    def _process_block(self, block: np.ndarray) -> np.ndarray:
+        block = block * np.float32(self.gain)
+        if self.bass_boost != 1.0:
+            from scipy import signal
+            b, a = self._bass_filter
+            if self._filter_state is None:
+                self._filter_state = signal.lfilter_zi(b, a) * block[0]
+            bass, self._filter_state = signal.lfilter(b, a, block, zi=self._filter_state)
+            block = (block * (1 - 0.3) + bass * 0.3 * self.bass_boost).astype(np.float32)
+        return block
+
+    def _fill_until(self, end_sample: int):
+        """Decode forward until the buffer reaches ``end_sample`` or the track ends."""
+        while not self.eof and self.buffer_start + self.buffer_fill < end_sample:
+            block = self._read_block(self._decoder)
+            if block is None:
+                self.eof = True
+                self.beat_detector.process(np.zeros(self.beat_detector.N_FFT, dtype=np.float32))
+                break
+            block = self._process_block(block)
+
+            overflow = self.buffer_fill + len(block) - len(self.buffer)
+            if overflow > 0:
+                # Drop the oldest samples; the buffer always stays contiguous
+                keep = self.buffer_fill - overflow
+                self.buffer[:keep] = self.buffer[overflow:self.buffer_fill]
+                self.buffer_start += overflow
+                self.buffer_fill = keep
+            self.buffer[self.buffer_fill:self.buffer_fill + len(block)] = block
+            self.buffer_fill += len(block)
+
+            self.beat_detector.process(block)
+            self.beat_detector.forget_before(self.buffer_start / self.sample_rate - 1.0)
+
+    def _ensure(self, start_sample: int, end_sample: int):
+        if self._decoder_pid != os.getpid() or start_sample < self.buffer_start:
+            # Seeking backwards (or a forked worker): restart with some history
+            history = min(self.capacity // 4, self.sample_rate)
+            self._restart(max(0, start_sample - history))
+        elif start_sample > self.buffer_start + self.buffer_fill + self.capacity:
+            # Far jump ahead: seeking is cheaper than decoding the gap
+            self._restart(start_sample)
+        self._fill_until(end_sample)
+
+    def get_audio_segment(self, time_point: float, window_duration: float = 1.0) -> Optional[np.ndarray]:
+        if self.sample_rate is None:
+            return None
+
+        start_sample = int(max(0, (time_point - window_duration / 2) * self.sample_rate))
+        end_sample = int(min(self.total_samples, (time_point + window_duration / 2) * self.sample_rate))
+        if start_sample >= end_sample:
+            return None
+
+        self._ensure(start_sample, end_sample)
+        end_sample = min(end_sample, self.buffer_start + self.buffer_fill)
+        if start_sample >= end_sample:
+            return None
+        return self.buffer[start_sample - self.buffer_start:end_sample - self.buffer_start]
+
+    def _beats_around(self, time: float, threshold: float = 0.0) -> BeatIndex:
+        """Index of the detected beats kept around the cursor, final up to ``time + threshold``."""
+        sample = int(max(0, time - threshold) * self.sample_rate)
+        lookahead = threshold + self.beat_detector.lookahead
+        self._ensure(sample, int((time + lookahead) * self.sample_rate) + 1)
+        return BeatIndex(np.fromiter(self.beat_detector.beats, dtype=np.float64))
+
+    def is_beat_at_time(self, time: float, threshold: float = 0.1) -> bool:
+        if self.sample_rate is None:
+            return False
+        return self._beats_around(time, threshold).is_beat(time, threshold)
+
+    def time_since_beat(self, time: float) -> float:
+        # Only beats within the buffered window are kept, so this saturates
+        # at roughly buffer_seconds
+        return float(self._beats_around(time).time_since_beat(time))
+
+    def beat_phase(self, time: float) -> float:
+        # The next beat may lie beyond the lookahead; then the phase is unknown
+        return float(self._beats_around(time, 2.0).beat_phase(time))
+
+    @property
+    def tempo(self) -> float:
+        beats = np.asarray(self.beat_detector.beats)
+        if len(beats) < 2:
+            return 120.0
+        return float(60.0 / np.median(np.diff(beats)))
+
+    @property
+    def duration(self) -> float:
+        return self._duration if hasattr(self, '_duration') else 0.0
+
+    @duration.setter
+    def duration(self, value: float):
+        self._duration = value
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate if hasattr(self, '_sample_rate') else 0
+
+    @sample_rate.setter
+    def sample_rate(self, value: int):
+        self._sample_rate = value
+
+    def close(self):
+        self._close_decoder()
+
+    def __getstate__(self):
+        # The decoder pipe can't be pickled; the receiving process restarts it
+        state = self.__dict__.copy()
+        state['_decoder'] = None
+        state['_decoder_pid'] = None
+        return state
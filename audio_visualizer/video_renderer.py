@@ -1,20 +1,120 @@
 import cv2
 import numpy as np
 from tqdm import tqdm
-from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import io
+import math
+import multiprocessing
+import shutil
 import tempfile
 import os
 import subprocess
+from time import perf_counter
+
+from .encoder import FFmpegEncoder
+from .profiler import FrameProfiler
+
+
+# Per-process state for parallel render workers, set by _init_render_worker
+_worker_state = {}
+
+
+def _part_path(output_path: str) -> str:
+    # Written first and moved into place once complete; keeps the extension
+    # so ffmpeg still picks the container from it
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.part{ext}"
+
+
+def _remove(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _init_render_worker(config, audio_processor, visualizer_class):
+    # One render per core; keep OpenCV from spawning its own thread pool
+    cv2.setNumThreads(1)
+    _worker_state['config'] = config
+    _worker_state['audio'] = audio_processor
+    _worker_state['visualizer_class'] = visualizer_class
+
+
+def _render_chunk(chunk_index: int, start_frame: int, end_frame: int,
+                  preroll_frames: int, segment_path: str):
+    """Render frames [start_frame, end_frame) of the timeline into one segment file."""
+    config = _worker_state['config']
+    renderer = VideoRenderer(config)
+    frame_duration = 1.0 / renderer.fps
+    
+    # Distinct random streams per chunk (forked workers share the parent's state)
+    np.random.seed(chunk_index)
+    with contextlib.redirect_stdout(io.StringIO()):
+        visualizer = _worker_state['visualizer_class'](config, _worker_state['audio'])
+    
+    # Warm up stateful layers (smoothing buffers, particle systems) before the chunk
+    for frame_idx in range(max(0, start_frame - preroll_frames), start_frame):
+        visualizer.render_frame(frame_idx * frame_duration)
+    
+    encoder = renderer.create_encoder(segment_path)
+    profiler = FrameProfiler.from_config(config)
+    renderer._attach_profiler(profiler, visualizer, encoder)
+    with encoder:
+        for frame_idx in range(start_frame, end_frame):
+            frame_start = perf_counter()
+            encoder.write(visualizer.render_frame(frame_idx * frame_duration))
+            if profiler is not None:
+                profiler.record_frame(frame_start)
+    
+    return chunk_index, end_frame - start_frame, profiler
 
 
 class VideoRenderer:
     def __init__(self, config: dict):
+        self.config = config
         video_config = config['video']
         self.width = video_config['width']
         self.height = video_config['height']
         self.fps = video_config['fps']
+        
+        # Parallel rendering: 1 = sequential, 0 = one worker per CPU core
+        workers = video_config.get('workers', 1)
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.chunk_seconds = video_config.get('chunk_seconds', 10.0)
+        self.preroll_seconds = video_config.get('preroll_seconds', 2.0)
+    
+    def create_encoder(self, output_path: str, audio_path: str = None) -> FFmpegEncoder:
+        return FFmpegEncoder(
+            output_path,
+            self.width,
+            self.height,
+            self.fps,
+            audio_path=audio_path,
+            preset='medium',
+            crf=18,
+        )
+    
+    @staticmethod
+    def _attach_profiler(profiler, visualizer, encoder):
+        if profiler is None:
+            return
+        if hasattr(visualizer, 'set_profiler'):
+            visualizer.set_profiler(profiler)
+        encoder.profiler = profiler
+    
+    def _audio_input(self, audio_processor):
+        audio_file = audio_processor.original_audio_path
+        if audio_file and os.path.exists(audio_file):
+            return audio_file
+        print(f"Audio file not found: {audio_file}")
+        return None
     
     def render(self, audio_processor, visualizer, output_path: str):
+        if self.workers > 1:
+            return self.render_parallel(audio_processor, visualizer, output_path)
+        
         print(f"Rendering video {self.width}x{self.height}@{self.fps}fps")
         
         if hasattr(visualizer, 'get_layer_info'):
@@ -26,70 +126,144 @@ class VideoRenderer:
         total_frames = int(audio_processor.duration * self.fps)
         frame_duration = 1.0 / self.fps
         
-        temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-        temp_video_path = temp_video.name
-        temp_video.close()
+        # Frames and audio go to a single ffmpeg process: no intermediate file,
+        # no second pass; the output only replaces output_path once it is complete
+        audio_path = self._audio_input(audio_processor)
+        part_path = _part_path(output_path)
+        encoder = self.create_encoder(part_path, audio_path).open()
+        profiler = FrameProfiler.from_config(self.config)
+        self._attach_profiler(profiler, visualizer, encoder)
         
         try:
-            writer = FFMPEG_VideoWriter(
-                temp_video_path,
-                (self.width, self.height),
-                self.fps,
-                codec='libx264',
-                audiofile=None,
-                preset='medium',
-                ffmpeg_params=['-crf', '18', '-an']
-            )
-            
             print("Rendering frames...")
             progress_bar = tqdm(total=total_frames, desc="Progress", unit="frame")
             
             for frame_idx in range(total_frames):
+                frame_start = perf_counter()
                 time = frame_idx * frame_duration
                 frame = visualizer.render_frame(time)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                writer.write_frame(frame_rgb)
+                encoder.write(frame)
+                if profiler is not None:
+                    profiler.record_frame(frame_start)
                 progress_bar.update(1)
             
             progress_bar.close()
-            writer.close()
-            print("Adding audio...")
+            encoder.close()
+            os.replace(part_path, output_path)
             
-            success = self._add_audio(temp_video_path, audio_processor, output_path)
-            if success:
+            if audio_path:
                 print(f"Video ready: {output_path}")
             else:
                 print(f"Video created without audio: {output_path}")
+            if profiler is not None:
+                profiler.write_reports(output_path, self.config)
             
         except KeyboardInterrupt:
             print("Rendering interrupted")
-            if os.path.exists(temp_video_path):
-                import shutil
-                shutil.copy2(temp_video_path, output_path.replace('.mp4', '_partial.mp4'))
-                print(f"Partial result: {output_path.replace('.mp4', '_partial.mp4')}")
+            try:
+                encoder.close()
+            except RuntimeError:
+                pass  # ffmpeg got the same interrupt and finalizes on its own
+            if os.path.exists(part_path):
+                partial_path = output_path.replace('.mp4', '_partial.mp4')
+                os.replace(part_path, partial_path)
+                print(f"Partial result: {partial_path}")
+            raise
+        except BaseException:
+            encoder.abort()
+            _remove(part_path)
+            raise
+    
+    def render_parallel(self, audio_processor, visualizer, output_path: str):
+        """Render timeline chunks in a process pool and concatenate the segments.
+        
+        Each worker builds its own visualizer and pre-rolls its stateful layers
+        up to the chunk start; segments are joined in order by ffmpeg's concat
+        demuxer in the same pass that muxes the audio.
+        """
+        total_frames = int(audio_processor.duration * self.fps)
+        chunk_frames = max(1, int(self.chunk_seconds * self.fps))
+        preroll_frames = int(self.preroll_seconds * self.fps)
+        num_chunks = max(1, math.ceil(total_frames / chunk_frames))
+        workers = min(self.workers, num_chunks)
+        
+        print(f"Rendering video {self.width}x{self.height}@{self.fps}fps "
+              f"with {workers} workers ({num_chunks} chunks)")
+        
+        # Fill lazily computed feature tables once so workers inherit them; with
+        # fork they are shared copy-on-write, elsewhere they are pickled along
+        visualizer.render_frame(0.0)
+        mp_context = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        
+        profiler = FrameProfiler.from_config(self.config)
+        temp_dir = tempfile.mkdtemp(prefix='audio_visualizer_')
+        segment_paths = [os.path.join(temp_dir, f"chunk_{i:05d}.mp4") for i in range(num_chunks)]
+        
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp_context,
+                initializer=_init_render_worker,
+                initargs=(self.config, audio_processor, type(visualizer)),
+            ) as executor:
+                futures = []
+                for i in range(num_chunks):
+                    start_frame = i * chunk_frames
+                    end_frame = min(total_frames, start_frame + chunk_frames)
+                    futures.append(executor.submit(
+                        _render_chunk, i, start_frame, end_frame, preroll_frames, segment_paths[i]
+                    ))
+                
+                # Started after the workers are forked, so they inherit no monitor thread
+                progress_bar = tqdm(total=total_frames, desc="Progress", unit="frame")
+                try:
+                    for future in as_completed(futures):
+                        _, frames_done, chunk_profile = future.result()
+                        progress_bar.update(frames_done)
+                        if profiler is not None:
+                            profiler.merge(chunk_profile)
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+            progress_bar.close()
+            
+            print("Joining chunks and adding audio...")
+            part_path = _part_path(output_path)
+            try:
+                success = self._concat_segments(segment_paths, audio_processor, part_path)
+                if success:
+                    os.replace(part_path, output_path)
+            finally:
+                _remove(part_path)
+            if success:
+                print(f"Video ready: {output_path}")
+                if profiler is not None:
+                    profiler.write_reports(output_path, self.config)
+            else:
+                raise RuntimeError(f"Failed to join rendered chunks into {output_path}")
+        
+        except KeyboardInterrupt:
+            print("Rendering interrupted")
             raise
         finally:
-            if os.path.exists(temp_video_path):
-                os.unlink(temp_video_path)
+            shutil.rmtree(temp_dir, ignore_errors=True)
     
-    def _add_audio(self, video_path: str, audio_processor, output_path: str):
-        audio_file = audio_processor.original_audio_path
+    def _concat_segments(self, segment_paths, audio_processor, output_path: str):
+        list_path = os.path.join(os.path.dirname(segment_paths[0]), 'segments.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in segment_paths:
+                f.write(f"file '{path}'\n")
         
-        if not os.path.exists(audio_file):
-            print(f"Audio file not found: {audio_file}")
-            return False
+        cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_path]
         
-        cmd = [
-            'ffmpeg',
-            '-i', video_path,
-            '-i', audio_file,
-            '-c:v', 'copy',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            '-shortest',
-            '-y',
-            output_path
-        ]
+        audio_file = self._audio_input(audio_processor)
+        if audio_file:
+            cmd += ['-i', audio_file, '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', '-shortest']
+        else:
+            cmd += ['-c:v', 'copy']
+        cmd += ['-y', output_path]
         
         result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
         
@@ -97,4 +271,4 @@ class VideoRenderer:
             return True
         else:
             print(f"FFmpeg error: {result.stderr[:200]}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Importable both as a script and with python -m benchmarks.run_benchmarks
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audio_visualizer.config_loader import ConfigLoader
+from audio_visualizer.audio_processor import AudioProcessor
+from audio_visualizer.pipeline.base_layer import BaseLayer
+from audio_visualizer.pipeline.layer_registry import LayerRegistry
+from audio_visualizer.pipeline.pipeline_renderer import PipelineRenderer
+from audio_visualizer.video_renderer import VideoRenderer
+
+from synthetic_audio import write_wav
+
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+# No 'overwrite': _apply_blend hands the layer back untouched, there is nothing to time
+BLEND_MODES = ('normal', 'add', 'multiply', 'screen')
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+# Slowdowns smaller than this are timer noise, whatever their relative size
+MIN_DELTA_MS = 0.05
+
+
+class _BlendProbe(BaseLayer):
+    """Layer that draws nothing, to time BaseLayer._apply_blend on its own."""
+    layer_type = 'blend_probe'
+
+    def _render_direct(self, time, canvas):
+        return canvas
+
+
+class _NullSinkRenderer(VideoRenderer):
+    """VideoRenderer whose encoder runs as configured but discards the output."""
+
+    def create_encoder(self, output_path, audio_path=None):
+        encoder = super().create_encoder(output_path, None)
+        encoder.output_path = '-'
+        encoder.output_args = ['-f', 'null']
+        return encoder
+
+
+def _stats(samples) -> dict:
+    times = np.array(samples) * 1000
+    return {
+        'runs': len(times),
+        'mean_ms': float(times.mean()),
+        'p50_ms': float(np.percentile(times, 50)),
+        'p95_ms': float(np.percentile(times, 95)),
+    }
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_analysis(config, audio_path, repeats, name_filter):
+    results = {}
+    if name_filter and name_filter not in 'analysis/load_audio analysis/spectrogram':
+        return results
+    loads, spectrograms = [], []
+    for _ in range(repeats):
+        audio = AudioProcessor(config)
+        start = time.perf_counter()
+        with _quiet():
+            audio.load_audio(audio_path)
+        loads.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        audio.get_spectrogram()
+        spectrograms.append(time.perf_counter() - start)
+    results['analysis/load_audio'] = _stats(loads)
+    results['analysis/spectrogram'] = _stats(spectrograms)
+    for key, stats in results.items():
+        print(f"  {key}: {stats['p50_ms']:.2f} ms")
+    return results
+
+
+def bench_layers(config, audio, resolutions, warmup, frames, name_filter):
+    results = {}
+    fps = config['video']['fps']
+    for layer_name in LayerRegistry().get_available_layers():
+        for res_name in resolutions:
+            key = f"layer/{layer_name}/{res_name}"
+            if name_filter and name_filter not in key:
+                continue
+            layer_config = copy.deepcopy(config)
+            layer_config['video']['width'], layer_config['video']['height'] = RESOLUTIONS[res_name]
+            layer_config['pipeline']['order'] = [layer_name]
+            np.random.seed(0)
+            with _quiet():
+                renderer = PipelineRenderer(layer_config, audio)
+
+            for i in range(warmup):
+                renderer.render_frame(i / fps)
+            samples = []
+            for i in range(warmup, warmup + frames):
+                start = time.perf_counter()
+                renderer.render_frame(i / fps)
+                samples.append(time.perf_counter() - start)
+            results[key] = _stats(samples)
+            print(f"  {key}: {results[key]['p50_ms']:.2f} ms")
+    return results
+
+
+def bench_blend_modes(resolutions, frames, name_filter):
+    results = {}
+    rng = np.random.default_rng(0)
+    for res_name in resolutions:
+        width, height = RESOLUTIONS[res_name]
+        source = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        # A sparse foreground, like most layer canvases
+        foreground = np.where(rng.random((height, width, 1)) < 0.2,
+                              rng.integers(0, 256, (height, width, 3), dtype=np.uint8), 0
+                              ).astype(np.uint8)
+        background = np.empty_like(source)
+        for mode in BLEND_MODES:
+            key = f"blend/{mode}/{res_name}"
+            if name_filter and name_filter not in key:
+                continue
+            layer_config = {'pipeline': {'blend_probe': {'blend_mode': mode, 'opacity': 0.7}}}
+            probe = _BlendProbe(layer_config, None, width, height)
+            samples = []
+            for _ in range(frames):
+                # The blend writes into the background; restore it untimed
+                np.copyto(background, source)
+                start = time.perf_counter()
+                probe._apply_blend(background, foreground)
+                samples.append(time.perf_counter() - start)
+            results[key] = _stats(samples)
+            print(f"  {key}: {results[key]['p50_ms']:.2f} ms")
+    return results
+
+
+def bench_end_to_end(config, audio, resolutions, repeats, name_filter):
+    results = {}
+    for res_name in resolutions:
+        key = f"render/{res_name}"
+        if name_filter and name_filter not in key:
+            continue
+        render_config = copy.deepcopy(config)
+        render_config['video']['width'], render_config['video']['height'] = RESOLUTIONS[res_name]
+        samples = []
+        for _ in range(repeats):
+            np.random.seed(0)
+            with _quiet():
+                visualizer = PipelineRenderer(render_config, audio)
+            renderer = _NullSinkRenderer(render_config)
+            start = time.perf_counter()
+            with _quiet(), contextlib.redirect_stderr(io.StringIO()):
+                renderer.render(audio, visualizer, os.devnull)
+            samples.append(time.perf_counter() - start)
+        results[key] = _stats(samples)
+        frames = int(audio.duration * render_config['video']['fps'])
+        results[key]['fps'] = frames / results[key]['p50_ms'] * 1000
+        print(f"  {key}: {results[key]['p50_ms'] / 1000:.2f} s ({results[key]['fps']:.1f} fps)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print each benchmark against the baseline; return the keys that regressed."""
+    regressions = []
+    print(f"\nComparison with baseline (p50, regression above +{threshold * 100:.0f}%)")
+    for key, stats in results.items():
+        if key not in baseline:
+            print(f"  {key}: new")
+            continue
+        before = baseline[key]['p50_ms']
+        change = stats['p50_ms'] / before - 1 if before > 0 else 0.0
+        marker = ''
+        if change > threshold and stats['p50_ms'] - before > MIN_DELTA_MS:
+            marker = '  REGRESSION'
+            regressions.append(key)
+        print(f"  {key}: {before:.2f} -> {stats['p50_ms']:.2f} ms ({change * 100:+.1f}%){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audio Visualizer benchmarks')
+    parser.add_argument('--resolutions', default='720p,1080p,4k',
+                        help=f"Comma-separated subset of {', '.join(RESOLUTIONS)}")
+    parser.add_argument('--suites', default='analysis,layers,blend,render',
+                        help='Comma-separated subset of analysis, layers, blend, render')
+    parser.add_argument('--filter', default=None,
+                        help='Only run benchmarks whose key contains this string')
+    parser.add_argument('--seconds', type=float, default=10.0,
+                        help='Length of the synthetic audio track')
+    parser.add_argument('--frames', type=int, default=30, help='Timed frames per layer benchmark')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed frames before each layer benchmark')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Runs of the analysis and end-to-end benchmarks')
+    parser.add_argument('-o', '--output', default=None, help='Write results as JSON to this path')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                        help='Baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Relative p50 slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    resolutions = [r.strip() for r in args.resolutions.split(',') if r.strip()]
+    unknown = [r for r in resolutions if r not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"Unknown resolution(s): {', '.join(unknown)}")
+    suites = {s.strip() for s in args.suites.split(',')}
+
+    config = ConfigLoader().config
+    config['audio']['cache'] = {'enabled': False}
+    config['video']['workers'] = 1
+    config['debug'] = False
+    config['profiling'] = {'enabled': False}
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='av_bench_') as temp_dir:
+        audio_path = write_wav(os.path.join(temp_dir, 'mix.wav'), 'mix', args.seconds)
+
+        if 'analysis' in suites:
+            print("Audio analysis")
+            results.update(bench_analysis(config, audio_path, args.repeats, args.filter))
+
+        audio = AudioProcessor(config)
+        with _quiet():
+            audio.load_audio(audio_path)
+
+        if 'layers' in suites:
+            print("Layers")
+            results.update(bench_layers(config, audio, resolutions, args.warmup,
+                                        args.frames, args.filter))
+        if 'blend' in suites:
+            print("Blend modes")
+            results.update(bench_blend_modes(resolutions, args.frames, args.filter))
+        if 'render' in suites:
+            print("End-to-end renders (null sink)")
+            results.update(bench_end_to_end(config, audio, resolutions, args.repeats, args.filter))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'cpu_count': os.cpu_count(),
+            'seconds': args.seconds,
+            'frames': args.frames,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import wave
+import numpy as np
+
+
+SAMPLE_RATE = 44100
+
+
+def sine_sweep(seconds: float, sample_rate: int = SAMPLE_RATE,
+               start_hz: float = 40.0, end_hz: float = 8000.0) -> np.ndarray:
+    """Exponential sine sweep: every frequency band gets energy at some point."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    k = np.log(end_hz / start_hz) / seconds
+    phase = 2 * np.pi * start_hz * (np.exp(k * t) - 1) / k
+    return 0.5 * np.sin(phase)
+
+
+def noise(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    return 0.3 * np.random.default_rng(seed).standard_normal(int(seconds * sample_rate))
+
+
+def click_track(seconds: float, sample_rate: int = SAMPLE_RATE, bpm: float = 120.0) -> np.ndarray:
+    """Decaying low thumps on every beat, for the beat tracker and beat-driven layers."""
+    signal = np.zeros(int(seconds * sample_rate))
+    click_len = int(0.05 * sample_rate)
+    t = np.arange(click_len) / sample_rate
+    click = np.sin(2 * np.pi * 80 * t) * np.exp(-t * 60)
+    for start in (np.arange(0, seconds, 60.0 / bpm) * sample_rate).astype(int):
+        end = min(len(signal), start + click_len)
+        signal[start:end] += click[:end - start]
+    return 0.9 * signal
+
+
+def mix(seconds: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Sweep + noise + clicks: broadband, with beats, like a dense music track."""
+    signal = sine_sweep(seconds, sample_rate) + noise(seconds, sample_rate) * 0.3 \
+        + click_track(seconds, sample_rate)
+    return signal / np.max(np.abs(signal)) * 0.9
+
+
+GENERATORS = {
+    'sweep': sine_sweep,
+    'noise': noise,
+    'clicks': click_track,
+    'mix': mix,
+}
+
+
+def write_wav(path: str, kind: str = 'mix', seconds: float = 10.0,
+              sample_rate: int = SAMPLE_RATE) -> str:
+    """Write a mono 16-bit WAV of the ``kind`` signal and return its path."""
+    signal = GENERATORS[kind](seconds, sample_rate=sample_rate)
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
@@ -1,32 +1,57 @@
 import os
 import sys
+import copy
 import uuid
 import json
+import queue
+import shutil
+import multiprocessing
 import time as _time
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+import librosa
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
-import threading
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from audio_visualizer.config_loader import ConfigLoader
 from audio_visualizer.audio_processor import AudioProcessor
+from audio_visualizer.analysis_cache import AnalysisCache
 from audio_visualizer.visualizer_factory import VisualizerFactory
-# from audio_visualizer.video_renderer import VideoRenderer
+from audio_visualizer.encoder import FFmpegEncoder
+from audio_visualizer.profiler import FrameProfiler
+from audio_visualizer.still import IMAGE_FORMATS, encode_image
 from audio_visualizer.pipeline.layer_registry import LayerRegistry
+from web.scheduler import JobScheduler, QueueFullError, PRIORITY_PREVIEW, PRIORITY_RENDER
+from web.job_store import JobStore, FINISHED_STATUSES
+from web.progress import ProgressHub
+from web.frame_cache import FrameCache
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
 app.config['UPLOAD_FOLDER'] = Path(__file__).parent / 'uploads'
 app.config['OUTPUT_FOLDER'] = Path(__file__).parent / 'outputs'
 app.config['SAMPLES_FOLDER'] = Path(__file__).parent / 'samples'
+app.config['CACHE_FOLDER'] = Path(__file__).parent / 'cache'
 
 app.config['UPLOAD_FOLDER'].mkdir(exist_ok=True)
 app.config['OUTPUT_FOLDER'].mkdir(exist_ok=True)
 app.config['SAMPLES_FOLDER'].mkdir(exist_ok=True)
 
-jobs = {}
+server_config = ConfigLoader().config
+
+# Spawned render workers import this module again to run process_video; they
+# build none of the server state below. Their name is set before that import,
+# unlike parent_process()
+IS_WORKER = multiprocessing.current_process().name != 'MainProcess'
+
+# Job state and uploaded audio, kept across restarts
+store = None
+if not IS_WORKER:
+    store = JobStore.from_config(server_config, str(Path(__file__).parent / 'jobs.db'))
+    store.interrupt_unfinished()
+    store.start_sweeper(server_config.get('web', {}).get('sweep_interval', 600),
+                        folders=(app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']))
 
 
 class CancelledError(Exception):
@@ -275,33 +300,52 @@ def parse_color(hex_color):
     return [int(hex_color[i:i+2], 16) for i in (0, 2, 4)]
 
 
+# Pushes job updates to /events subscribers
+progress_hub = ProgressHub()
+
+
 def _update_job(job_id, **kwargs):
-    """Update job fields and refresh last_update timestamp."""
-    job = jobs[job_id]
-    for k, v in kwargs.items():
-        job[k] = v
-    job['last_update'] = _time.time()
+    """Update job fields and refresh last_update timestamp; notify /events subscribers."""
+    if kwargs.get('status') == 'completed':
+        # Counted against the web.max_disk_mb quota
+        output_path = store.get_job(job_id)['output_path']
+        if output_path and os.path.exists(output_path):
+            kwargs['output_bytes'] = os.path.getsize(output_path)
+    store.update_job(job_id, **kwargs)
+    progress_hub.publish(job_id, **kwargs)
+
+
+# Renders run in worker processes; they report back through _update_job
+scheduler = None if IS_WORKER else JobScheduler.from_config(server_config, _update_job)
 
+# Seconds between progress reports from a rendering worker
+PROGRESS_INTERVAL = 0.25
 
-def process_video(job_id, audio_path, output_path, config, visualizer_type='pipeline'):
+
+def process_video(job, audio_path, output_path, config, visualizer_type='pipeline',
+                  window=None, draft=False):
+    """Render one job; runs in a scheduler worker process with ``job`` as its JobContext.
+
+    ``window`` is an optional (start, end) in seconds of the track to render.
+    """
     try:
-        _update_job(job_id, status='processing', progress=5, message='Loading audio...')
+        job.update(status='processing', stage='loading', progress=5, message='Loading audio...')
 
         audio_proc = AudioProcessor(config)
         audio_proc.load_audio(str(audio_path))
 
-        _update_job(job_id, progress=15, message='Creating visualization...')
+        job.update(stage='preparing', progress=15, message='Creating visualization...')
 
         visualizer = VisualizerFactory.create(visualizer_type, config, audio_proc)
 
-        _update_job(job_id, progress=20, message='Rendering video...')
+        job.update(stage='rendering', progress=20, message='Rendering video...')
 
-        render_with_progress(job_id, config, audio_proc, visualizer, str(output_path))
+        render_with_progress(job, config, audio_proc, visualizer, str(output_path), window, draft)
 
-        _update_job(job_id, status='completed', progress=100, message='Done!')
+        job.update(status='completed', stage='completed', progress=100, message='Done!')
 
     except CancelledError:
-        _update_job(job_id, status='cancelled', message='Cancelled by user')
+        job.update(status='cancelled', stage='cancelled', message='Cancelled by user')
         # Clean up partial output
         if os.path.exists(str(output_path)):
             os.unlink(str(output_path))
@@ -313,66 +357,88 @@ def process_video(job_id, audio_path, output_path, config, visualizer_type='pipe
             err_msg = 'Failed to load audio file. The file may be corrupted or not a valid audio format.'
         elif 'Format not recognised' in err_msg or 'LibsndfileError' in type(e).__name__:
             err_msg = 'Unsupported audio format. Please use MP3, WAV, OGG, or FLAC.'
-        _update_job(job_id, status='error', message=err_msg)
+        job.update(status='error', stage='error', message=err_msg)
         import traceback
         traceback.print_exc()
 
 
-def render_with_progress(job_id, config, audio_proc, visualizer, output_path):
-    import cv2
-    import tempfile
-    import subprocess
-
+def render_with_progress(job, config, audio_proc, visualizer, output_path, window=None, draft=False):
     video_config = config['video']
     width = video_config['width']
     height = video_config['height']
     fps = video_config['fps']
 
-    total_frames = int(audio_proc.duration * fps)
     frame_duration = 1.0 / fps
-
-    temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-    temp_path = temp_video.name
-    temp_video.close()
-
+    start_time, end_time = window if window else (0.0, audio_proc.duration)
+    start_frame = int(round(start_time * fps))
+    total_frames = max(0, int(min(end_time, audio_proc.duration) * fps) - start_frame)
+
+    # Drafts trade encoding efficiency for speed
+    preset, crf = 'fast', 23
+    if draft:
+        draft_config = config.get('web', {}).get('draft', {})
+        preset, crf = draft_config.get('preset', 'ultrafast'), draft_config.get('crf', 28)
+
+    # Frames and audio are encoded by one ffmpeg process in a single pass;
+    # a fragmented MP4 can be watched (/preview) while it is written
+    web_config = config.get('web', {})
+    progressive = web_config.get('progressive', True)
+    encoder = FFmpegEncoder(
+        output_path, width, height, fps,
+        audio_path=audio_proc.original_audio_path,
+        preset=preset, crf=crf,
+        audio_offset=start_frame * frame_duration,
+        fragment_seconds=web_config.get('fragment_seconds', 2) if progressive else None,
+    ).open()
+    profiler = FrameProfiler.from_config(config)
+    if profiler is not None:
+        visualizer.set_profiler(profiler)
+        encoder.profiler = profiler
+
+    render_start = last_report = _time.perf_counter()
+    last_frames = 0
     try:
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        writer = cv2.VideoWriter(temp_path, fourcc, fps, (width, height))
+        # Warm up stateful layers (smoothing, particles) when starting mid-track
+        preroll_frames = int(video_config.get('preroll_seconds', 2.0) * fps)
+        for i in range(max(0, start_frame - preroll_frames), start_frame):
+            visualizer.render_frame(i * frame_duration)
 
-        cancelled = False
         for i in range(total_frames):
             # Check cancel flag each frame
-            if jobs[job_id].get('cancel'):
-                cancelled = True
-                break
+            if job.cancelled():
+                raise CancelledError()
 
-            time_point = i * frame_duration
+            frame_start = _time.perf_counter()
+            time_point = (start_frame + i) * frame_duration
             frame = visualizer.render_frame(time_point)
-            writer.write(frame)
-
-            progress = 20 + int((i / total_frames) * 70)
-            _update_job(job_id, progress=progress, message=f'Frame {i+1}/{total_frames}')
-
-        writer.release()
-
-        if cancelled:
-            raise CancelledError()
-
-        _update_job(job_id, progress=95, message='Adding audio...')
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', temp_path,
-            '-i', audio_proc.original_audio_path,
-            '-c:v', 'libx264', '-preset', 'fast',
-            '-c:a', 'aac', '-b:a', '192k',
-            '-shortest', output_path
-        ]
-        subprocess.run(cmd, capture_output=True)
-
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+            encoder.write(frame)
+            if profiler is not None:
+                profiler.record_frame(frame_start)
+
+            # Reports cross a process boundary; send a few per second, not one per frame
+            now = _time.perf_counter()
+            frames_done = i + 1
+            if now - last_report >= PROGRESS_INTERVAL or frames_done == total_frames:
+                render_fps = (frames_done - last_frames) / max(now - last_report, 1e-6)
+                average_fps = frames_done / max(now - render_start, 1e-6)
+                last_report, last_frames = now, frames_done
+                job.update(
+                    progress=20 + int((frames_done / total_frames) * 75),
+                    message=f'Frame {frames_done}/{total_frames}',
+                    frames_done=frames_done,
+                    total_frames=total_frames,
+                    fps=round(render_fps, 1),
+                    eta=round((total_frames - frames_done) / average_fps, 1),
+                )
+
+        job.update(stage='finalizing', progress=95, message='Finalizing video...')
+        encoder.close()
+        if profiler is not None:
+            profiler.write_reports(output_path, config)
+
+    except BaseException:
+        encoder.abort()
+        raise
 
 
 @app.route('/')
@@ -410,37 +476,132 @@ def serve_sample(filename):
     return send_file(str(sample_path), as_attachment=False)
 
 
+def _queue_full_response():
+    response = jsonify({'error': 'The render queue is full. Please try again in a minute.'})
+    response.headers['Retry-After'] = '30'
+    return response, 503
+
+
+def _store_audio(src_path, filename, move=False):
+    """Add an audio file to the uploads, stored once per content; returns (hash, stored path)."""
+    audio_hash = AnalysisCache.file_digest(str(src_path))
+    stored_path = store.get_audio_path(audio_hash)
+    if stored_path:
+        if move:
+            os.unlink(src_path)
+        return audio_hash, stored_path
+
+    ext = os.path.splitext(filename)[1].lower()
+    stored_path = str(app.config['UPLOAD_FOLDER'] / f"{audio_hash}{ext}")
+    if move:
+        os.replace(src_path, stored_path)
+    else:
+        shutil.copyfile(str(src_path), stored_path)
+    store.add_audio(audio_hash, stored_path)
+    return audio_hash, stored_path
+
+
+def _apply_pipeline_data(config, pipeline_data):
+    """Apply the editor's pipeline_config (video, colors, order, layer_params) to ``config``."""
+    # Set video params
+    video = pipeline_data.get('video', {})
+    if video.get('width'):
+        config['video']['width'] = int(video['width'])
+    if video.get('height'):
+        config['video']['height'] = int(video['height'])
+    if video.get('fps'):
+        config['video']['fps'] = int(video['fps'])
+
+    # Set colors
+    colors = pipeline_data.get('colors', {})
+    if colors.get('primary'):
+        config['visualization']['colors']['primary'] = parse_color(colors['primary'])
+    if colors.get('secondary'):
+        config['visualization']['colors']['secondary'] = parse_color(colors['secondary'])
+
+    # Set pipeline order
+    layer_order = pipeline_data.get('order', [])
+    if layer_order:
+        config['pipeline']['order'] = layer_order
+
+    # Set per-layer params
+    layer_params = pipeline_data.get('layer_params', {})
+    for layer_name, params in layer_params.items():
+        if layer_name not in config['pipeline']:
+            config['pipeline'][layer_name] = {}
+        for key, value in params.items():
+            config['pipeline'][layer_name][key] = value
+
+
+def _scale_video(config, scale):
+    """Shrink the video to ``scale`` of its size, with layer pixel sizes scaled to match."""
+    video = config['video']
+    # yuv420p needs even dimensions
+    width = max(2, int(round(video['width'] * scale / 2)) * 2)
+    height = max(2, int(round(video['height'] * scale / 2)) * 2)
+    video['pixel_scale'] = video.get('pixel_scale', 1.0) * width / video['width']
+    video['width'], video['height'] = width, height
+
+
+def _apply_draft(config, draft, trim_info, duration):
+    """Turn ``config`` into a draft render; returns its (start, end) window in seconds.
+
+    Drafts render at ``scale`` of the resolution, with layer pixel sizes
+    scaled to match (video.pixel_scale), at most ``fps`` frames per second
+    and at most ``max_seconds`` of the track. The window is the draft's own
+    start/end, else the trim selection, else the start of the track.
+    Raises ValueError for settings or a window that leave nothing to render.
+    """
+    draft_config = config.get('web', {}).get('draft', {})
+    video = config['video']
+
+    try:
+        scale = min(1.0, max(0.1, float(draft.get('scale', draft_config.get('scale', 0.5)))))
+        fps = int(draft.get('fps', draft_config.get('fps', 15)))
+        start = max(0.0, float(draft.get('start', trim_info.get('start')) or 0.0))
+        end = draft.get('end', trim_info.get('end'))
+        end = None if end is None else float(end)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid draft settings') from None
+    if fps < 1:
+        raise ValueError('Draft fps must be at least 1')
+    if start >= duration:
+        raise ValueError(f'Draft start {start:.2f} s is past the end of the track ({duration:.2f} s)')
+
+    max_seconds = draft_config.get('max_seconds', 20)
+    end = min(start + max_seconds if end is None else end, start + max_seconds, duration)
+    if end <= start:
+        raise ValueError('Draft end must be after its start')
+
+    _scale_video(config, scale)
+    video['fps'] = min(video['fps'], fps)
+    # The same frame count render_with_progress will use
+    if int(end * video['fps']) - int(round(start * video['fps'])) < 1:
+        raise ValueError('Draft window is shorter than one frame')
+    return start, end
+
+
 @app.route('/upload', methods=['POST'])
 def upload():
+    # Turn jobs away before saving anything when they could not be queued
+    if scheduler.is_full():
+        return _queue_full_response()
+
     # Support reusing audio from a previous job
     reuse_job_id = request.form.get('reuse_audio_job_id')
     sample_file = request.form.get('sample_file')
 
     if reuse_job_id:
-        src_audio = None
-        original_filename = 'audio.mp3'
-
-        # Try in-memory jobs dict first
-        if reuse_job_id in jobs:
-            prev_job = jobs[reuse_job_id]
-            src_audio = prev_job.get('original_audio_path') or prev_job.get('audio_path')
-            original_filename = prev_job.get('original_filename') or prev_job.get('filename', 'audio.mp3')
-
-        # Fallback: search on disk (survives server restart)
-        if not src_audio or not os.path.exists(src_audio):
-            src_audio = _find_audio_on_disk(reuse_job_id)
-            if src_audio:
-                original_filename = os.path.basename(src_audio)
-
-        if not src_audio or not os.path.exists(src_audio):
+        # The new job shares the stored audio of the previous one
+        prev_job = store.get_job(reuse_job_id)
+        audio_path = prev_job and prev_job['original_audio_path']
+        if not audio_path or not os.path.exists(audio_path):
             return jsonify({'error': 'Previous audio file not found. Please re-upload the audio.'}), 400
 
         job_id = str(uuid.uuid4())[:8]
+        audio_hash = prev_job['audio_hash']
+        original_filename = prev_job['original_filename'] or prev_job['filename'] or 'audio.mp3'
         filename = secure_filename(original_filename)
-        # Copy audio to new job path
-        import shutil
-        audio_path = app.config['UPLOAD_FOLDER'] / f"{job_id}_{filename}"
-        shutil.copy2(src_audio, str(audio_path))
     elif sample_file:
         # Use a sample audio file
         safe_name = secure_filename(sample_file)
@@ -451,9 +612,7 @@ def upload():
         job_id = str(uuid.uuid4())[:8]
         original_filename = safe_name
         filename = safe_name
-        import shutil
-        audio_path = app.config['UPLOAD_FOLDER'] / f"{job_id}_{filename}"
-        shutil.copy2(str(sample_path), str(audio_path))
+        audio_hash, audio_path = _store_audio(sample_path, filename)
     else:
         if 'audio' not in request.files:
             return jsonify({'error': 'No file selected'}), 400
@@ -472,12 +631,19 @@ def upload():
 
         original_filename = file.filename  # Keep the user's original filename
         filename = secure_filename(file.filename)
-        audio_path = app.config['UPLOAD_FOLDER'] / f"{job_id}_{filename}"
-        file.save(str(audio_path))
+        upload_path = app.config['UPLOAD_FOLDER'] / f"{job_id}_{filename}"
+        file.save(str(upload_path))
+        audio_hash, audio_path = _store_audio(upload_path, filename, move=True)
 
     # Start from default config
     config = ConfigLoader().config
 
+    # Re-renders of the same track (reused audio, samples, parameter tweaks)
+    # skip decoding and analysis via the content-addressed cache
+    config['audio'].setdefault('cache', {}).update(
+        enabled=True, dir=str(app.config['CACHE_FOLDER'])
+    )
+
     # Parse pipeline config from JSON body field
     pipeline_json = request.form.get('pipeline_config')
     if pipeline_json:
@@ -486,34 +652,7 @@ def upload():
         except json.JSONDecodeError:
             return jsonify({'error': 'Invalid pipeline config JSON'}), 400
 
-        # Set video params
-        video = pipeline_data.get('video', {})
-        if video.get('width'):
-            config['video']['width'] = int(video['width'])
-        if video.get('height'):
-            config['video']['height'] = int(video['height'])
-        if video.get('fps'):
-            config['video']['fps'] = int(video['fps'])
-
-        # Set colors
-        colors = pipeline_data.get('colors', {})
-        if colors.get('primary'):
-            config['visualization']['colors']['primary'] = parse_color(colors['primary'])
-        if colors.get('secondary'):
-            config['visualization']['colors']['secondary'] = parse_color(colors['secondary'])
-
-        # Set pipeline order
-        layer_order = pipeline_data.get('order', [])
-        if layer_order:
-            config['pipeline']['order'] = layer_order
-
-        # Set per-layer params
-        layer_params = pipeline_data.get('layer_params', {})
-        for layer_name, params in layer_params.items():
-            if layer_name not in config['pipeline']:
-                config['pipeline'][layer_name] = {}
-            for key, value in params.items():
-                config['pipeline'][layer_name][key] = value
+        _apply_pipeline_data(config, pipeline_data)
     else:
         # Fallback: legacy form fields
         config['video']['width'] = int(request.form.get('width', 1920))
@@ -527,9 +666,23 @@ def upload():
 
         config['pipeline']['order'] = ['background', 'particles', 'waveform', 'spectrum', 'effects']
 
-    # Trim audio if requested
     trim_info = pipeline_data.get('trim', {}) if pipeline_json else {}
-    if trim_info and trim_info.get('start') is not None and trim_info.get('end') is not None:
+    # "draft": true or {scale, fps, start, end}
+    draft = pipeline_data.get('draft') if pipeline_json else None
+    is_draft = draft is True or isinstance(draft, dict)
+    window = None
+    if is_draft:
+        # Drafts render a window of the untrimmed track, so its cached analysis is reused
+        try:
+            duration = librosa.get_duration(path=str(audio_path))
+        except Exception:
+            return jsonify({'error': 'Failed to load audio file. The file may be corrupted or not a valid audio format.'}), 400
+        try:
+            window = _apply_draft(config, draft if isinstance(draft, dict) else {}, trim_info, duration)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    elif trim_info and trim_info.get('start') is not None and trim_info.get('end') is not None:
+        # Trim audio if requested
         trim_start = float(trim_info['start'])
         trim_end = float(trim_info['end'])
         trimmed_path = app.config['UPLOAD_FOLDER'] / f"{job_id}_trimmed_{filename}"
@@ -552,38 +705,68 @@ def upload():
 
     output_path = app.config['OUTPUT_FOLDER'] / f"{job_id}_output.mp4"
 
-    # Store config for history — keep original (untrimmed) audio path for reuse
-    jobs[job_id] = {
-        'status': 'queued',
-        'progress': 0,
-        'message': 'Queued...',
-        'audio_path': str(audio_path),
-        'original_audio_path': str(app.config['UPLOAD_FOLDER'] / f"{job_id}_{filename}"),
-        'output_path': str(output_path),
-        'filename': filename,
-        'original_filename': original_filename,  # Clean name without job ID prefix
-        'config_snapshot': {
+    # Store config for history; reuse goes through audio_hash to the untrimmed audio
+    store.create_job(
+        job_id,
+        status='queued',
+        progress=0,
+        message='Queued...',
+        audio_hash=audio_hash,
+        audio_path=str(audio_path),
+        output_path=str(output_path),
+        filename=filename,
+        original_filename=original_filename,  # Clean name without job ID prefix
+        config_snapshot={
             'video': config['video'],
             'order': config['pipeline']['order'],
             'colors': config['visualization']['colors'],
-        }
-    }
+            'layer_params': {name: config['pipeline'].get(name, {})
+                             for name in config['pipeline']['order']},
+            'draft': {'start': window[0], 'end': window[1]} if is_draft else None,
+        },
+    )
+
+    # Short trimmed renders (previews) are queued ahead of full-length ones
+    priority = PRIORITY_RENDER
+    preview_seconds = config.get('web', {}).get('preview_seconds', 30)
+    if is_draft or request.form.get('priority') == 'preview' or (
+            trim_info and trim_info.get('start') is not None and trim_info.get('end') is not None
+            and float(trim_info['end']) - float(trim_info['start']) <= preview_seconds):
+        priority = PRIORITY_PREVIEW
 
-    thread = threading.Thread(target=process_video, args=(job_id, audio_path, output_path, config, 'pipeline'))
-    thread.daemon = True
-    thread.start()
+    try:
+        scheduler.submit(job_id, process_video,
+                         (audio_path, output_path, config, 'pipeline', window, is_draft),
+                         priority=priority)
+    except QueueFullError:
+        store.delete_job(job_id)
+        return _queue_full_response()
 
-    return jsonify({'job_id': job_id})
+    return jsonify({
+        'job_id': job_id,
+        'queue_position': scheduler.position(job_id),
+        # Whether /preview can play the video while it renders
+        'progressive': config.get('web', {}).get('progressive', True),
+    })
 
 
 STALL_TIMEOUT = 15  # seconds without progress update → consider stalled
 
 
-@app.route('/status/<job_id>')
-def status(job_id):
-    if job_id not in jobs:
-        return jsonify({'error': 'Job not found'}), 404
-    job = jobs[job_id]
+# Job fields sent to progress listeners (/status and /events)
+PROGRESS_FIELDS = ('status', 'stage', 'progress', 'message', 'queue_position',
+                   'frames_done', 'total_frames', 'fps', 'eta')
+
+# Seconds between /events keep-alives; queued jobs recheck their position more often
+EVENTS_KEEPALIVE = 10
+EVENTS_QUEUE_POLL = 1.0
+
+
+def _job_state(job_id):
+    """The job's stored fields merged with its latest live progress, or None if unknown."""
+    job = store.get_job(job_id)
+    if job is None:
+        return None
 
     # Detect stalled processing (no update for STALL_TIMEOUT seconds)
     if job['status'] == 'processing':
@@ -591,34 +774,93 @@ def status(job_id):
         if last and (_time.time() - last) > STALL_TIMEOUT:
             job['status'] = 'error'
             job['message'] = 'Render appears to have stalled (no progress for 60s)'
+            store.update_job(job_id, status=job['status'], message=job['message'])
 
-    return jsonify({
-        'status': job['status'],
-        'progress': job['progress'],
-        'message': job['message'],
-        'filename': job.get('filename', ''),
-        'config_snapshot': job.get('config_snapshot', {}),
+    live = progress_hub.latest(job_id)
+    if live and job['status'] not in FINISHED_STATUSES:
+        job.update(live)
+    job.setdefault('stage', job['status'])
+
+    job['queue_position'] = scheduler.position(job_id) if job['status'] == 'queued' else None
+    if job['queue_position'] is not None:
+        job['message'] = f"Queued (position {job['queue_position']})..."
+    return job
+
+
+@app.route('/status/<job_id>')
+def status(job_id):
+    job = _job_state(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    state = {key: job.get(key) for key in PROGRESS_FIELDS}
+    state['filename'] = job.get('filename', '')
+    state['config_snapshot'] = job.get('config_snapshot', {})
+    return jsonify(state)
+
+
+@app.route('/events/<job_id>')
+def events(job_id):
+    """Stream job progress as Server-Sent Events until the job finishes."""
+    if store.get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def stream():
+        subscription = progress_hub.subscribe(job_id)
+        try:
+            # Read after subscribing, so no update falls between snapshot and stream
+            job = _job_state(job_id)
+            state = {key: job.get(key) for key in PROGRESS_FIELDS}
+            yield f"data: {json.dumps(state)}\n\n"
+            last_sent = _time.monotonic()
+
+            while state['status'] not in FINISHED_STATUSES:
+                queued = state['status'] == 'queued'
+                try:
+                    update = subscription.get(timeout=EVENTS_QUEUE_POLL if queued else EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    # Nothing pushed: the queue moved on, the render stalled, or all is quiet
+                    job = _job_state(job_id)
+                    fresh = {key: job.get(key) for key in PROGRESS_FIELDS}
+                    if fresh == state:
+                        if _time.monotonic() - last_sent >= EVENTS_KEEPALIVE:
+                            last_sent = _time.monotonic()
+                            yield ": keep-alive\n\n"
+                        continue
+                    state = fresh
+                else:
+                    state.update((key, update[key]) for key in PROGRESS_FIELDS if key in update)
+                    if state['status'] != 'queued':
+                        state['queue_position'] = None
+                last_sent = _time.monotonic()
+                yield f"data: {json.dumps(state)}\n\n"
+        finally:
+            progress_hub.unsubscribe(job_id, subscription)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Keep reverse proxies from buffering the stream
     })
 
 
 @app.route('/cancel/<job_id>', methods=['POST'])
 def cancel(job_id):
-    """Set cancel flag on a running job."""
-    if job_id not in jobs:
+    """Drop a queued job, or set the cancel flag of a running one."""
+    job = store.get_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
-    job = jobs[job_id]
-    if job['status'] != 'processing':
+    if job['status'] not in ('queued', 'processing'):
         return jsonify({'error': 'Job is not running'}), 400
-    job['cancel'] = True
+    if scheduler.cancel(job_id) == 'queued':
+        _update_job(job_id, status='cancelled', message='Cancelled by user')
     return jsonify({'ok': True})
 
 
 @app.route('/download/<job_id>')
 def download(job_id):
-    if job_id not in jobs:
+    job = store.get_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
-
-    job = jobs[job_id]
     if job['status'] != 'completed':
         return jsonify({'error': 'Not ready'}), 400
 
@@ -630,13 +872,47 @@ def download(job_id):
     )
 
 
+# Following a video that is still being rendered: bytes per read, seconds between checks
+PREVIEW_CHUNK = 256 * 1024
+PREVIEW_POLL = 0.25
+
+
+def _follow_output(job_id, path):
+    """Yield the bytes of a job's output as they are written, until the job finishes."""
+    output = None
+    try:
+        while True:
+            if output is None and os.path.exists(path):
+                output = open(path, 'rb')
+            chunk = output.read(PREVIEW_CHUNK) if output is not None else b''
+            if chunk:
+                yield chunk
+                continue
+            job = store.get_job(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                # ffmpeg has exited; only what is already on disk is left
+                if output is not None and job is not None and job['status'] == 'completed':
+                    yield from iter(lambda: output.read(PREVIEW_CHUNK), b'')
+                return
+            _time.sleep(PREVIEW_POLL)
+    finally:
+        if output is not None:
+            output.close()
+
+
 @app.route('/preview/<job_id>')
 def preview(job_id):
-    """Serve video inline for preview (not as attachment)."""
-    if job_id not in jobs:
-        return jsonify({'error': 'Job not found'}), 404
+    """Serve video inline for preview (not as attachment).
 
-    job = jobs[job_id]
+    While a job renders, its fragmented MP4 output is streamed as it grows
+    (web.progressive), so playback can start after the first fragment.
+    """
+    job = store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] == 'processing' and server_config.get('web', {}).get('progressive', True):
+        return Response(_follow_output(job_id, job['output_path']), mimetype='video/mp4',
+                        headers={'Cache-Control': 'no-store'})
     if job['status'] != 'completed':
         return jsonify({'error': 'Not ready'}), 400
 
@@ -647,31 +923,11 @@ def preview(job_id):
     )
 
 
-def _find_audio_on_disk(job_id):
-    """Search uploads folder for audio files matching a job ID prefix (survives server restart)."""
-    upload_dir = app.config['UPLOAD_FOLDER']
-    # Look for files starting with the job_id prefix
-    for f in sorted(upload_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
-        if f.name.startswith(job_id + '_') and f.is_file():
-            ext = f.suffix.lower()
-            if ext in {'.mp3', '.wav', '.ogg', '.flac', '.aac', '.m4a', '.wma', '.opus'}:
-                return str(f)
-    return None
-
-
 @app.route('/audio/<job_id>')
 def serve_audio(job_id):
     """Serve the uploaded audio file for a given job (used by restore)."""
-    audio_path = None
-
-    # Try in-memory jobs dict first
-    if job_id in jobs:
-        job = jobs[job_id]
-        audio_path = job.get('original_audio_path') or job.get('audio_path')
-
-    # Fallback: search on disk (survives server restart)
-    if not audio_path or not os.path.exists(audio_path):
-        audio_path = _find_audio_on_disk(job_id)
+    job = store.get_job(job_id)
+    audio_path = job and job['original_audio_path']
 
     if not audio_path or not os.path.exists(audio_path):
         return jsonify({'error': 'Audio file not found'}), 404
@@ -679,5 +935,89 @@ def serve_audio(job_id):
     return send_file(audio_path, as_attachment=False)
 
 
+# Warm pipelines for /frame, shared by the request threads
+frame_cache = None if IS_WORKER else FrameCache.from_config(server_config)
+
+
+def _job_render_config(job):
+    """Rebuild a job's render config from its config_snapshot."""
+    config = copy.deepcopy(server_config)
+    snapshot = job['config_snapshot']
+    config['video'].update(snapshot.get('video', {}))
+    if snapshot.get('order'):
+        config['pipeline']['order'] = snapshot['order']
+    config['visualization']['colors'].update(snapshot.get('colors', {}))
+    for layer_name, params in snapshot.get('layer_params', {}).items():
+        config['pipeline'].setdefault(layer_name, {}).update(params)
+    return config
+
+
+@app.route('/frame', methods=['GET', 'POST'])
+def frame():
+    """One frame at ``t`` seconds of the track, as an image, for stills and scrubbing.
+
+    The audio is that of job ``job`` or of sample file ``sample``; the
+    pipeline is the job's, or ``pipeline_config`` in the /upload format.
+    Optional: ``scale`` (fraction of the resolution), ``format`` (jpeg/png).
+    """
+    params = request.values
+    try:
+        time_point = float(params['t'])
+        scale = min(1.0, max(0.1, float(params.get('scale', 1.0))))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Missing or invalid time "t" or scale'}), 400
+
+    if params.get('job'):
+        job = store.get_job(params['job'])
+        audio_path = job and job['original_audio_path']
+        if not audio_path or not os.path.exists(audio_path):
+            return jsonify({'error': 'Audio file not found'}), 404
+        audio_hash = job['audio_hash']
+        config = _job_render_config(job)
+    elif params.get('sample'):
+        sample_path = app.config['SAMPLES_FOLDER'] / secure_filename(params['sample'])
+        if not sample_path.exists():
+            return jsonify({'error': 'Sample not found'}), 404
+        audio_path = str(sample_path)
+        audio_hash = AnalysisCache.file_digest(audio_path)
+        config = copy.deepcopy(server_config)
+    else:
+        return jsonify({'error': 'Either "job" or "sample" is required'}), 400
+
+    if params.get('pipeline_config'):
+        try:
+            _apply_pipeline_data(config, json.loads(params['pipeline_config']))
+        except (json.JSONDecodeError, AttributeError, ValueError):
+            return jsonify({'error': 'Invalid pipeline config JSON'}), 400
+    if scale < 1.0:
+        _scale_video(config, scale)
+    config['audio'].setdefault('cache', {}).update(
+        enabled=True, dir=str(app.config['CACHE_FOLDER'])
+    )
+
+    still_config = server_config.get('web', {}).get('still', {})
+    fmt = params.get('format', still_config.get('format', 'jpeg')).lower()
+    if fmt not in IMAGE_FORMATS:
+        return jsonify({'error': f'Unsupported format "{fmt}"'}), 400
+
+    start = _time.perf_counter()
+    try:
+        still = frame_cache.get(audio_hash, audio_path, config)
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Invalid pipeline: {e}'}), 400
+    duration = still.visualizer.audio.duration
+    if not 0 <= time_point <= duration:
+        return jsonify({'error': f'Time {time_point} is outside the track (0-{duration:.2f} s)'}), 400
+    with still.lock:
+        image = still.render(time_point)
+    data = encode_image(image, fmt, still_config.get('quality', 85))
+
+    response = Response(data, mimetype=IMAGE_FORMATS[fmt][1])
+    # Layer state carries over between requests, so the same URL may differ slightly
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['Server-Timing'] = f'render;dur={(_time.perf_counter() - start) * 1000:.1f}'
+    return response
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
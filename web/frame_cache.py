@@ -0,0 +1,64 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+from audio_visualizer.audio_processor import AudioProcessor
+from audio_visualizer.still import StillRenderer
+from audio_visualizer.visualizer_factory import VisualizerFactory
+
+
+def _config_digest(config: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class FrameCache:
+    """Warm pipelines for single-frame requests (/frame), least recently used out.
+
+    Entries are StillRenderers keyed by (audio hash, config hash). Decoded
+    audio is shared by every entry built from the same track with the same
+    audio settings and frame rate, and stays in memory while one of them is
+    cached; only the first request for a track pays for loading it.
+    """
+
+    def __init__(self, size: int = 4, preroll_seconds: float = 0.5):
+        self.size = max(1, size)
+        self.preroll_seconds = preroll_seconds
+        self._lock = threading.Lock()
+        # (audio hash, config hash) -> (audio key, StillRenderer)
+        self._entries = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'FrameCache':
+        still_config = config.get('web', {}).get('still', {})
+        return cls(still_config.get('cache_size', 4), still_config.get('preroll_seconds', 0.5))
+
+    def get(self, audio_hash: str, audio_path: str, config: Dict[str, Any]) -> StillRenderer:
+        """The StillRenderer for this track and config, building it on a miss."""
+        key = (audio_hash, _config_digest(config))
+        audio_key = (audio_hash, _config_digest(config['audio']), config['video']['fps'])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+            audio = next((still.visualizer.audio for other_key, still in self._entries.values()
+                          if other_key == audio_key), None)
+
+        # Built outside the lock, so a slow audio load holds up no other request
+        if audio is None:
+            audio = AudioProcessor(config).load_audio(audio_path)
+        visualizer = VisualizerFactory.create('pipeline', config, audio)
+        still = StillRenderer(visualizer, config['video']['fps'], self.preroll_seconds)
+
+        with self._lock:
+            self._entries[key] = (audio_key, still)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return still
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio (
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    audio_hash TEXT,
+    audio_path TEXT,
+    output_path TEXT,
+    output_bytes INTEGER NOT NULL DEFAULT 0,
+    filename TEXT,
+    original_filename TEXT,
+    config_snapshot TEXT,
+    created_at REAL NOT NULL,
+    last_update REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_audio_hash ON jobs (audio_hash);
+CREATE INDEX IF NOT EXISTS idx_jobs_last_update ON jobs (last_update);
+"""
+
+# Statuses of jobs that no worker will touch again
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+
+JOB_FIELDS = ('status', 'progress', 'message', 'audio_hash', 'audio_path', 'output_path',
+              'output_bytes', 'filename', 'original_filename', 'config_snapshot',
+              'last_update')
+
+
+class JobStore:
+    """Web job state and uploaded audio, kept in SQLite so it survives restarts.
+
+    Uploaded audio is stored once per content hash (the ``audio`` table);
+    jobs refer to it by ``audio_hash``. Lookups by job id and audio hash go
+    through indexes instead of scanning the uploads folder. Each thread and
+    process opens its own connection; WAL mode lets readers run alongside
+    the writer.
+
+    sweep() deletes finished jobs older than ``ttl_seconds`` together with
+    their files, then the oldest finished jobs until uploads and outputs fit
+    in ``max_bytes``; audio no job refers to any more is deleted with them.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 72 * 3600,
+                 max_bytes: int = 5 * 1024 ** 3):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sweeper = None
+        self._stop = threading.Event()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], default_path: str) -> 'JobStore':
+        """Build a store from the ``web`` config section."""
+        web_config = config.get('web', {})
+        return cls(
+            os.path.expanduser(web_config.get('database') or default_path),
+            ttl_seconds=web_config.get('ttl_hours', 72) * 3600,
+            max_bytes=int(web_config.get('max_disk_mb', 5120) * 1024 * 1024),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # Jobs
+
+    def create_job(self, job_id: str, **fields):
+        now = time.time()
+        fields.setdefault('status', 'queued')
+        fields['last_update'] = now
+        if 'config_snapshot' in fields:
+            fields['config_snapshot'] = json.dumps(fields['config_snapshot'])
+        columns = ['job_id', 'created_at'] + [k for k in fields if k in JOB_FIELDS]
+        values = [job_id, now] + [fields[k] for k in columns[2:]]
+        with self._connect() as conn:
+            conn.execute(f"INSERT INTO jobs ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' * len(columns))})", values)
+
+    def update_job(self, job_id: str, **fields):
+        """Set job fields and refresh ``last_update``."""
+        fields['last_update'] = time.time()
+        if 'config_snapshot' in fields:
+            fields['config_snapshot'] = json.dumps(fields['config_snapshot'])
+        columns = [k for k in fields if k in JOB_FIELDS]
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in columns)} "
+                         f"WHERE job_id = ?", [fields[k] for k in columns] + [job_id])
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's fields, with ``original_audio_path`` from its stored audio; None if unknown."""
+        row = self._connect().execute(
+            "SELECT jobs.*, audio.path AS original_audio_path FROM jobs "
+            "LEFT JOIN audio ON audio.hash = jobs.audio_hash WHERE job_id = ?",
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['config_snapshot'] = json.loads(job['config_snapshot'] or '{}')
+        return job
+
+    def delete_job(self, job_id: str):
+        """Delete a job with its output and work files, and its audio if no other job uses it."""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        for path in (job['output_path'], job['audio_path']):
+            if path and path != job['original_audio_path']:
+                _unlink(path)
+        if job['audio_hash']:
+            self._delete_unused_audio(job['audio_hash'])
+
+    def interrupt_unfinished(self) -> int:
+        """Mark jobs a previous server process left queued or running as failed."""
+        placeholders = ', '.join('?' * len(FINISHED_STATUSES))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = 'error', message = 'Interrupted by a server restart', "
+                f"last_update = ? WHERE status NOT IN ({placeholders})",
+                (time.time(),) + FINISHED_STATUSES)
+        return cursor.rowcount
+
+    # Audio
+
+    def add_audio(self, audio_hash: str, path: str):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO audio (hash, path, bytes, created_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (audio_hash, path, os.path.getsize(path), time.time()))
+
+    def get_audio_path(self, audio_hash: str) -> Optional[str]:
+        row = self._connect().execute("SELECT path FROM audio WHERE hash = ?",
+                                      (audio_hash,)).fetchone()
+        if row is None or not os.path.exists(row['path']):
+            return None
+        return row['path']
+
+    def _delete_unused_audio(self, audio_hash: str):
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM jobs WHERE audio_hash = ? LIMIT 1",
+                        (audio_hash,)).fetchone():
+            return
+        row = conn.execute("SELECT path FROM audio WHERE hash = ?", (audio_hash,)).fetchone()
+        with conn:
+            conn.execute("DELETE FROM audio WHERE hash = ?", (audio_hash,))
+        if row is not None:
+            _unlink(row['path'])
+
+    # Cleanup
+
+    def disk_usage(self) -> int:
+        conn = self._connect()
+        audio_bytes = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM audio").fetchone()[0]
+        output_bytes = conn.execute("SELECT COALESCE(SUM(output_bytes), 0) FROM jobs").fetchone()[0]
+        return audio_bytes + output_bytes
+
+    def sweep_orphans(self, folder: str) -> int:
+        """Delete files in ``folder`` older than the TTL that belong to no job or audio entry.
+
+        Such files are left by crashes or were written before the store existed.
+        Names start with a job id or audio hash, followed by ``_`` or ``.``.
+        """
+        conn = self._connect()
+        cutoff = time.time() - self.ttl_seconds
+        deleted = 0
+        for entry in os.scandir(folder):
+            if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+                continue
+            key = entry.name.split('_', 1)[0].split('.', 1)[0]
+            if (conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (key,)).fetchone()
+                    or conn.execute("SELECT 1 FROM audio WHERE hash = ?", (key,)).fetchone()):
+                continue
+            _unlink(entry.path)
+            deleted += 1
+        return deleted
+
+    def sweep(self) -> int:
+        """Expire finished jobs by age, then by disk quota; returns the number deleted."""
+        conn = self._connect()
+        placeholders = ', '.join('?' * len(FINISHED_STATUSES))
+        finished = f"status IN ({placeholders})"
+
+        expired = conn.execute(
+            f"SELECT job_id FROM jobs WHERE last_update < ? AND {finished}",
+            (time.time() - self.ttl_seconds,) + FINISHED_STATUSES).fetchall()
+        for row in expired:
+            self.delete_job(row['job_id'])
+        deleted = len(expired)
+
+        while self.disk_usage() > self.max_bytes:
+            row = conn.execute(
+                f"SELECT job_id FROM jobs WHERE {finished} ORDER BY last_update LIMIT 1",
+                FINISHED_STATUSES).fetchone()
+            if row is None:
+                break
+            self.delete_job(row['job_id'])
+            deleted += 1
+        return deleted
+
+    def start_sweeper(self, interval: float, folders=()):
+        """Run sweep(), and sweep_orphans() on ``folders``, every ``interval`` seconds."""
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    deleted = self.sweep()
+                    orphans = sum(self.sweep_orphans(folder) for folder in folders)
+                    if deleted or orphans:
+                        print(f"Job store: removed {deleted} expired job(s), {orphans} orphaned file(s)")
+                except Exception as e:
+                    print(f"Job store sweep failed: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._sweeper = threading.Thread(target=run, daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,68 @@
+import queue
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from web.job_store import FINISHED_STATUSES
+
+
+# Events a slow subscriber may fall behind by; older ones are dropped
+SUBSCRIBER_BACKLOG = 8
+
+
+class ProgressHub:
+    """Fans job updates out to Server-Sent Events subscribers.
+
+    Keeps the latest merged state of every active job, so a subscriber
+    connecting mid-render starts from a full snapshot. Every published
+    event is a whole snapshot too, which lets a subscriber that falls
+    behind skip events without losing anything.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._subscribers = defaultdict(list)
+
+    def publish(self, job_id: str, **fields):
+        with self._lock:
+            state = self._latest.setdefault(job_id, {})
+            state.update(fields)
+            snapshot = dict(state)
+            if snapshot.get('status') in FINISHED_STATUSES:
+                # The job store has the final state from here on
+                del self._latest[job_id]
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for events in subscribers:
+            _put_latest(events, snapshot)
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._latest.get(job_id)
+            return dict(state) if state is not None else None
+
+    def subscribe(self, job_id: str) -> queue.Queue:
+        events = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        with self._lock:
+            self._subscribers[job_id].append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+
+def _put_latest(events: queue.Queue, snapshot: Dict[str, Any]):
+    while True:
+        try:
+            events.put_nowait(snapshot)
+            return
+        except queue.Full:
+            try:
+                events.get_nowait()
+            except queue.Empty:
+                pass
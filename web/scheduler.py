@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import cv2
+
+
+# Lower runs first; FIFO within a priority
+PRIORITY_PREVIEW = 0
+PRIORITY_RENDER = 1
+
+# Per-process state for job workers, set by _init_job_worker
+_worker_state = {}
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while max_queue jobs are already waiting."""
+    pass
+
+
+def _init_job_worker(events, cancel_flags):
+    # One job per process; keep OpenCV from spawning its own thread pool
+    cv2.setNumThreads(1)
+    _worker_state['events'] = events
+    _worker_state['cancel_flags'] = cancel_flags
+
+
+class JobContext:
+    """What a job function gets, in its worker process, to talk to the scheduler."""
+
+    def __init__(self, job_id: str, slot: int):
+        self.job_id = job_id
+        self.slot = slot
+
+    def update(self, **fields):
+        """Send job fields (status, progress, message, ...) to the web process."""
+        _worker_state['events'].put((self.job_id, fields))
+
+    def cancelled(self) -> bool:
+        return bool(_worker_state['cancel_flags'][self.slot])
+
+
+def _run_job(fn, job_id: str, slot: int, args):
+    fn(JobContext(job_id, slot), *args)
+
+
+class JobScheduler:
+    """Runs jobs in a fixed pool of worker processes, highest priority first.
+
+    At most ``workers`` jobs run at once, each in its own process, so
+    concurrent renders use separate cores instead of sharing one GIL. The
+    rest wait in a priority queue of at most ``max_queue`` entries; beyond
+    that, submit() raises QueueFullError. Job functions are called as
+    ``fn(context, *args)`` with a JobContext; the fields they report are
+    passed to ``on_update(job_id, **fields)`` on a listener thread here.
+    """
+
+    def __init__(self, workers: int, max_queue: int,
+                 on_update: Callable[..., None]):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.on_update = on_update
+
+        # Never fork the threaded web server; workers start from a fresh interpreter
+        self._context = multiprocessing.get_context('spawn')
+        self._events = self._context.Queue()
+        # One cancel flag per worker slot, shared with the worker processes
+        self._cancel_flags = self._context.Array('b', self.workers, lock=False)
+        self._executor = None
+        self._listener = None
+
+        self._lock = threading.RLock()
+        # (priority, sequence, job_id, fn, args)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._running = {}
+        self._free_slots = list(range(self.workers))
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    on_update: Callable[..., None]) -> 'JobScheduler':
+        web_config = config.get('web', {})
+        return cls(web_config.get('workers', 0), web_config.get('max_queue', 16), on_update)
+
+    def submit(self, job_id: str, fn: Callable, args: Sequence = (),
+               priority: int = PRIORITY_RENDER):
+        """Queue ``fn(context, *args)``; ``fn`` must be a picklable module-level function."""
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                raise QueueFullError(f"Render queue is full ({self.max_queue} jobs waiting)")
+            heapq.heappush(self._queue, (priority, next(self._sequence), job_id, fn, tuple(args)))
+            self._dispatch()
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self._queue) >= self.max_queue
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place of a waiting job in the queue, or None if it is not waiting."""
+        with self._lock:
+            for position, entry in enumerate(sorted(self._queue, key=lambda e: e[:2]), 1):
+                if entry[2] == job_id:
+                    return position
+        return None
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Drop a waiting job or flag a running one; returns 'queued', 'running' or None."""
+        with self._lock:
+            for i, entry in enumerate(self._queue):
+                if entry[2] == job_id:
+                    self._queue.pop(i)
+                    heapq.heapify(self._queue)
+                    return 'queued'
+            if job_id in self._running:
+                self._cancel_flags[self._running[job_id]] = 1
+                return 'running'
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'workers': self.workers, 'running': len(self._running),
+                    'queued': len(self._queue), 'max_queue': self.max_queue}
+
+    def shutdown(self):
+        with self._lock:
+            self._queue.clear()
+            for slot in self._running.values():
+                self._cancel_flags[slot] = 1
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._listener is not None:
+            self._events.put(None)
+            self._listener.join()
+            self._listener = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the web app starts no processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._context,
+                initializer=_init_job_worker,
+                initargs=(self._events, self._cancel_flags),
+            )
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+        return self._executor
+
+    def _dispatch(self):
+        # Called with the lock held
+        while self._free_slots and self._queue:
+            _, _, job_id, fn, args = heapq.heappop(self._queue)
+            slot = self._free_slots.pop()
+            self._cancel_flags[slot] = 0
+            self._running[job_id] = slot
+            executor = self._get_executor()
+            future = executor.submit(_run_job, fn, job_id, slot, args)
+            future.add_done_callback(
+                lambda f, job_id=job_id, executor=executor: self._finished(job_id, f, executor))
+
+    def _finished(self, job_id: str, future, executor: ProcessPoolExecutor):
+        error = future.exception()
+        with self._lock:
+            self._free_slots.append(self._running.pop(job_id))
+            # Every job of a broken pool fails; only the first replaces the pool
+            if isinstance(error, BrokenProcessPool) and executor is self._executor:
+                # A worker died (e.g. out of memory); start a fresh pool for the next jobs
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._dispatch()
+        if error is not None:
+            self.on_update(job_id, status='error', message=f"Render worker failed: {error}")
+
+    def _listen(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            job_id, fields = event
+            try:
+                self.on_update(job_id, **fields)
+            except Exception as e:
+                print(f"Job update for {job_id} failed: {e}")
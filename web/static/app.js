@@ -7,6 +7,8 @@ document.addEventListener('DOMContentLoaded', () => {
     let currentJobId = null;
     let restoredJobId = null;  // job_id whose audio we can reuse
     let sampleFile = null;     // filename of selected sample audio
+    let isDraft = false;       // whether the current job is a draft render
+    let isProgressive = false; // whether the current job can be watched while it renders
 
     // ── DOM refs ──
     const headerHome    = $('headerHome');
@@ -14,6 +16,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const uploadArea    = $('uploadArea');
     const fileName      = $('fileName');
     const renderBtn     = $('renderBtn');
+    const draftBtn      = $('draftBtn');
     const progressOverlay = $('progressOverlay');
     const progressFill  = $('progressFill');
     const progressText  = $('progressText');
@@ -21,6 +24,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const progressActions = $('progressActions');
     const progressCancel = $('progressCancel');
     const cancelRenderBtn = $('cancelRenderBtn');
+    const watchRenderBtn = $('watchRenderBtn');
     const progressError = $('progressError');
     const previewResultBtn  = $('previewResultBtn');
     const downloadResultBtn = $('downloadResultBtn');
@@ -29,6 +33,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const previewVideo      = $('previewVideo');
     const previewDownloadBtn = $('previewDownloadBtn');
     const previewCloseBtn   = $('previewCloseBtn');
+    const stillPreview      = $('stillPreview');
 
     // ── Init ──
     async function init() {
@@ -66,6 +71,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function selectSample(filename) {
+        hideStill();
         sampleFile = filename;
         restoredJobId = null;
         audioFile.value = '';
@@ -79,6 +85,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function updateRenderBtn() {
         const hasAudio = audioFile.files.length > 0 || restoredJobId || sampleFile;
         renderBtn.disabled = !(hasAudio && Pipeline.getCount() > 0);
+        draftBtn.disabled = renderBtn.disabled;
     }
 
     // Expose for Pipeline module
@@ -95,6 +102,7 @@ document.addEventListener('DOMContentLoaded', () => {
         fileName.textContent = '';
         uploadArea.classList.remove('has-file');
         Player.unloadAudio();
+        hideStill();
         $('resolution').value = '1920x1080';
         $('fps').value = '30';
         currentJobId = null;
@@ -121,6 +129,7 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     function onFileSelected() {
+        hideStill();
         restoredJobId = null;  // user picked a new file, clear reuse
         sampleFile = null;     // user picked a new file, clear sample
         if (audioFile.files.length > 0) {
@@ -138,10 +147,12 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // ── Preview Overlay ──
-    function showPreview(jobId) {
+    function showPreview(jobId, live) {
         previewOverlay.classList.add('visible');
         previewVideo.src = '/preview/' + jobId;
         previewVideo.load();
+        // A video still being rendered plays as it arrives; it can be downloaded once done
+        previewDownloadBtn.style.display = live ? 'none' : '';
         previewDownloadBtn.onclick = () => { window.location.href = '/download/' + jobId; };
     }
 
@@ -154,29 +165,89 @@ document.addEventListener('DOMContentLoaded', () => {
     previewCloseBtn.addEventListener('click', closePreview);
     previewOverlay.addEventListener('click', (e) => { if (e.target === previewOverlay) closePreview(); });
 
-    // ── Render / Submit ──
-    renderBtn.addEventListener('click', startRender);
+    // ── Frame at the playhead ──
+    // Audio the server already has (a sample or a previous job's) can be scrubbed frame by frame
+    const STILL_SCALE = 0.5;
+    let stillBusy = false;
+    let stillPending = null;
 
-    async function startRender() {
-        const file = audioFile.files[0];
-        const hasNewFile = !!file;
-        const hasReuse = !!restoredJobId;
-        const hasSample = !!sampleFile;
-        if ((!hasNewFile && !hasReuse && !hasSample) || Pipeline.getCount() === 0) return;
+    function stillSource() {
+        if (sampleFile) return ['sample', sampleFile];
+        if (restoredJobId) return ['job', restoredJobId];
+        return null;
+    }
+
+    function hideStill() {
+        stillPending = null;
+        stillPreview.classList.remove('visible');
+    }
 
+    async function requestStill(time) {
+        const source = stillSource();
+        if (!source || Pipeline.getCount() === 0) return;
+        // One request at a time; only the latest position is fetched next
+        if (stillBusy) { stillPending = time; return; }
+        stillBusy = true;
+
+        const formData = new FormData();
+        formData.append(source[0], source[1]);
+        formData.append('t', time.toFixed(3));
+        formData.append('scale', STILL_SCALE);
+        formData.append('pipeline_config', JSON.stringify(buildPipelineConfig()));
+        try {
+            const resp = await fetch('/frame', { method: 'POST', body: formData });
+            // Skip frames of audio that was replaced while this one rendered
+            const current = stillSource();
+            if (resp.ok && current && current.join() === source.join()) {
+                if (stillPreview.src.startsWith('blob:')) URL.revokeObjectURL(stillPreview.src);
+                stillPreview.src = URL.createObjectURL(await resp.blob());
+                stillPreview.classList.add('visible');
+            }
+        } catch (e) {
+            // ignore — the next seek tries again
+        }
+        stillBusy = false;
+
+        if (stillPending !== null) {
+            const next = stillPending;
+            stillPending = null;
+            requestStill(next);
+        }
+    }
+
+    $('audioPlayer').addEventListener('seeked', () => requestStill($('audioPlayer').currentTime));
+
+    // ── Render / Submit ──
+    renderBtn.addEventListener('click', () => startRender(false));
+    draftBtn.addEventListener('click', () => startRender(true));
+
+    function buildPipelineConfig() {
         const res = $('resolution').value.split('x');
         const fps = $('fps').value;
-        const pipelineConfig = {
+        return {
             video: { width: parseInt(res[0]), height: parseInt(res[1]), fps: parseInt(fps) },
             colors: { primary: $('primaryColor').value, secondary: $('secondaryColor').value },
             order: Pipeline.getOrder(),
             layer_params: Pipeline.getLayerParams(),
         };
+    }
+
+    async function startRender(draft) {
+        const file = audioFile.files[0];
+        const hasNewFile = !!file;
+        const hasReuse = !!restoredJobId;
+        const hasSample = !!sampleFile;
+        if ((!hasNewFile && !hasReuse && !hasSample) || Pipeline.getCount() === 0) return;
+
+        const pipelineConfig = buildPipelineConfig();
 
         if (Player.hasTrim()) {
             const t = Player.getTrim();
             pipelineConfig.trim = { start: t.start, end: t.end };
         }
+        // Drafts: reduced resolution and fps over (a window of) the trim selection
+        if (draft) pipelineConfig.draft = {};
+        isDraft = draft;
 
         const formData = new FormData();
         if (hasNewFile) {
@@ -196,7 +267,8 @@ document.addEventListener('DOMContentLoaded', () => {
             if (!resp.ok) { const err = await resp.json(); throw new Error(err.error || 'Upload failed'); }
             const data = await resp.json();
             currentJobId = data.job_id;
-            pollProgress();
+            isProgressive = !!data.progressive;
+            watchProgress();
         } catch (e) {
             showProgressError(e.message);
         }
@@ -205,11 +277,12 @@ document.addEventListener('DOMContentLoaded', () => {
     // ── Progress ──
     function showProgress() {
         progressOverlay.classList.add('visible');
-        progressTitle.textContent = 'Rendering...';
+        progressTitle.textContent = isDraft ? 'Rendering draft...' : 'Rendering...';
         progressFill.style.width = '0%';
         progressText.textContent = '0%';
         progressActions.style.display = 'none';
         progressCancel.style.display = '';
+        watchRenderBtn.style.display = 'none';
         progressError.style.display = 'none';
     }
 
@@ -224,6 +297,11 @@ document.addEventListener('DOMContentLoaded', () => {
         closeResultBtn.textContent = 'Close';
     }
 
+    // The preview opens on top of the progress card; the render carries on
+    watchRenderBtn.addEventListener('click', () => {
+        if (currentJobId) showPreview(currentJobId, true);
+    });
+
     cancelRenderBtn.addEventListener('click', async () => {
         if (!currentJobId) return;
         cancelRenderBtn.disabled = true;
@@ -231,62 +309,84 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             await fetch('/cancel/' + currentJobId, { method: 'POST' });
         } catch (e) {
-            // ignore — poll will pick up the status
+            // ignore — the event stream will pick up the status
         }
     });
 
-    function pollProgress() {
-        let lastProgress = -1;
-        let lastProgressTime = Date.now();
-        const STALL_MS = 10000; // 10 seconds without progress change → stalled
-
-        const interval = setInterval(async () => {
-            try {
-                const resp = await fetch('/status/' + currentJobId);
-                const data = await resp.json();
-                progressFill.style.width = data.progress + '%';
-                progressText.textContent = data.message || (data.progress + '%');
-
-                // Track stall: if progress hasn't changed for STALL_MS, show error
-                if (data.status === 'processing') {
-                    if (data.progress !== lastProgress) {
-                        lastProgress = data.progress;
-                        lastProgressTime = Date.now();
-                    } else if (Date.now() - lastProgressTime > STALL_MS) {
-                        clearInterval(interval);
-                        showProgressError('Render appears stalled — no progress for 30s');
-                        return;
-                    }
-                }
-
-                if (data.status === 'completed') {
-                    clearInterval(interval);
-                    progressTitle.textContent = 'Done!';
-                    progressText.textContent = 'Video is ready';
-                    progressFill.style.width = '100%';
-                    progressCancel.style.display = 'none';
-                    progressActions.style.display = 'flex';
-                    previewResultBtn.style.display = '';
-                    downloadResultBtn.style.display = '';
-                    closeResultBtn.textContent = 'Close';
-                    saveToHistory();
-                } else if (data.status === 'cancelled') {
-                    clearInterval(interval);
-                    // Close overlay, keep all parameters intact, don't save to history
-                    progressOverlay.classList.remove('visible');
-                    // Reset cancel button for next use
-                    cancelRenderBtn.disabled = false;
-                    cancelRenderBtn.textContent = '✕ Cancel';
-                    currentJobId = null;
-                } else if (data.status === 'error') {
-                    clearInterval(interval);
-                    showProgressError(data.message);
-                }
-            } catch (e) {
-                clearInterval(interval);
+    function formatEta(seconds) {
+        const s = Math.max(0, Math.round(seconds));
+        return Math.floor(s / 60) + ':' + String(s % 60).padStart(2, '0');
+    }
+
+    function progressLabel(data) {
+        if (data.stage === 'rendering' && data.frames_done) {
+            let label = data.message + ' · ' + data.fps + ' fps';
+            if (data.eta != null) label += ' · ETA ' + formatEta(data.eta);
+            return label;
+        }
+        return data.message || (data.progress + '%');
+    }
+
+    function watchProgress() {
+        // Progress is pushed by the server (Server-Sent Events), a few updates per second
+        const STALL_MS = 30000; // 30 seconds without any update while processing → stalled
+        const events = new EventSource('/events/' + currentJobId);
+        let stallTimer = null;
+
+        function finish() {
+            events.close();
+            clearTimeout(stallTimer);
+        }
+
+        function armStallTimer() {
+            clearTimeout(stallTimer);
+            stallTimer = setTimeout(() => {
+                finish();
+                showProgressError('Render appears stalled — no progress for 30s');
+            }, STALL_MS);
+        }
+
+        events.onmessage = (e) => {
+            const data = JSON.parse(e.data);
+            progressFill.style.width = data.progress + '%';
+            progressText.textContent = progressLabel(data);
+
+            if (data.status === 'processing') {
+                armStallTimer();
+                if (isProgressive && data.frames_done) watchRenderBtn.style.display = '';
+            } else if (data.status === 'completed') {
+                finish();
+                progressTitle.textContent = 'Done!';
+                progressText.textContent = isDraft ? 'Draft is ready' : 'Video is ready';
+                progressFill.style.width = '100%';
+                progressCancel.style.display = 'none';
+                progressActions.style.display = 'flex';
+                previewResultBtn.style.display = '';
+                downloadResultBtn.style.display = '';
+                closeResultBtn.textContent = 'Close';
+                // Drafts are throwaway proxies; only final renders go to history
+                if (!isDraft) saveToHistory();
+            } else if (data.status === 'cancelled') {
+                finish();
+                // Close overlay, keep all parameters intact, don't save to history
+                progressOverlay.classList.remove('visible');
+                // Reset cancel button for next use
+                cancelRenderBtn.disabled = false;
+                cancelRenderBtn.textContent = '✕ Cancel';
+                currentJobId = null;
+            } else if (data.status === 'error') {
+                finish();
+                showProgressError(data.message);
+            }
+        };
+
+        events.onerror = () => {
+            // EventSource reconnects on its own unless the connection is gone for good
+            if (events.readyState === EventSource.CLOSED) {
+                finish();
                 showProgressError('Connection lost');
             }
-        }, 500);
+        };
     }
 
     previewResultBtn.addEventListener('click', () => {
@@ -351,6 +451,7 @@ document.addEventListener('DOMContentLoaded', () => {
         uploadArea.classList.add('has-file');
 
         // Load audio from server if job_id is available
+        hideStill();
         restoredJobId = entry.id || null;
         if (restoredJobId) {
             const trimOpts = entry.trim || null;